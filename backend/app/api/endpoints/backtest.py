@@ -0,0 +1,45 @@
+# app/api/endpoints/backtest.py
+from fastapi import APIRouter, HTTPException
+from typing import Dict, List
+from functools import partial
+from app.models.schemas import BacktestRequest
+from app.api.endpoints.predict import predictor, training_jobs, resolve_ingest_path
+from app.core.log import get_logger
+
+router = APIRouter(prefix="/backtest", tags=["backtest"])
+logger = get_logger(__name__)
+
+def run_backtest(trades_path: str, tokens_path: str, success_mcap: float, thresholds: List[float],
+                 progress) -> Dict:
+    from app.ml import ingest
+    progress('loading', 0.0)
+    trades_df = ingest.read_trades(trades_path)
+    tokens_df = ingest.read_tokens(tokens_path)
+    return predictor.backtest(trades_df, tokens_df, thresholds=thresholds, success_mcap=success_mcap,
+                              progress=progress)
+
+@router.post("", status_code=202)
+async def start_backtest(request: BacktestRequest):
+    """Replay trade files from the ingest directory through the served model; poll /backtest/{job_id}"""
+    if not request.thresholds or any(not 0 <= t <= 1 for t in request.thresholds):
+        raise HTTPException(status_code=400, detail="thresholds must be probabilities between 0 and 1")
+    trades_path = resolve_ingest_path(request.trades_path)
+    tokens_path = resolve_ingest_path(request.tokens_path)
+    
+    # Backtests share the training queue: both are long, CPU-heavy and read the same files
+    job_id = training_jobs.submit(
+        partial(run_backtest, trades_path, tokens_path, request.success_mcap, request.thresholds),
+        kind='backtest',
+        trades_path=request.trades_path,
+        tokens_path=request.tokens_path
+    )
+    logger.info("Queued backtest job %s", job_id)
+    
+    return {"status": "Backtest started", "job_id": job_id}
+
+@router.get("/{job_id}")
+async def backtest_status(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None or job.get('kind') != 'backtest':
+        raise HTTPException(status_code=404, detail=f"Backtest job not found: {job_id}")
+    return job
@@ -0,0 +1,83 @@
+# app/api/endpoints/models.py
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.api.endpoints.predict import predictor
+from app.core.log import get_logger
+
+router = APIRouter(prefix="/model", tags=["models"])
+logger = get_logger(__name__)
+
+@router.get("")
+async def model_info():
+    """Served model version and the versions available on disk (current is null until the model is loaded)"""
+    # peek: reading current would run a deferred model load on the event loop
+    bundle = predictor.registry.peek()
+    return {
+        "current": bundle.info() if bundle else None,
+        "versions": predictor.registry.versions(),
+        "pinned": predictor.registry.pinned
+    }
+
+@router.post("/reload")
+async def reload_model(version: Optional[str] = None):
+    """Hot-swap to the newest model on disk, or pin a specific version (e.g. for rollback).
+    
+    The pin is stored in the model manifest, so every worker's watcher moves to the pinned
+    version within MODEL_WATCH_INTERVAL; a reload without a version (or a newly trained model)
+    lifts it.
+    """
+    registry = predictor.registry
+    try:
+        # Pick up versions copied into the model directory by hand
+        await run_in_threadpool(registry.rebuild_manifest)
+        if version is None:
+            bundle, reloaded = await run_in_threadpool(registry.reload, True)
+        else:
+            if version not in registry.versions():
+                raise HTTPException(status_code=404, detail=f"Model version not found: {version}")
+            bundle, reloaded = await run_in_threadpool(registry.load, version, True), True
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Model reload error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Model reload failed: {str(e)}"
+        )
+    
+    return {
+        "reloaded": reloaded,
+        "current": bundle.info() if bundle else None,
+        "pinned": registry.pinned
+    }
+
+@router.get("/shadow")
+async def shadow_stats():
+    """Shadow models and how their scores compare with the served model's so far"""
+    return predictor.shadow.stats()
+
+@router.post("/shadow")
+async def set_shadow_models(versions: Optional[str] = None):
+    """Replace the shadow models with a comma-separated list of versions (none: stop shadowing)"""
+    requested = [v.strip() for v in (versions or "").split(",") if v.strip()]
+    try:
+        await run_in_threadpool(predictor.registry.rebuild_manifest)
+        unknown = [version for version in requested if version not in predictor.registry.versions()]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Model version not found: {', '.join(unknown)}")
+        active = await run_in_threadpool(predictor.set_shadow_models, requested)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # A candidate needing features the served model doesn't produce
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Shadow model update error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Shadow model update failed: {str(e)}"
+        )
+    
+    return {"shadow": active, **predictor.shadow.stats()}
@@ -1,124 +1,355 @@
 # app/api/endpoints/predict.py
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
-from app.models.schemas import Trade, PredictionResponse, TokenData, Analysis  # Import Analysis from schemas
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import TYPE_CHECKING, List, Dict, Tuple
+from functools import partial
+from starlette.concurrency import run_in_threadpool
+from app.models.schemas import (
+    Trade, PredictionResponse, TokenData, Analysis, PredictionRequest,
+    BatchPredictionResult, BatchPredictionResponse, TrainingIngestRequest
+)
 from app.ml.predictor import QuickTokenPredictor
-import pandas as pd
-import traceback
+from app.api import wire
+from app.ml.jobs import JOBS_DIRNAME, TrainingJobManager
+from app.core.concurrency import run_inference
+from app.core.batching import MicroBatcher
+from app.core.config import settings
+from pathlib import Path
+import os
+import uuid
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 router = APIRouter(tags=["predictions"])
-predictor = QuickTokenPredictor()
+logger = get_logger(__name__)
+# The model is read on first use or by the startup warm-up (settings.model_load), not at import
+predictor = QuickTokenPredictor(lazy=True)
+# Job status is kept under the model directory too, so polls work whichever worker process they reach
+training_jobs = TrainingJobManager(jobs_dir=os.path.join(predictor.model_dir, JOBS_DIRNAME))
+# Concurrent /predict requests are scored together; identical in-flight requests share one result
+prediction_batcher = MicroBatcher(predictor.predict_prepared, settings.batch_window_ms / 1000, settings.batch_max_size)
 
-def validate_dataframe(df: pd.DataFrame, required_cols: List[str], name: str) -> None:
-    print(f"\nValidating {name} DataFrame:")
-    print(f"Available columns: {df.columns.tolist()}")
-    print(f"Required columns: {required_cols}")
+def validate_dataframe(df: "pd.DataFrame", required_cols: List[str], name: str) -> None:
+    logger.debug("Validating %s DataFrame: available %s, required %s", name, df.columns.tolist(), required_cols)
     
     df_cols = set(df.columns.str.lower())
     req_cols = set(col.lower() for col in required_cols)
     missing = [col for col in required_cols if col.lower() not in df_cols]
     
     if missing:
-        print(f"Missing columns: {missing}")
-        print(f"First row data: {df.iloc[0].to_dict() if len(df) > 0 else 'No data'}")
+        logger.warning("Missing columns in %s: %s", name, missing)
         raise HTTPException(
             status_code=400,
             detail=f"Missing required columns in {name}: {missing}"
         )
 
-@router.post("/train")
-async def train_model(trades: List[Dict], tokens: List[Dict]):
-    """Train the model with historical data"""
+def trades_to_records(trades: List[Trade]) -> List[Dict]:
+    return [
+        {
+            "mint": t.mint,
+            "traderPublicKey": t.traderPublicKey,
+            "txType": t.txType,
+            "tokenAmount": t.tokenAmount,
+            "vSolInBondingCurve": t.vSolInBondingCurve,
+            "vTokensInBondingCurve": t.vTokensInBondingCurve,
+            "timestamp": t.timestamp,
+            "marketCapSol": t.marketCapSol,
+            "holdersCount": t.holdersCount
+        } for t in trades
+    ]
+
+def token_to_record(token: TokenData) -> Dict:
+    return {
+        "mint": token.mint,
+        "initialBuySol": token.initialBuySol,
+        "initialBuyPercent": token.initialBuyPercent,
+        "liquidity": token.liquidity,
+        "marketCap": token.marketCap
+    }
+
+def build_response(is_promising: bool, probability: float, raw_analysis: Dict) -> PredictionResponse:
+    analysis = Analysis(
+        early_signs=raw_analysis["early_signs"],
+        feature_values=raw_analysis["feature_values"],
+        stage=raw_analysis.get("stage", "full")
+    )
+    return PredictionResponse(
+        isPromising=is_promising,
+        probability=float(probability),
+        analysis=analysis
+    )
+
+def build_training_frames(trades: List[Dict], tokens: List[Dict]) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    import pandas as pd
+    
+    # Convert to DataFrames
+    trades_df = pd.DataFrame(trades)
+    tokens_df = pd.DataFrame(tokens)
+    
+    # Validate required columns
+    required_trade_cols = [
+        'mint', 'traderPublicKey', 'txType', 'tokenAmount',
+        'vSolInBondingCurve', 'vTokensInBondingCurve', 'timestamp',"holdersCount"
+    ]
+    required_token_cols = [
+        'mint', 'initialBuySol', 'initialBuyPercent', 'liquidity', 'marketCap'
+    ]
+    
+    validate_dataframe(trades_df, required_trade_cols, "trades")
+    validate_dataframe(tokens_df, required_token_cols, "tokens")
+    return trades_df, tokens_df
+
+def run_training(trades_df: "pd.DataFrame", tokens_df: "pd.DataFrame", incremental: bool, progress) -> Dict:
+    predictor.train(trades_df, tokens_df, progress=progress, incremental=incremental)
+    return predictor.history.last()
+
+@router.post("/train", status_code=202)
+async def train_model(trades: List[Dict], tokens: List[Dict], incremental: bool = False):
+    """Start a background training job on historical data; poll /train/{job_id} for status.
+    
+    With incremental=true only new or changed mints need to be posted (each with its full trade list).
+    """
     try:
-        print(f"\nReceived training data:")
-        print(f"Trades count: {len(trades)}")
-        print(f"Tokens count: {len(tokens)}")
+        logger.info("Received training data: %d trades, %d tokens", len(trades), len(tokens))
         
         if len(trades) == 0 or len(tokens) == 0:
             raise HTTPException(status_code=400, detail="Empty dataset provided")
             
-        print("\nSample trade:", trades[0] if trades else "No trades")
-        print("\nSample token:", tokens[0] if tokens else "No tokens")
-        
-        # Convert to DataFrames
-        trades_df = pd.DataFrame(trades)
-        tokens_df = pd.DataFrame(tokens)
+        trades_df, tokens_df = await run_in_threadpool(build_training_frames, trades, tokens)
         
-        # Validate required columns
-        required_trade_cols = [
-            'mint', 'traderPublicKey', 'txType', 'tokenAmount',
-            'vSolInBondingCurve', 'vTokensInBondingCurve', 'timestamp',"holdersCount"
-        ]
-        required_token_cols = [
-            'mint', 'initialBuySol', 'initialBuyPercent', 'liquidity', 'marketCap'
-        ]
-        
-        validate_dataframe(trades_df, required_trade_cols, "trades")
-        validate_dataframe(tokens_df, required_token_cols, "tokens")
-        
-        print("\nStarting model training...")
-        predictor.train(trades_df, tokens_df)
-        print("Training complete!")
+        job_id = training_jobs.submit(
+            partial(run_training, trades_df, tokens_df, incremental),
+            trades_count=len(trades_df),
+            tokens_count=len(tokens_df),
+            incremental=incremental
+        )
+        logger.info("Queued training job %s", job_id)
         
-        return {"status": "Model trained successfully"}
+        return {"status": "Training started", "job_id": job_id}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print("\nTraining error:", str(e))
-        print("Traceback:", traceback.format_exc())
+        logger.exception("Training error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Training failed: {str(e)}"
         )
+
+def resolve_ingest_path(path: str) -> str:
+    """Training files are only read from inside INGEST_DIR"""
+    from app.ml import ingest
+    ingest_dir = Path(settings.ingest_dir).resolve()
+    resolved = (ingest_dir / path).resolve()
+    if not resolved.is_relative_to(ingest_dir):
+        raise HTTPException(status_code=400, detail=f"Path must be inside the ingest directory: {path}")
+    if not resolved.is_file():
+        raise HTTPException(status_code=404, detail=f"Training file not found: {path}")
+    try:
+        ingest.detect_format(str(resolved))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return str(resolved)
+
+def run_ingest_training(trades_path: str, tokens_path: str, success_mcap: float, incremental: bool,
+                        progress) -> Dict:
+    from app.ml import ingest
+    progress('loading', 0.0)
+    trades_df = ingest.read_trades(trades_path)
+    tokens_df = ingest.read_tokens(tokens_path)
+    predictor.train(trades_df, tokens_df, success_mcap=success_mcap, progress=progress, incremental=incremental)
+    return predictor.history.last()
+
+@router.post("/train/upload")
+async def upload_training_file(request: Request, upload_format: str = Query("ndjson", alias="format")):
+    """Stream a request body (NDJSON, Parquet or Arrow) into the ingest directory"""
+    suffix = {"ndjson": ".ndjson", "parquet": ".parquet", "arrow": ".arrow"}.get(upload_format)
+    if suffix is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported upload format: {upload_format}")
+    max_bytes = int(settings.max_upload_mb * 1024 * 1024)
+    too_large = HTTPException(status_code=413, detail=f"Upload exceeds {settings.max_upload_mb:g} MB")
+    declared = request.headers.get("content-length")
+    if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+    
+    Path(settings.ingest_dir).mkdir(parents=True, exist_ok=True)
+    name = f"upload_{uuid.uuid4().hex}{suffix}"
+    path = Path(settings.ingest_dir) / name
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                # Chunked bodies carry no Content-Length, so the limit is enforced as they arrive
+                if max_bytes and size > max_bytes:
+                    raise too_large
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    
+    logger.info("Received training upload %s (%d bytes)", name, size)
+    return {"path": name, "bytes": size}
+
+@router.post("/train/ingest", status_code=202)
+async def train_from_files(request: TrainingIngestRequest):
+    """Start a training job that reads Parquet/Arrow/NDJSON files from the ingest directory"""
+    trades_path = resolve_ingest_path(request.trades_path)
+    tokens_path = resolve_ingest_path(request.tokens_path)
+    
+    job_id = training_jobs.submit(
+        partial(run_ingest_training, trades_path, tokens_path, request.success_mcap, request.incremental),
+        trades_path=request.trades_path,
+        tokens_path=request.tokens_path,
+        incremental=request.incremental
+    )
+    logger.info("Queued file training job %s", job_id)
+    
+    return {"status": "Training started", "job_id": job_id}
+
+def run_store_training(success_mcap: float, incremental: bool, progress) -> Dict:
+    predictor.train_from_store(success_mcap=success_mcap, incremental=incremental, progress=progress)
+    return predictor.history.last()
+
+@router.post("/train/store", status_code=202)
+async def train_from_store(success_mcap: float = 400, incremental: bool = False):
+    """Start a training job on the stored features of earlier runs, re-labelled for success_mcap"""
+    if predictor.feature_store.count() == 0:
+        raise HTTPException(status_code=409, detail="Feature store is empty; train on trades first")
+    
+    job_id = training_jobs.submit(
+        partial(run_store_training, success_mcap, incremental),
+        success_mcap=success_mcap,
+        incremental=incremental
+    )
+    logger.info("Queued feature store training job %s", job_id)
     
+    return {"status": "Training started", "job_id": job_id}
+
+def run_tuning(success_mcap: float, n_trials: int, n_splits: int, progress) -> Dict:
+    predictor.tune(success_mcap=success_mcap, n_trials=n_trials, n_splits=n_splits, progress=progress)
+    return predictor.history.last()
+
+@router.post("/train/tune", status_code=202)
+async def tune_model(success_mcap: float = 400, n_trials: int = 20, n_splits: int = 5):
+    """Start a parameter search over the stored features; the best candidate is trained and served"""
+    if n_trials < 1 or n_splits < 1:
+        raise HTTPException(status_code=400, detail="n_trials and n_splits must be at least 1")
+    if predictor.feature_store.count() == 0:
+        raise HTTPException(status_code=409, detail="Feature store is empty; train on trades first")
+    
+    job_id = training_jobs.submit(
+        partial(run_tuning, success_mcap, n_trials, n_splits),
+        success_mcap=success_mcap,
+        n_trials=n_trials,
+        n_splits=n_splits
+    )
+    logger.info("Queued tuning job %s", job_id)
+    
+    return {"status": "Tuning started", "job_id": job_id}
+
+@router.get("/train/{job_id}")
+async def training_status(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job not found: {job_id}")
+    return job
+    
+@router.get("/predict/cache")
+async def cache_stats():
+    """Hit/miss counters for the feature and prediction caches"""
+    return {
+        "features": predictor.feature_cache.stats(),
+        "predictions": predictor.prediction_cache.stats()
+    }
+
+@router.get("/predict/cascade")
+async def cascade_stats():
+    """Stage-1 prefilter counts: requests passed and rejected, audited rejections and false negatives"""
+    if predictor.prefilter is None:
+        return {"enabled": False}
+    return {"enabled": True, **predictor.prefilter.stats()}
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_token(trades: List[Trade], token: TokenData):
     try:
         if not trades:
             raise HTTPException(status_code=400, detail="No trades provided")
         
-        trades_list = [
-            {
-                "mint": t.mint,
-                "traderPublicKey": t.traderPublicKey,
-                "txType": t.txType,
-                "tokenAmount": t.tokenAmount,
-                "vSolInBondingCurve": t.vSolInBondingCurve,
-                "vTokensInBondingCurve": t.vTokensInBondingCurve,
-                "timestamp": t.timestamp,
-                "marketCapSol": t.marketCapSol,
-                "holdersCount": t.holdersCount
-            } for t in trades
-        ]
+        trades_list = trades_to_records(trades)
+        token_dict = token_to_record(token)
         
-        token_dict = {
-            "mint": token.mint,
-            "initialBuySol": token.initialBuySol,
-            "initialBuyPercent": token.initialBuyPercent,
-            "liquidity": token.liquidity,
-            "marketCap": token.marketCap
-        }
+        request = predictor.prepare(trades_list, token_dict)
+        is_promising, probability, raw_analysis = await prediction_batcher.submit(request[0], request)
         
-        is_promising, probability, raw_analysis = predictor.predict(trades_list, token_dict)
+        return build_response(is_promising, probability, raw_analysis)
         
-        # Create proper Analysis instance
-        analysis = Analysis(
-            early_signs=raw_analysis["early_signs"],
-            feature_values=raw_analysis["feature_values"]
+    except Exception as e:
+        logger.exception("Prediction error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
         )
+
+@router.post("/predict/columnar", response_model=PredictionResponse)
+async def predict_columnar(request: Request):
+    """/predict with the trades sent as columns instead of a list of objects.
+    
+    The body is {"token": {...}, "trades": {field: [one value per trade]}} as JSON, or an
+    Arrow IPC stream (Content-Type: application/vnd.apache.arrow.stream) whose schema
+    metadata carries the token JSON under "token"; see app.api.wire.
+    """
+    decoder = wire.decoder_for(request.headers.get("content-type"))
+    if decoder is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported payload type; use one of {sorted(wire.DECODERS)}")
+    
+    body = await request.body()
+    try:
+        columns, token = await run_inference(decoder, body)
+        token = TokenData.model_validate(token)
+    except ImportError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid columnar payload: {e}")
+    if len(columns['timestamp']) == 0:
+        raise HTTPException(status_code=400, detail="No trades provided")
+    
+    try:
+        request = predictor.prepare_columns(columns, token_to_record(token))
+        result = await prediction_batcher.submit(request[0], request)
+        return build_response(*result)
         
-        # Create PredictionResponse
-        response = PredictionResponse(
-            isPromising=is_promising,
-            probability=float(probability),
-            analysis=analysis
+    except Exception as e:
+        logger.exception("Prediction error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
         )
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(requests: List[PredictionRequest]):
+    """Score many tokens with one model call"""
+    try:
+        empty = [i for i, request in enumerate(requests) if not request.trades]
+        if empty:
+            raise HTTPException(status_code=400, detail=f"No trades provided for items: {empty}")
         
-        return response
+        results = await run_inference(predictor.predict_batch, [
+            (trades_to_records(request.trades), token_to_record(request.token))
+            for request in requests
+        ])
         
+        return BatchPredictionResponse(results=[
+            BatchPredictionResult(mint=request.token.mint, **build_response(*result).model_dump())
+            for request, result in zip(requests, results)
+        ])
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        print("Prediction error:", str(e))
-        print("Traceback:", traceback.format_exc())
+        logger.exception("Batch prediction error: %s", e)
         raise HTTPException(
             status_code=500,
-            detail=f"Prediction failed: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Batch prediction failed: {str(e)}"
+        )
@@ -0,0 +1,135 @@
+# app/api/endpoints/stream.py
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import Dict, List
+from app.models.schemas import Trade, TokenData, PredictionResponse
+from app.api.endpoints.predict import predictor, trades_to_records, token_to_record, build_response
+from app.api.hub import PredictionHub, Subscriber
+from app.ml.streaming import StreamingFeatureState
+from app.core.concurrency import run_inference
+from app.core.config import settings
+from app.core.metrics import Gauge
+from app.core.log import get_logger
+
+router = APIRouter(prefix="/stream", tags=["streaming"])
+stream_state = StreamingFeatureState()
+hub = PredictionHub(
+    stream_state,
+    score=predictor.predict_features_with,
+    render=lambda prediction: build_response(*prediction).model_dump(),
+    model=lambda: predictor.registry.current
+)
+logger = get_logger(__name__)
+
+STREAM_CONNECTIONS = Gauge("stream_connections", "Open WebSocket stream connections",
+                           callback=lambda: {(): len(hub)})
+
+@router.post("/token")
+async def register_token(token: TokenData):
+    """Register token metadata so the mint can be scored from streamed trades"""
+    stream_state.register_token(token_to_record(token))
+    hub.token_registered(token.mint)
+    return {"status": "registered", "mint": token.mint}
+
+@router.post("/trades")
+async def push_trades(trades: List[Trade]):
+    """Fold new trades into the per-mint rolling state"""
+    hub.add_trades(trades_to_records(trades))
+    return {"status": "updated", "trades": len(trades), "tracked_mints": len(stream_state)}
+
+@router.websocket("/ws")
+async def stream_socket(websocket: WebSocket):
+    """Subscribe to mints and receive a PredictionResponse whenever a score changes materially.
+    
+    Client messages (JSON):
+      {"type": "subscribe", "mints": [...], "tokens": [TokenData, ...]}  tokens are optional
+      {"type": "unsubscribe", "mints": [...]}
+      {"type": "token", "token": TokenData}
+      {"type": "trades", "trades": [Trade, ...]}
+    Query parameters threshold and min_change override STREAM_THRESHOLD / STREAM_MIN_CHANGE.
+    
+    Server messages: {"type": "prediction", "mint", "reason", ...PredictionResponse} where reason
+    is initial, threshold (crossed in either direction) or change (moved by min_change or more),
+    plus {"type": "subscribed" | "unsubscribed", "mints"} and {"type": "error", "detail"}.
+    Updates a slow client has not received yet are replaced by newer ones for the same mint.
+    """
+    params = websocket.query_params
+    try:
+        threshold = float(params.get("threshold", settings.stream_threshold))
+        min_change = float(params.get("min_change", settings.stream_min_change))
+    except ValueError:
+        await websocket.close(code=1008, reason="threshold and min_change must be numbers")
+        return
+    
+    await websocket.accept()
+    subscriber = Subscriber(websocket.send_json, threshold, min_change, settings.stream_max_subscriptions)
+    hub.connect(subscriber)
+    writer = asyncio.create_task(subscriber.run_writer())
+    try:
+        while True:
+            message = await websocket.receive_json()
+            try:
+                handle_stream_message(subscriber, message)
+            except (ValidationError, ValueError, KeyError, TypeError) as e:
+                subscriber.notify({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.exception("Stream connection error: %s", e)
+    finally:
+        hub.disconnect(subscriber)
+        writer.cancel()
+
+def handle_stream_message(subscriber: Subscriber, message: Dict) -> None:
+    kind = message.get("type") if isinstance(message, dict) else None
+    if kind == "trades":
+        trades = [Trade.model_validate(trade) for trade in message["trades"]]
+        hub.add_trades(trades_to_records(trades))
+    elif kind == "token":
+        token = TokenData.model_validate(message["token"])
+        stream_state.register_token(token_to_record(token))
+        hub.token_registered(token.mint)
+    elif kind == "subscribe":
+        for token in message.get("tokens", []):
+            stream_state.register_token(token_to_record(TokenData.model_validate(token)))
+        mints = [str(mint) for mint in message.get("mints", [])]
+        mints += [token["mint"] for token in message.get("tokens", []) if token["mint"] not in mints]
+        subscriber.notify({"type": "subscribed", "mints": hub.subscribe(subscriber, mints)})
+    elif kind == "unsubscribe":
+        mints = [str(mint) for mint in message["mints"]]
+        hub.unsubscribe(subscriber, mints)
+        subscriber.notify({"type": "unsubscribed", "mints": mints})
+    else:
+        raise ValueError(f"Unknown message type: {kind}")
+
+@router.get("/{mint}/predict", response_model=PredictionResponse)
+async def predict_stream(mint: str):
+    state = stream_state.get(mint)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Mint not tracked: {mint}")
+    if state.token_data is None:
+        raise HTTPException(status_code=404, detail=f"No token data registered for mint: {mint}")
+    
+    try:
+        is_promising, probability, raw_analysis = await run_inference(score_tracked_mint, mint)
+        return build_response(is_promising, probability, raw_analysis)
+        
+    except Exception as e:
+        logger.exception("Streaming prediction error: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prediction failed: {str(e)}"
+        )
+
+def score_tracked_mint(mint: str):
+    """Features and prediction for a tracked mint; on the inference pool, since reading the
+    trader index can load the model from disk"""
+    bundle = predictor.registry.current
+    features = stream_state.features(mint, bundle.traders if bundle is not None else None)
+    return predictor.predict_features_with(bundle, [features])[0]
+
+@router.delete("/{mint}")
+async def drop_mint(mint: str):
+    stream_state.drop(mint)
+    return {"status": "dropped", "mint": mint}
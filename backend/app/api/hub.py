@@ -0,0 +1,186 @@
+# app/api/hub.py
+"""Server-push score updates for streamed trades.
+
+Trades from any producer mark their mint dirty; one scorer task rescores every dirty mint
+that has subscribers in a single batch, so a burst of trades costs one scoring pass rather
+than one per trade. Each subscriber decides per mint whether the new score is worth a push
+(threshold crossing or material change). Undelivered updates are kept per mint and replaced
+by newer ones, so a slow consumer gets the latest score for each mint rather than a growing
+backlog.
+"""
+import asyncio
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.ml.streaming import StreamingFeatureState
+from app.core.concurrency import run_inference
+from app.core.metrics import Counter
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    from app.ml.registry import ModelBundle
+
+logger = get_logger(__name__)
+
+Prediction = Tuple[bool, float, Dict]
+
+STREAM_UPDATES = Counter("stream_updates_total", "Score updates queued for WebSocket subscribers", ["reason"])
+STREAM_COALESCED = Counter(
+    "stream_updates_coalesced_total",
+    "Undelivered score updates replaced by a newer one for the same mint (slow consumers)",
+)
+
+
+class Subscriber:
+    """One connection's subscriptions, push rules and outbox, drained by run_writer()"""
+
+    def __init__(self, send: Callable[[Dict], Any], threshold: float, min_change: float, max_mints: int,
+                 max_control: int = 100):
+        self.send = send
+        self.threshold = threshold
+        self.min_change = min_change
+        self.max_mints = max_mints
+        self.mints: Set[str] = set()
+        self.last: Dict[str, float] = {}
+        self.outbox: "OrderedDict[str, Dict]" = OrderedDict()
+        # Acks and errors; past max_control the oldest are dropped
+        self.control: deque = deque(maxlen=max_control)
+        self._wakeup = asyncio.Event()
+
+    def notify(self, message: Dict) -> None:
+        self.control.append(message)
+        self._wakeup.set()
+
+    def offer(self, mint: str, prediction: Prediction, render: Callable[[Prediction], Dict]) -> bool:
+        """Queue mint's new score if it crossed the threshold or moved by min_change since the last push"""
+        probability = prediction[1]
+        last = self.last.get(mint)
+        crossed = last is not None and (last >= self.threshold) != (probability >= self.threshold)
+        if last is not None and not crossed and abs(probability - last) < self.min_change:
+            return False
+        reason = 'initial' if last is None else 'threshold' if crossed else 'change'
+        self.last[mint] = probability
+        if mint in self.outbox:
+            STREAM_COALESCED.inc()
+        self.outbox[mint] = {'type': 'prediction', 'mint': mint, 'reason': reason, **render(prediction)}
+        self.outbox.move_to_end(mint)
+        STREAM_UPDATES.inc(reason=reason)
+        self._wakeup.set()
+        return True
+
+    def forget(self, mints: Iterable[str]) -> None:
+        for mint in mints:
+            self.mints.discard(mint)
+            self.last.pop(mint, None)
+            self.outbox.pop(mint, None)
+
+    async def run_writer(self) -> None:
+        """Send queued messages one at a time; a slow socket only delays (and coalesces) updates"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.control or self.outbox:
+                message = self.control.popleft() if self.control else self.outbox.popitem(last=False)[1]
+                await self.send(message)
+
+
+class PredictionHub:
+    """Mint subscriptions across connections plus the batched rescoring of mints with new trades"""
+
+    def __init__(self, state: StreamingFeatureState,
+                 score: Callable[[Optional["ModelBundle"], List[Dict]], List[Prediction]],
+                 render: Callable[[Prediction], Dict],
+                 model: Callable[[], Optional["ModelBundle"]] = lambda: None):
+        self.state = state
+        self.score = score
+        self.render = render
+        # The served bundle; each batch takes one snapshot for its wallet features and scores
+        self.model = model
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._connections: Set[Subscriber] = set()
+        self._dirty: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._connections)
+
+    def connect(self, subscriber: Subscriber) -> None:
+        self._connections.add(subscriber)
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber, list(subscriber.mints))
+        self._connections.discard(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, mints: Iterable[str]) -> List[str]:
+        """Add subscriptions, all or none within the subscriber's limit; returns the mints added"""
+        added = list(dict.fromkeys(mint for mint in mints if mint not in subscriber.mints))
+        if len(subscriber.mints) + len(added) > subscriber.max_mints:
+            raise ValueError(f"Subscription limit of {subscriber.max_mints} mints exceeded")
+        for mint in added:
+            subscriber.mints.add(mint)
+            self._subscribers.setdefault(mint, set()).add(subscriber)
+        # Score once now so the subscriber starts from the current prediction
+        self._mark_dirty(added)
+        return added
+
+    def unsubscribe(self, subscriber: Subscriber, mints: Iterable[str]) -> None:
+        mints = list(mints)
+        for mint in mints:
+            subscribers = self._subscribers.get(mint)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[mint]
+        subscriber.forget(mints)
+
+    def add_trades(self, trades: List[Dict]) -> None:
+        """Fold trades into the shared streaming state and schedule rescoring of watched mints"""
+        for trade in trades:
+            self.state.add_trade(trade)
+        self._mark_dirty(trade['mint'] for trade in trades)
+
+    def token_registered(self, mint: str) -> None:
+        self._mark_dirty([mint])
+
+    def _mark_dirty(self, mints: Iterable[str]) -> None:
+        dirty = [mint for mint in mints if mint in self._subscribers]
+        if not dirty:
+            return
+        self._dirty.update(dirty)
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._score_loop())
+        self._wakeup.set()
+
+    async def _score_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Everything that changed while the previous batch was scoring goes in this one
+            mints, self._dirty = list(self._dirty), set()
+            try:
+                # Feature extraction and the trader index (which may load the model) stay off the loop
+                scored, predictions = await run_inference(self._rescore, mints)
+            except Exception as e:
+                logger.error("Streaming rescoring of %d mints failed: %s", len(mints), e)
+                continue
+            for mint, prediction in zip(scored, predictions):
+                for subscriber in list(self._subscribers.get(mint, ())):
+                    subscriber.offer(mint, prediction, self.render)
+
+    def _rescore(self, mints: List[str]) -> Tuple[List[str], List[Prediction]]:
+        """(mints that could be scored, their predictions); runs on the inference pool"""
+        # One snapshot, so a model swap mid-batch can't pair one model's trader index with another's trees
+        bundle = self.model()
+        index = bundle.traders if bundle is not None else None
+        features, scored = [], []
+        for mint in mints:
+            state = self.state.get(mint)
+            if state is None or state.token_data is None or state.start_time is None:
+                continue
+            try:
+                features.append(self.state.features(mint, index))
+                scored.append(mint)
+            except (KeyError, ValueError):
+                continue
+        return scored, self.score(bundle, features) if scored else []
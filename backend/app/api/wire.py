@@ -0,0 +1,81 @@
+# app/api/wire.py
+"""Columnar /predict payloads: trades as struct-of-arrays JSON or as an Arrow IPC stream.
+
+Both decode straight into one NumPy array per trade field for TradeArrays.from_columns,
+without a model object or dict per trade.
+
+JSON:  {"token": {...TokenData}, "trades": {"timestamp": [...], "traderPublicKey": [...], ...}}
+Arrow: a record batch stream with the TRADE_COLUMNS fields; the token JSON rides in the
+       schema metadata under "token".
+"""
+import json
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from app.ml.features import TRADE_COLUMNS
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_TOKEN_KEY = b"token"
+
+COLUMN_DTYPES = {
+    'timestamp': np.int64,
+    'traderPublicKey': object,
+    'txType': object,
+    'vSolInBondingCurve': np.float64,
+    'marketCapSol': np.float64,
+    'holdersCount': np.int64,
+}
+
+Columns = Dict[str, np.ndarray]
+
+
+def typed_columns(columns: Dict) -> Columns:
+    """The TRADE_COLUMNS of columns as equal-length 1-d arrays; other fields are ignored"""
+    missing = [name for name in TRADE_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing trade columns: {missing}")
+    typed = {}
+    for name in TRADE_COLUMNS:
+        try:
+            typed[name] = np.asarray(columns[name], dtype=COLUMN_DTYPES[name])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid values in trade column {name}: {e}") from e
+        if typed[name].ndim != 1:
+            raise ValueError(f"Trade column {name} must be a flat list")
+    lengths = {name: len(column) for name, column in typed.items()}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"Trade columns differ in length: {lengths}")
+    return typed
+
+
+def decode_json(body: bytes) -> Tuple[Columns, Dict]:
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get('trades'), dict) or 'token' not in payload:
+        raise ValueError("Expected a JSON object with 'token' and 'trades' columns")
+    return typed_columns(payload['trades']), payload['token']
+
+
+def decode_arrow(body: bytes) -> Tuple[Columns, Dict]:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Arrow payloads need pyarrow: pip install pyarrow") from e
+    table = pa.ipc.open_stream(body).read_all()
+    metadata = table.schema.metadata or {}
+    if ARROW_TOKEN_KEY not in metadata:
+        raise ValueError("Arrow stream has no 'token' schema metadata")
+    # Numeric columns convert without copying; strings become object arrays
+    columns = {name: table.column(name).to_numpy() for name in TRADE_COLUMNS if name in table.column_names}
+    return typed_columns(columns), json.loads(metadata[ARROW_TOKEN_KEY])
+
+
+DECODERS = {
+    JSON_MEDIA_TYPE: decode_json,
+    ARROW_MEDIA_TYPE: decode_arrow,
+}
+
+
+def decoder_for(content_type: Optional[str]) -> Optional[Callable[[bytes], Tuple[Columns, Dict]]]:
+    """Decoder for a Content-Type header (JSON when absent), or None if unsupported"""
+    media_type = (content_type or JSON_MEDIA_TYPE).split(';')[0].strip().lower()
+    return DECODERS.get(media_type)
@@ -0,0 +1,103 @@
+# app/core/batching.py
+"""Micro-batching of concurrent scoring calls on the event loop.
+
+The first request of a batch opens a window; everything submitted until it closes (or
+until max_size requests are waiting) goes to one process() call on the inference pool,
+and each caller gets its own result back. A request whose key is already waiting or
+being scored shares that request's result instead of adding a row.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+from app.core.concurrency import run_inference
+from app.core.metrics import Counter, Histogram
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = Histogram(
+    "prediction_batch_size",
+    "Requests scored together by the micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+DEDUPLICATED = Counter(
+    "prediction_requests_deduplicated_total",
+    "Requests answered with the result of an identical in-flight request",
+)
+
+
+class MicroBatcher:
+    """Coalesces submit() calls into batches for process(items) -> results (same order)"""
+
+    def __init__(self, process: Callable[[List[Any]], Sequence[Any]], window: float, max_size: int):
+        self.process = process
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """Result of process() for item, scored with whatever else arrives within the window"""
+        future = self._inflight.get(key)
+        if future is not None:
+            DEDUPLICATED.inc()
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._inflight[key] = future
+            future.add_done_callback(_release_on_done(self._inflight, key))
+            self._pending.append((item, future))
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                # A zero window still batches everything submitted in the same loop iteration
+                self._timer = (loop.call_later(self.window, self._flush) if self.window > 0
+                               else loop.call_soon(self._flush))
+        # A cancelled caller must not cancel the result other callers share
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            BATCH_SIZE.observe(len(batch))
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await run_inference(self.process, [item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _resolve(batch[0][1], exception=e)
+                return
+            # One bad request must not fail its neighbours: retry them one at a time
+            logger.warning("Batch of %d failed (%s); scoring its requests individually", len(batch), e)
+            await asyncio.gather(*(self._run([entry]) for entry in batch))
+            return
+        for (_, future), result in zip(batch, results):
+            _resolve(future, result=result)
+
+
+def _release_on_done(inflight: Dict[Hashable, asyncio.Future], key: Hashable) -> Callable[[asyncio.Future], None]:
+    """Done callback that ends key's in-flight entry, so later requests are scored afresh"""
+    def done(future: asyncio.Future) -> None:
+        if inflight.get(key) is future:
+            del inflight[key]
+        if not future.cancelled():
+            # Mark the exception retrieved; every waiter may have gone away
+            future.exception()
+    return done
+
+
+def _resolve(future: asyncio.Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
@@ -0,0 +1,72 @@
+# app/core/concurrency.py
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only covers threads of one process
+    fcntl = None
+
+# Scoring runs pandas/LightGBM code that would otherwise block the event loop
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.inference_workers,
+    thread_name_prefix="inference"
+)
+
+def process_pool(max_workers: int, **kwargs) -> ProcessPoolExecutor:
+    """Process pool whose workers are not forked from this (multi-threaded) process.
+    
+    A forked child inherits whatever locks the inference, watcher or shadow threads held at
+    that moment and can deadlock on them; forkserver (spawn where unavailable) starts clean.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method), **kwargs)
+
+async def run_inference(fn, *args, **kwargs):
+    """Run a CPU-bound scoring call on the bounded inference pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, partial(fn, *args, **kwargs))
+
+class FileLock:
+    """Reentrant lock held across threads and, through flock on path, across processes.
+    
+    uvicorn workers sharing a model directory take it around read-modify-write of files there.
+    Only the outermost acquisition in a process takes the flock (two descriptors of one file
+    would block each other). When path's directory doesn't exist yet there is nothing on
+    disk to protect, and only the thread lock is held.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+    
+    def __enter__(self) -> "FileLock":
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except FileNotFoundError:
+                self._file = None
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            # Closing the descriptor releases the flock
+            self._file.close()
+            self._file = None
+        self._lock.release()
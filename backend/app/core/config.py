@@ -0,0 +1,90 @@
+# app/core/config.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Settings:
+    """Runtime knobs, read once from the environment (or a .env file)"""
+
+    def __init__(self):
+        # Worker processes used for per-mint feature extraction in train()
+        self.train_workers = int(os.getenv("TRAIN_WORKERS", os.cpu_count() or 1))
+        # Threads scoring requests off the event loop
+        self.inference_workers = int(os.getenv("INFERENCE_WORKERS", min(4, os.cpu_count() or 1)))
+        # Score with plain NumPy arrays instead of DataFrame + StandardScaler.transform
+        self.fast_inference = os.getenv("FAST_INFERENCE", "1").lower() not in ("0", "false", "no")
+        # Entries (per cache) and lifetime in seconds for cached features/predictions; a cached
+        # feature dict is roughly 3 KB, so the default 10000 entries costs ~30 MB. 0 disables.
+        self.feature_cache_size = int(os.getenv("FEATURE_CACHE_SIZE", "10000"))
+        self.feature_cache_ttl = float(os.getenv("FEATURE_CACHE_TTL", "30"))
+        # Training files for /api/train/ingest must live under this directory (uploads land here too);
+        # a /api/train/upload body larger than MAX_UPLOAD_MB is refused with 413 (0: no limit)
+        self.ingest_dir = os.getenv("INGEST_DIR", "data/ingest")
+        self.max_upload_mb = float(os.getenv("MAX_UPLOAD_MB", "2048"))
+        # Predictions slower than this are logged with their mint; inside a micro-batch a request's
+        # time is its own feature extraction plus its share of the batch's stage-1 and model calls
+        self.slow_prediction_ms = float(os.getenv("SLOW_PREDICTION_MS", "50"))
+        # Micro-batching of concurrent /predict requests: how long the first request of a batch
+        # waits for others (0 still batches requests arriving together) and the batch size
+        # that is scored without waiting. BATCH_MAX_SIZE=1 scores every request on its own.
+        self.batch_window_ms = float(os.getenv("BATCH_WINDOW_MS", "2"))
+        self.batch_max_size = int(os.getenv("BATCH_MAX_SIZE", "64"))
+        # Cascade scoring: a request whose first-minute trade count, buy ratio or market cap growth
+        # (%) is below these floors is answered "not promising" without full feature extraction
+        # or the model. PREFILTER_AUDIT_RATE of the rejected requests are scored in full anyway
+        # to measure stage-1 false negatives (see /api/predict/cascade).
+        self.prefilter = os.getenv("PREFILTER", "0").lower() not in ("0", "false", "no")
+        self.prefilter_min_trades = float(os.getenv("PREFILTER_MIN_TRADES", "3"))
+        self.prefilter_min_buy_ratio = float(os.getenv("PREFILTER_MIN_BUY_RATIO", "0.3"))
+        self.prefilter_min_growth = float(os.getenv("PREFILTER_MIN_GROWTH", "-50"))
+        self.prefilter_audit_rate = float(os.getenv("PREFILTER_AUDIT_RATE", "0.01"))
+        # Shadow evaluation: comma-separated model versions that score the served model's
+        # feature vectors on a background thread, logged to shadow_log.jsonl in the model
+        # directory (see /api/model/shadow). Batches arriving while SHADOW_QUEUE_SIZE are
+        # waiting are dropped rather than delaying responses; the log is rotated past
+        # SHADOW_LOG_MAX_MB (0 never rotates).
+        self.shadow_models = [v.strip() for v in os.getenv("SHADOW_MODELS", "").split(",") if v.strip()]
+        self.shadow_queue_size = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+        self.shadow_log_max_mb = float(os.getenv("SHADOW_LOG_MAX_MB", "100"))
+        # WebSocket score pushes (/api/stream/ws): default alert threshold, the probability change
+        # that counts as material, and how many mints one connection may subscribe to
+        self.stream_threshold = float(os.getenv("STREAM_THRESHOLD", "0.7"))
+        self.stream_min_change = float(os.getenv("STREAM_MIN_CHANGE", "0.05"))
+        self.stream_max_subscriptions = int(os.getenv("STREAM_MAX_SUBSCRIPTIONS", "1000"))
+        # Seconds between checks of the model directory for new versions (0 disables)
+        self.model_watch_interval = float(os.getenv("MODEL_WATCH_INTERVAL", "10"))
+        # When the served model is read: "eager" before the app accepts requests, "background"
+        # in a warm-up thread while /health already answers, "lazy" on the first prediction
+        self.model_load = os.getenv("MODEL_LOAD", "eager").lower()
+        # Format for newly saved models: "native" (LightGBM text + JSON sidecar) or "joblib"
+        self.model_format = os.getenv("MODEL_FORMAT", "native").lower()
+        # Score native models from memory-mapped tree arrays shared by all worker processes
+        # instead of a LightGBM booster per process. Scores match to float rounding; a single
+        # row takes ~150us instead of ~50us, in exchange for no per-worker model copy.
+        self.model_mmap = os.getenv("MODEL_MMAP", "0").lower() not in ("0", "false", "no")
+        # Retention for the model directory after each training run: keep the newest MODEL_KEEP
+        # versions and drop any older than MODEL_MAX_AGE_DAYS (0 disables either rule)
+        self.model_keep = int(os.getenv("MODEL_KEEP", "20"))
+        self.model_max_age_days = float(os.getenv("MODEL_MAX_AGE_DAYS", "0"))
+        # Incremental training: boosting rounds added to the served model per run, and the tree
+        # count past which it retrains from scratch instead (trees cost inference time)
+        self.incremental_rounds = int(os.getenv("INCREMENTAL_ROUNDS", "20"))
+        self.max_trees = int(os.getenv("MAX_TREES", "400"))
+        # Parameter search: cap on boosting rounds per candidate and the early stopping
+        # patience (rounds without a validation AUC gain)
+        self.tune_max_rounds = int(os.getenv("TUNE_MAX_ROUNDS", "1000"))
+        self.tune_early_stopping = int(os.getenv("TUNE_EARLY_STOPPING", "50"))
+        # uvicorn worker processes when started via `python -m app.main`; more than one disables reload.
+        # Job status (/api/train, /api/backtest) is persisted under models/jobs so any worker can
+        # answer a poll, but each worker runs the jobs it received on its own one-at-a-time queue;
+        # training runs take a lock file in the model directory, so they never overlap across workers
+        self.workers = int(os.getenv("WORKERS", "1"))
+        
+        # Logging: default level for the app.* tree, per-module overrides
+        # ("app.ml.features=DEBUG,app.api=INFO") and the share of sub-WARNING records kept
+        self.log_level = os.getenv("LOG_LEVEL", "INFO")
+        self.log_levels = os.getenv("LOG_LEVELS", "")
+        self.log_sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+settings = Settings()
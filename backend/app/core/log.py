@@ -0,0 +1,59 @@
+# app/core/log.py
+import logging
+import random
+from typing import Dict, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Let through only a fraction of records below WARNING.
+
+    Filters run before any handler formats the record, so dropped records never
+    pay for message formatting.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """Parse 'app.ml.predictor=DEBUG,app.api=INFO' into {logger name: level}"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = "WARNING", module_levels: Optional[Dict[str, str]] = None,
+                  sample_rate: float = 1.0) -> None:
+    """Configure the 'app' logger tree: one stderr handler, a default level, per-module overrides"""
+    root = logging.getLogger("app")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(level.upper())
+    root.propagate = False
+
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    for handler in root.handlers:
+        for existing in [f for f in handler.filters if isinstance(f, SamplingFilter)]:
+            handler.removeFilter(existing)
+        if sample_rate < 1:
+            handler.addFilter(SamplingFilter(sample_rate))
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -1,11 +1,119 @@
-from fastapi import FastAPI
+import time
+
+# Time-to-ready is measured from here, the first thing the server imports
+STARTED = time.perf_counter()
+
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import predict
+from app.core.config import settings
+from app.core.log import setup_logging, parse_module_levels, get_logger
+
+setup_logging(settings.log_level, parse_module_levels(settings.log_levels), settings.log_sample_rate)
+logger = get_logger(__name__)
+
+from app.api.endpoints import predict, stream, models, backtest
+from app.core.metrics import Counter, Gauge, Histogram, render_metrics
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+
+def _model_version():
+    bundle = predict.predictor.registry.peek()
+    return {(bundle.version if bundle else "none",): 1}
+
+def _cache_stat(name):
+    caches = {"features": predict.predictor.feature_cache, "predictions": predict.predictor.prediction_cache}
+    return lambda: {(cache,): c.stats()[name] for cache, c in caches.items()}
+
+Gauge("model_info", "Served model version", ["version"], callback=_model_version)
+Counter("cache_hits_total", "Cache hits", ["cache"], callback=_cache_stat("hits"))
+Counter("cache_misses_total", "Cache misses", ["cache"], callback=_cache_stat("misses"))
+Gauge("cache_hit_ratio", "Cache hit ratio since start", ["cache"], callback=_cache_stat("hit_rate"))
+Gauge("cache_entries", "Entries currently cached", ["cache"], callback=_cache_stat("size"))
+
+def _prefilter_stat(name):
+    return lambda: {(): predict.predictor.prefilter.stats()[name]} if predict.predictor.prefilter else {}
+
+Counter("cascade_passed_total", "Requests the stage-1 prefilter passed on to full scoring",
+        callback=_prefilter_stat("passed"))
+Counter("cascade_rejected_total", "Requests the stage-1 prefilter answered on its own",
+        callback=_prefilter_stat("rejected"))
+Counter("cascade_audits_total", "Rejected requests scored in full anyway to check the prefilter",
+        callback=_prefilter_stat("audited"))
+Counter("cascade_false_negatives_total", "Audited rejections the full scorer would have flagged",
+        callback=_prefilter_stat("false_negatives"))
+Gauge("cascade_false_negative_rate", "False negatives per audited rejection since start",
+      callback=_prefilter_stat("false_negative_rate"))
+
+def _shadow_stat(name):
+    return lambda: {(version,): stats[name] for version, stats in predict.predictor.shadow.stats()['models'].items()
+                    if stats[name] is not None}
+
+Counter("shadow_scored_total", "Requests scored by each shadow model", ["version"],
+        callback=_shadow_stat("scored"))
+Counter("shadow_disagreements_total", "Shadow predictions on the other side of the threshold from the served model",
+        ["version"], callback=_shadow_stat("disagreements"))
+Gauge("shadow_mean_abs_diff", "Mean absolute probability difference from the served model", ["version"],
+      callback=_shadow_stat("mean_abs_diff"))
+Counter("shadow_rows_missing_features_total", "Rows a shadow model scored without some of its trained features",
+        ["version"], callback=_shadow_stat("rows_missing_features"))
+Counter("shadow_dropped_total", "Requests not shadow-scored because the shadow queue was full",
+        callback=lambda: {(): predict.predictor.shadow.stats()['dropped']})
+
+def load_shadow_models():
+    try:
+        predict.predictor.set_shadow_models(settings.shadow_models)
+    except Exception as e:
+        logger.exception("Loading shadow models failed: %s", e)
+
+startup = {
+    'model_load': settings.model_load,
+    'import_seconds': None,
+    'time_to_ready_seconds': None,
+}
+ready = threading.Event()
+
+Gauge("startup_time_to_ready_seconds", "Seconds from process import to a warmed-up model",
+      callback=lambda: {(): startup['time_to_ready_seconds']} if ready.is_set() else {})
+
+def warm_up():
+    try:
+        bundle = predict.predictor.warm_up()
+        logger.info("Warm-up done, serving %s", bundle.version if bundle else "heuristic scoring")
+    except Exception as e:
+        logger.exception("Model warm-up failed: %s", e)
+    startup['time_to_ready_seconds'] = time.perf_counter() - STARTED
+    ready.set()
+    logger.info("Ready after %.2fs", startup['time_to_ready_seconds'])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup['import_seconds'] = time.perf_counter() - STARTED
+    if settings.model_load == "eager":
+        warm_up()
+    elif settings.model_load == "background":
+        threading.Thread(target=warm_up, name="model-warm-up", daemon=True).start()
+    else:
+        # lazy: the first prediction loads the model
+        startup['time_to_ready_seconds'] = startup['import_seconds']
+        ready.set()
+    if settings.shadow_models:
+        # Off the startup path: shadows only see traffic once they are loaded
+        threading.Thread(target=load_shadow_models, name="shadow-load", daemon=True).start()
+    predict.predictor.registry.start_watching(settings.model_watch_interval)
+    yield
+    predict.predictor.registry.stop_watching()
+    predict.predictor.shadow.close()
 
 app = FastAPI(
     title="Token Predictor API",
     description="ML service for predicting token success",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -17,13 +125,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code
+    )
+    return response
+
 # Include routers
 app.include_router(predict.router, prefix="/api")
+app.include_router(stream.router, prefix="/api")
+app.include_router(models.router, prefix="/api")
+app.include_router(backtest.router, prefix="/api")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    bundle = predict.predictor.registry.peek()
+    return {
+        "status": "healthy",
+        "ready": ready.is_set(),
+        "model_version": bundle.version if bundle else None,
+        "startup": startup
+    }
+
+@app.get("/ready")
+async def readiness(response: Response):
+    """503 until the startup warm-up has finished; for load balancer readiness probes"""
+    if not ready.is_set():
+        response.status_code = 503
+    return {"ready": ready.is_set(), "time_to_ready_seconds": startup['time_to_ready_seconds']}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000,
+                reload=settings.workers == 1, workers=settings.workers)
\ No newline at end of file
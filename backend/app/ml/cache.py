@@ -0,0 +1,102 @@
+# app/ml/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+def trades_fingerprint(trades: List[Dict], token_data: Dict) -> Tuple:
+    """Cheap identity for a scoring request: mint, token metadata, trade count and last timestamp.
+
+    Trade lists for a mint only ever grow, so (count, last timestamp) changes whenever
+    the features could.
+    """
+    return (
+        token_data['mint'],
+        token_data['initialBuySol'],
+        token_data['initialBuyPercent'],
+        token_data['liquidity'],
+        len(trades),
+        trades[-1]['timestamp'] if trades else None,
+    )
+
+
+def columns_fingerprint(columns: Dict[str, Sequence], token_data: Dict) -> Tuple:
+    """trades_fingerprint for struct-of-arrays trades; equal to it for the same trades and token"""
+    timestamps = columns['timestamp']
+    last = timestamps[-1] if len(timestamps) else None
+    return (
+        token_data['mint'],
+        token_data['initialBuySol'],
+        token_data['initialBuyPercent'],
+        token_data['liquidity'],
+        len(timestamps),
+        # NumPy scalars from binary payloads hash like the Python values JSON gives
+        last.item() if hasattr(last, 'item') else last,
+    )
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire ttl seconds after insertion"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
@@ -0,0 +1,101 @@
+# app/ml/cascade.py
+"""Two-stage scoring: a cheap first-minute check before full feature extraction and the model.
+
+Stage 1 reads three columns of the raw trades (timestamp, txType, marketCapSol) and computes
+the first-minute trade count, buy ratio and market cap growth in one pass, without sorting
+the trades or interning traders. A request below any floor is answered as not promising
+right away. A small random share of rejected requests is scored in full anyway, which
+estimates how often stage 1 turns away a mint the full scorer would have flagged.
+"""
+import random
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+# The quick features stage 1 computes, in column order
+STAGE_FEATURES = ('trades_1min', 'buy_ratio_1min', 'mcap_growth_1min')
+_WINDOW_MS = 60 * 1000
+
+
+def stage_features(timestamps: np.ndarray, tx_types: Callable[[np.ndarray], Sequence],
+                   market_cap: Callable[[int], float]) -> np.ndarray:
+    """STAGE_FEATURES for one mint's trades in any order.
+
+    Only the timestamps are read in full; tx_types(positions) and market_cap(position) fetch
+    the other fields of just the first-minute trades, so a slow starter costs one pass.
+    Values equal compute_quick_features' unless several trades share the first or the last
+    timestamp of the minute, where the growth may be taken from a different one of them.
+    """
+    if len(timestamps) == 0:
+        return np.zeros(len(STAGE_FEATURES))
+    first = int(np.argmin(timestamps))
+    in_window = timestamps <= timestamps[first] + _WINDOW_MS
+    positions = np.flatnonzero(in_window)
+    n = len(positions)
+    buys = sum(tx_type == 'buy' for tx_type in tx_types(positions))
+    growth = 0.0
+    if n > 1:
+        start_mcap = float(market_cap(first))
+        end_mcap = float(market_cap(int(positions[np.argmax(timestamps[positions])])))
+        growth = (end_mcap - start_mcap) / start_mcap * 100 if start_mcap > 0 else 0.0
+    return np.array([n, buys / n, growth])
+
+
+def stage_features_from_records(trades: List[Dict]) -> np.ndarray:
+    return stage_features(
+        np.fromiter((t['timestamp'] for t in trades), dtype=np.float64, count=len(trades)),
+        lambda positions: [trades[i]['txType'] for i in positions.tolist()],
+        lambda i: trades[i]['marketCapSol'],
+    )
+
+
+def stage_features_from_columns(columns: Dict[str, Sequence]) -> np.ndarray:
+    tx_types, market_caps = np.asarray(columns['txType']), columns['marketCapSol']
+    return stage_features(np.asarray(columns['timestamp'], dtype=np.float64),
+                          lambda positions: tx_types[positions].tolist(), lambda i: market_caps[i])
+
+
+class Prefilter:
+    """Stage-1 floors plus running counts of what they rejected and how audits turned out"""
+
+    def __init__(self, min_trades: float, min_buy_ratio: float, min_growth: float, audit_rate: float,
+                 seed: Optional[int] = None):
+        self.floors = np.array([min_trades, min_buy_ratio, min_growth], dtype=np.float64)
+        self.audit_rate = audit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.passed = 0
+        self.rejected = 0
+        self.audited = 0
+        self.false_negatives = 0
+
+    def reject(self, features: np.ndarray) -> np.ndarray:
+        """Boolean mask of the rows of a (requests x STAGE_FEATURES) matrix that fail a floor"""
+        rejected = (np.asarray(features) < self.floors).any(axis=1)
+        with self._lock:
+            self.rejected += int(rejected.sum())
+            self.passed += len(rejected) - int(rejected.sum())
+        return rejected
+
+    def should_audit(self) -> bool:
+        return self.audit_rate > 0 and self._random.random() < self.audit_rate
+
+    def record_audit(self, promising: bool) -> None:
+        """Outcome of fully scoring a rejected request: promising means stage 1 was wrong"""
+        with self._lock:
+            self.audited += 1
+            self.false_negatives += bool(promising)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.passed + self.rejected
+            return {
+                'floors': dict(zip(STAGE_FEATURES, self.floors.tolist())),
+                'passed': self.passed,
+                'rejected': self.rejected,
+                'reject_rate': self.rejected / total if total else 0.0,
+                'audited': self.audited,
+                'false_negatives': self.false_negatives,
+                'false_negative_rate': self.false_negatives / self.audited if self.audited else 0.0,
+            }
+
@@ -0,0 +1,268 @@
+# app/ml/feature_store.py
+"""Columnar on-disk store of per-mint training samples, reused across train() runs.
+
+Each feature-set version gets its own directory of .npy columns (mints, trade-list
+fingerprints, the feature matrix and the raw inputs the labels are computed from),
+opened memory-mapped, plus one row per (mint, early wallet) pair for the trader index
+(see app.ml.traders). Labels are derived at read time, so re-labelling for another
+success_mcap or sweeping model parameters never repeats per-mint feature extraction.
+
+For incremental runs a mint is only re-extracted when its fingerprint changes. A
+training post has to include the complete trade list of every mint it contains;
+mints it doesn't mention keep their stored rows.
+"""
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.ml.features import FEATURE_SET_VERSION
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__)
+
+STORE_DIRNAME = "features"
+# Per-mint values the outcome labels are computed from
+LABEL_INPUTS = ('initial_mcap', 'max_mcap', 'final_mcap', 'holders_peak', 'holders_final', 'token_mcap')
+LABELS = ('is_success', 'is_rugpull', 'is_holder_dump', 'is_no_growth')
+COLUMNS = ('mints', 'fingerprints', 'valid', 'features', 'inputs', 'wallet_rows', 'wallet_hashes', 'wallet_flags')
+
+# What a mint's stored row was computed from; any change re-extracts it. Every token field the
+# features or labels read is included (trades are covered by count, time span and mcap sum)
+FINGERPRINT_FIELDS = ('trades', 'first_timestamp', 'last_timestamp', 'mcap_sum', 'token_mcap',
+                      'initial_buy_sol', 'initial_buy_percent', 'liquidity')
+Fingerprint = Tuple[float, ...]
+
+
+def label_inputs(token_trades: "pd.DataFrame", token: Dict) -> Dict[str, float]:
+    """Label inputs for one mint's timestamp-ordered trades"""
+    mcap = token_trades['marketCapSol']
+    holders = token_trades['holdersCount']
+    return {
+        'initial_mcap': float(mcap.iloc[0]),
+        'max_mcap': float(mcap.max()),
+        'final_mcap': float(mcap.iloc[-1]),
+        'holders_peak': float(holders.max()),
+        'holders_final': float(holders.iloc[-1]),
+        'token_mcap': float(token['marketCap']),
+    }
+
+
+def compute_labels(inputs: Dict, success_mcap: float) -> Dict[str, np.ndarray]:
+    """Outcome labels from label inputs; works on scalars and on whole columns"""
+    initial, peak_mcap, final = (np.asarray(inputs[name], dtype=np.float64)
+                                 for name in ('initial_mcap', 'max_mcap', 'final_mcap'))
+    holders_peak = np.asarray(inputs['holders_peak'], dtype=np.float64)
+    holders_final = np.asarray(inputs['holders_final'], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max_growth = ((peak_mcap - initial) / initial) * 100
+        drop_from_ath = ((peak_mcap - final) / peak_mcap) * 100
+        holder_retention = np.where(holders_peak > 0, holders_final / holders_peak, 0)
+
+    # Negative patterns
+    is_rugpull = drop_from_ath >= 60  # Lost 60% from the peak
+    is_holder_dump = holder_retention < 0.5  # Lost 50% of peak holders
+    is_no_growth = max_growth < 30  # Never grew significantly
+
+    # Success: reached the target mcap, didn't crash, retained holders, at least doubled
+    is_success = (
+        (np.asarray(inputs['token_mcap'], dtype=np.float64) >= success_mcap)
+        & ~is_rugpull & ~is_holder_dump & (max_growth >= 100)
+    )
+    return {'is_success': is_success, 'is_rugpull': is_rugpull,
+            'is_holder_dump': is_holder_dump, 'is_no_growth': is_no_growth}
+
+
+def mint_fingerprints(trades_df: "pd.DataFrame", tokens_by_mint: "pd.DataFrame",
+                      mints: Iterable[str]) -> Dict[str, Fingerprint]:
+    """FINGERPRINT_FIELDS per mint"""
+    mints = list(mints)
+    trades = trades_df[trades_df['mint'].isin(mints)]
+    stats = trades.groupby('mint', observed=True).agg(
+        count=('timestamp', 'size'),
+        first=('timestamp', 'min'),
+        last=('timestamp', 'max'),
+        mcap=('marketCapSol', 'sum'),
+    )
+    for name, column in (('token_mcap', 'marketCap'), ('initial_buy_sol', 'initialBuySol'),
+                         ('initial_buy_percent', 'initialBuyPercent'), ('liquidity', 'liquidity')):
+        stats[name] = tokens_by_mint[column].reindex(stats.index).to_numpy()
+    values = stats.to_numpy(dtype=np.float64)
+    return {mint: tuple(row) for mint, row in zip(stats.index, values.tolist())}
+
+
+def _widen(features: np.ndarray, feature_names: Sequence[str]) -> np.ndarray:
+    """Feature rows of samples built from invalid mints only (no feature columns), as zeros"""
+    if features.shape[1] == 0 and feature_names:
+        return np.zeros((len(features), len(feature_names)))
+    return features
+
+
+class StoredSamples:
+    """One row per mint, sorted by mint: fingerprint, features and label inputs.
+
+    valid is False for mints that produced no usable features; their other columns are zero.
+    The wallet columns hold one entry per (row, window wallet) pair, ordered by row.
+    """
+
+    def __init__(self, mints: np.ndarray, fingerprints: np.ndarray, valid: np.ndarray, features: np.ndarray,
+                 inputs: np.ndarray, feature_names: Sequence[str], wallet_rows: Optional[np.ndarray] = None,
+                 wallet_hashes: Optional[np.ndarray] = None, wallet_flags: Optional[np.ndarray] = None):
+        self.mints = mints
+        self.fingerprints = fingerprints
+        self.valid = valid
+        self.features = features
+        self.inputs = inputs
+        self.feature_names = list(feature_names)
+        self.wallet_rows = wallet_rows if wallet_rows is not None else np.zeros(0, dtype=np.int32)
+        self.wallet_hashes = wallet_hashes if wallet_hashes is not None else np.zeros(0, dtype=np.uint64)
+        self.wallet_flags = wallet_flags if wallet_flags is not None else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.mints)
+
+    @classmethod
+    def empty(cls, feature_names: Sequence[str] = ()) -> "StoredSamples":
+        return cls(np.array([], dtype=str), np.zeros((0, len(FINGERPRINT_FIELDS))), np.zeros(0, dtype=bool),
+                   np.zeros((0, len(feature_names))), np.zeros((0, len(LABEL_INPUTS))), feature_names)
+
+    @classmethod
+    def from_samples(cls, rows: List[Tuple[str, Fingerprint, Optional[Dict]]]) -> "StoredSamples":
+        """Build from (mint, fingerprint, sample) rows as returned by extract_training_sample"""
+        feature_names = next((list(sample['features']) for _, _, sample in rows if sample is not None), [])
+        rows = sorted(rows, key=lambda row: row[0])
+        features = np.zeros((len(rows), len(feature_names)))
+        inputs = np.zeros((len(rows), len(LABEL_INPUTS)))
+        valid = np.zeros(len(rows), dtype=bool)
+        wallet_rows, wallet_hashes, wallet_flags = [], [], []
+        for i, (_, _, sample) in enumerate(rows):
+            if sample is None:
+                continue
+            valid[i] = True
+            features[i] = [sample['features'].get(name, 0) for name in feature_names]
+            inputs[i] = [sample['inputs'][name] for name in LABEL_INPUTS]
+            hashes, flags = sample.get('wallets', ((), ()))
+            wallet_rows.append(np.full(len(hashes), i, dtype=np.int32))
+            wallet_hashes.append(np.asarray(hashes, dtype=np.uint64))
+            wallet_flags.append(np.asarray(flags, dtype=np.uint8))
+        return cls(
+            mints=np.array([row[0] for row in rows], dtype=str),
+            fingerprints=np.array([row[1] for row in rows], dtype=np.float64).reshape(len(rows), len(FINGERPRINT_FIELDS)),
+            valid=valid,
+            features=features,
+            inputs=inputs,
+            feature_names=feature_names,
+            wallet_rows=np.concatenate(wallet_rows) if wallet_rows else None,
+            wallet_hashes=np.concatenate(wallet_hashes) if wallet_hashes else None,
+            wallet_flags=np.concatenate(wallet_flags) if wallet_flags else None,
+        )
+
+    def fingerprint_index(self) -> Dict[str, Fingerprint]:
+        return {mint: tuple(fp) for mint, fp in zip(self.mints.tolist(), self.fingerprints.tolist())}
+
+    def merge(self, newer: "StoredSamples") -> "StoredSamples":
+        """Rows of self overridden (or extended) by the rows of newer, still sorted by mint"""
+        if len(self) == 0:
+            return newer
+        if len(newer) == 0:
+            return self
+        if newer.feature_names and self.feature_names and newer.feature_names != self.feature_names:
+            raise ValueError("Cannot merge samples with different feature names")
+        feature_names = self.feature_names or newer.feature_names
+        keep = ~np.isin(self.mints, newer.mints)
+        mints = np.concatenate([self.mints[keep], newer.mints])
+        order = np.argsort(mints, kind='stable')
+        # Wallet pairs follow their rows: old row -> kept position -> merged position
+        position = np.empty(len(order), dtype=np.int32)
+        position[order] = np.arange(len(order), dtype=np.int32)
+        old_rows = np.asarray(self.wallet_rows)
+        kept_pairs = keep[old_rows]
+        kept_position = np.cumsum(keep) - 1
+        wallet_rows = np.concatenate([position[kept_position[old_rows[kept_pairs]]],
+                                      position[np.count_nonzero(keep) + np.asarray(newer.wallet_rows)]])
+        pair_order = np.argsort(wallet_rows, kind='stable')
+        return StoredSamples(
+            mints=mints[order],
+            fingerprints=np.concatenate([self.fingerprints[keep], newer.fingerprints])[order],
+            valid=np.concatenate([self.valid[keep], newer.valid])[order],
+            features=np.concatenate([_widen(self.features[keep], feature_names),
+                                     _widen(newer.features, feature_names)])[order],
+            inputs=np.concatenate([self.inputs[keep], newer.inputs])[order],
+            feature_names=feature_names,
+            wallet_rows=wallet_rows[pair_order],
+            wallet_hashes=np.concatenate([self.wallet_hashes[kept_pairs], newer.wallet_hashes])[pair_order],
+            wallet_flags=np.concatenate([self.wallet_flags[kept_pairs], newer.wallet_flags])[pair_order],
+        )
+
+    def input_columns(self) -> Dict[str, np.ndarray]:
+        return {name: self.inputs[:, i] for i, name in enumerate(LABEL_INPUTS)}
+
+    def labels(self, success_mcap: float) -> Dict[str, np.ndarray]:
+        """Label columns for every row (rows with valid=False are meaningless)"""
+        return compute_labels(self.input_columns(), success_mcap)
+
+
+class FeatureStore:
+    """StoredSamples persisted under root/v<feature set version>/ as memory-mappable .npy files"""
+
+    def __init__(self, root: str, version: int = FEATURE_SET_VERSION):
+        self.root = root
+        self.version = version
+        self.path = os.path.join(root, f"v{version}")
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, 'meta.json'))
+
+    def count(self) -> int:
+        """Stored mints, from the metadata alone (0 if none were saved)"""
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f:
+                return int(json.load(f)['mints'])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def load(self, mmap: bool = True) -> StoredSamples:
+        """Stored samples for this feature set version (empty if none were saved)"""
+        if not self.exists():
+            return StoredSamples.empty()
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f:
+                meta = json.load(f)
+            mode = 'r' if mmap else None
+            columns = {name: np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode=mode) for name in COLUMNS}
+        except Exception as e:
+            logger.warning("Ignoring unreadable feature store %s: %s", self.path, e)
+            return StoredSamples.empty()
+        return StoredSamples(feature_names=meta['feature_names'], **columns)
+
+    def save(self, samples: StoredSamples) -> None:
+        """Write samples and swap them in for the previous contents"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp)
+        for name in COLUMNS:
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(getattr(samples, name)))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({
+                'feature_set_version': self.version,
+                'feature_names': samples.feature_names,
+                'label_inputs': list(LABEL_INPUTS),
+                'mints': len(samples),
+                'valid': int(np.count_nonzero(samples.valid)),
+                'wallet_pairs': len(samples.wallet_rows),
+                'saved_at': datetime.now().isoformat(),
+            }, f)
+
+        # Readers holding memory maps of the old files keep them until they're done
+        old = f"{self.path}.{uuid.uuid4().hex}.old"
+        if os.path.exists(self.path):
+            os.rename(self.path, old)
+        os.rename(tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        logger.info("Feature store v%d saved: %d mints (%d with features)",
+                    self.version, len(samples), int(np.count_nonzero(samples.valid)))
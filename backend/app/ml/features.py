@@ -0,0 +1,163 @@
+# app/ml/features.py
+import logging
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Sequence
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__)
+
+# Bump whenever compute_quick_features (or what the feature store keeps per mint) changes;
+# stored training features are kept per version (see app.ml.feature_store)
+FEATURE_SET_VERSION = 3
+
+# Trade fields the quick features are computed from
+TRADE_COLUMNS = ('timestamp', 'traderPublicKey', 'txType', 'vSolInBondingCurve', 'marketCapSol', 'holdersCount')
+
+# (seconds since first trade, feature suffix)
+WINDOWS = [(30, '30s'), (60, '1min'), (120, '2min'), (300, '5min')]
+
+
+def base_features(token_data) -> dict:
+    """Feature dict with token metadata filled in and every window metric zeroed"""
+    features = {
+        'initial_buy_sol': float(token_data['initialBuySol']),
+        'initial_buy_percent': float(token_data['initialBuyPercent']),
+        'initial_liquidity': float(token_data['liquidity']),
+    }
+    for prefix in ['trades', 'buy_ratio', 'mcap_growth', 'unique_traders',
+                   'buy_pressure', 'holders', 'holders_growth']:
+        for _, suffix in WINDOWS:
+            features[f'{prefix}_{suffix}'] = 0
+    return features
+
+
+class TradeArrays:
+    """Trades of a single mint as timestamp-sorted NumPy columns"""
+
+    def __init__(self, timestamps, trader_codes, is_buy, v_sol, market_cap, holders, first_mask, traders=None):
+        self.timestamps = timestamps
+        self.trader_codes = trader_codes
+        # Wallet address of each trader code, i.e. in order of first appearance
+        self.traders = traders if traders is not None else np.array([], dtype=object)
+        self.is_buy = is_buy
+        self.v_sol = v_sol
+        self.market_cap = market_cap
+        self.holders = holders
+        self.first_mask = first_mask
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_frame(cls, trades_df: "pd.DataFrame") -> "TradeArrays":
+        import pandas as pd
+        timestamps = pd.to_numeric(trades_df['timestamp']).to_numpy()
+        # Same (quicksort) ordering DataFrame.sort_values uses, so ties resolve identically
+        order = np.argsort(timestamps, kind='quicksort')
+        # Rows labelled 0 are the first trade of a fresh payload; they count their whole curve balance
+        first_mask = trades_df.index.to_numpy()[order] <= 0
+        # factorize numbers traders by first appearance, which the unique-trader counts rely on
+        trader_codes, traders = pd.factorize(trades_df['traderPublicKey'].to_numpy()[order])
+        return cls(
+            timestamps=timestamps[order],
+            trader_codes=trader_codes,
+            is_buy=trades_df['txType'].to_numpy()[order] == 'buy',
+            v_sol=trades_df['vSolInBondingCurve'].to_numpy(dtype=float)[order],
+            market_cap=trades_df['marketCapSol'].to_numpy()[order],
+            holders=trades_df['holdersCount'].to_numpy()[order],
+            first_mask=first_mask,
+            traders=traders,
+        )
+
+    @classmethod
+    def from_records(cls, trades: List[Dict]) -> "TradeArrays":
+        """Build straight from trade dicts, skipping the DataFrame; matches from_frame(pd.DataFrame(trades))"""
+        return cls.from_columns({name: [t[name] for t in trades] for name in TRADE_COLUMNS})
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence]) -> "TradeArrays":
+        """Build from struct-of-arrays trades (field -> one value per trade, in payload order)"""
+        import pandas as pd
+        timestamps = np.asarray(columns['timestamp'])
+        if timestamps.dtype.kind not in 'iuf':
+            timestamps = pd.to_numeric(timestamps)
+        order = np.argsort(timestamps, kind='quicksort')
+        traders = np.asarray(columns['traderPublicKey'], dtype=object)
+        trader_codes, traders = pd.factorize(traders[order])
+        return cls(
+            timestamps=timestamps[order],
+            trader_codes=trader_codes,
+            is_buy=(np.asarray(columns['txType']) == 'buy')[order],
+            v_sol=np.asarray(columns['vSolInBondingCurve'], dtype=float)[order],
+            market_cap=np.asarray(columns['marketCapSol'])[order],
+            holders=np.asarray(columns['holdersCount'])[order],
+            # Position 0 plays the role of index label 0 in from_frame
+            first_mask=order == 0,
+            traders=traders,
+        )
+
+
+def trade_volumes(trades: TradeArrays) -> np.ndarray:
+    """SOL moved by each trade: change in vSolInBondingCurve since the last strictly earlier trade"""
+    prev = np.searchsorted(trades.timestamps, trades.timestamps, side='left') - 1
+    volumes = np.where(prev >= 0, np.abs(trades.v_sol - trades.v_sol[np.maximum(prev, 0)]), 0.0)
+    volumes[trades.first_mask] = trades.v_sol[trades.first_mask]
+    return volumes
+
+
+def compute_quick_features(trades: TradeArrays, token_data) -> dict:
+    """Window features from prefix sums over the sorted trades, O(n log n) overall"""
+    features = base_features(token_data)
+    if len(trades) == 0:
+        return features
+
+    volumes = trade_volumes(trades)
+    buy_volumes = np.where(trades.is_buy, volumes, 0.0)
+    cum_trades_buy = np.cumsum(trades.is_buy)
+    cum_volume = np.cumsum(volumes)
+    cum_buy_volume = np.cumsum(buy_volumes)
+    # Trader codes are assigned in order of first appearance, so the running max counts uniques
+    cum_unique = np.maximum.accumulate(trades.trader_codes) + 1
+
+    start_time = trades.timestamps[0]
+    initial_holders = trades.holders[0]
+    debug = logger.isEnabledFor(logging.DEBUG)
+    cutoffs = np.searchsorted(
+        trades.timestamps, [start_time + seconds * 1000 for seconds, _ in WINDOWS], side='right'
+    )
+
+    for (seconds, suffix), n in zip(WINDOWS, cutoffs):
+        if n == 0:
+            continue
+        last = n - 1
+
+        features[f'trades_{suffix}'] = int(n)
+        features[f'unique_traders_{suffix}'] = int(cum_unique[last])
+
+        # Holder metrics
+        features[f'holders_{suffix}'] = trades.holders[last].item()
+        holders_growth = ((trades.holders[last] - initial_holders) / initial_holders * 100) if initial_holders > 0 else 0
+        features[f'holders_growth_{suffix}'] = float(holders_growth)
+
+        # Volume metrics
+        features[f'buy_ratio_{suffix}'] = float(cum_trades_buy[last] / n)
+        buy_volume = cum_buy_volume[last]
+        total_volume = cum_volume[last]
+        features[f'buy_pressure_{suffix}'] = float(buy_volume / total_volume) if total_volume > 0 else 0
+
+        if n > 1:
+            start_mcap = trades.market_cap[0]
+            end_mcap = trades.market_cap[last]
+            features[f'mcap_growth_{suffix}'] = float((end_mcap - start_mcap) / start_mcap * 100) if start_mcap > 0 else 0
+
+        if debug:
+            logger.debug("Window %s: trades=%d volume=%.4f SOL buy_volume=%.4f SOL holders=%s "
+                         "holders_growth=%.2f%% buy_ratio=%.2f growth=%.2f%%",
+                         suffix, n, total_volume, buy_volume, features[f'holders_{suffix}'],
+                         features[f'holders_growth_{suffix}'], features[f'buy_ratio_{suffix}'],
+                         features[f'mcap_growth_{suffix}'])
+
+    return features
@@ -0,0 +1,49 @@
+# app/ml/history.py
+import json
+import os
+import threading
+from typing import Dict, List
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+HISTORY_FILENAME = "training_history.jsonl"
+
+
+class TrainingHistory:
+    """Append-only JSON-lines log of training runs, one record per trained model version"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append(self, record: Dict) -> None:
+        line = json.dumps(record, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+
+    def extend(self, records: List[Dict]) -> None:
+        for record in records:
+            self.append(record)
+
+    def records(self) -> List[Dict]:
+        if not self.exists():
+            return []
+        records = []
+        with open(self.path) as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted write; keep the rest readable
+                    logger.warning("Skipping unreadable line %d of %s", line_number, self.path)
+        return records
+
+    def last(self) -> Dict:
+        records = self.records()
+        return records[-1] if records else {}
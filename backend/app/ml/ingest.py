@@ -0,0 +1,129 @@
+# app/ml/ingest.py
+"""Typed, columnar loading of training data from Parquet, Arrow IPC/Feather or NDJSON files.
+
+String keys become categoricals, timestamps int64 and metrics float32, so a
+multi-million-trade history fits in a fraction of the memory of List[Dict] JSON.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List
+import pandas as pd
+from pandas.api.types import union_categoricals
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+TRADE_DTYPES = {
+    'mint': 'category',
+    'traderPublicKey': 'category',
+    'txType': 'category',
+    'tokenAmount': 'float32',
+    'vSolInBondingCurve': 'float32',
+    'vTokensInBondingCurve': 'float32',
+    'timestamp': 'int64',
+    'marketCapSol': 'float32',
+    'holdersCount': 'int32',
+}
+
+TOKEN_DTYPES = {
+    'mint': 'category',
+    'initialBuySol': 'float32',
+    'initialBuyPercent': 'float32',
+    'liquidity': 'float32',
+    'marketCap': 'float32',
+}
+
+FORMATS = {
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+    '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson',
+}
+
+
+def detect_format(path: str) -> str:
+    fmt = FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported training file format: {path} (expected one of {sorted(FORMATS)})")
+    return fmt
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow ingest needs pyarrow: pip install pyarrow") from e
+
+
+def _check_columns(columns: Iterable[str], dtypes: Dict[str, str], path: str) -> None:
+    missing = [col for col in dtypes if col not in set(columns)]
+    if missing:
+        raise ValueError(f"Missing required columns in {path}: {missing}")
+
+
+def _apply_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    return df[list(dtypes)].astype(dtypes)
+
+
+def _concat_typed(chunks: List[pd.DataFrame], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Concatenate typed chunks, unioning categories so string columns stay categorical"""
+    if not chunks:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+    columns = {}
+    for col, dtype in dtypes.items():
+        if dtype == 'category':
+            columns[col] = union_categoricals([chunk[col] for chunk in chunks])
+        else:
+            columns[col] = pd.concat([chunk[col] for chunk in chunks], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def _read_arrow_table(path: str, fmt: str, dtypes: Dict[str, str]) -> pd.DataFrame:
+    pa = _require_pyarrow()
+    categorical = [col for col, dtype in dtypes.items() if dtype == 'category']
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        schema_names = pq.read_schema(path).names
+        _check_columns(schema_names, dtypes, path)
+        table = pq.read_table(path, columns=list(dtypes), read_dictionary=categorical)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=None, memory_map=True)
+        _check_columns(table.column_names, dtypes, path)
+        table = table.select(list(dtypes))
+    # Dictionary-encoded strings convert straight to pandas categoricals, never to Python str objects
+    for col in categorical:
+        index = table.schema.get_field_index(col)
+        column = table.column(index)
+        if not pa.types.is_dictionary(column.type):
+            table = table.set_column(index, col, column.dictionary_encode())
+    return _apply_dtypes(table.to_pandas(), dtypes)
+
+
+def _read_ndjson(source, dtypes: Dict[str, str], chunksize: int) -> pd.DataFrame:
+    chunks = []
+    reader = pd.read_json(source, lines=True, chunksize=chunksize, dtype=False)
+    with reader:
+        for chunk in reader:
+            _check_columns(chunk.columns, dtypes, str(source))
+            chunks.append(_apply_dtypes(chunk, dtypes))
+    return _concat_typed(chunks, dtypes)
+
+
+def read_frame(path: str, dtypes: Dict[str, str], chunksize: int = 100_000) -> pd.DataFrame:
+    """Load the dtypes columns of a Parquet, Arrow or NDJSON file as a typed DataFrame"""
+    fmt = detect_format(path)
+    if fmt == 'ndjson':
+        df = _read_ndjson(path, dtypes, chunksize)
+    else:
+        df = _read_arrow_table(path, fmt, dtypes)
+    logger.info("Loaded %d rows from %s (%.1f MB in memory)",
+                len(df), path, df.memory_usage(deep=True).sum() / 1e6)
+    return df
+
+
+def read_trades(path: str, chunksize: int = 100_000) -> pd.DataFrame:
+    return read_frame(path, TRADE_DTYPES, chunksize)
+
+
+def read_tokens(path: str, chunksize: int = 100_000) -> pd.DataFrame:
+    return read_frame(path, TOKEN_DTYPES, chunksize)
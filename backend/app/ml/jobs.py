@@ -0,0 +1,131 @@
+# app/ml/jobs.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from app.core.log import get_logger
+from app.core.metrics import Counter
+
+logger = get_logger(__name__)
+
+ProgressCallback = Callable[[str, float], None]
+
+# Directory under model_dir holding one <job_id>.json per job, so any worker process can answer a poll
+JOBS_DIRNAME = "jobs"
+# Minimum seconds between persisted progress updates of a running job (status changes always persist)
+_PERSIST_INTERVAL = 0.5
+
+TRAINING_JOBS = Counter("training_jobs_total", "Finished training jobs by outcome", ["status"])
+
+
+class TrainingJobManager:
+    """Runs training jobs one at a time off the request path and keeps their status.
+
+    With a jobs_dir every status change is also written there, so with several server
+    processes a job submitted to one of them can be polled through any other.
+    """
+
+    def __init__(self, max_history: int = 100, jobs_dir: Optional[str] = None):
+        self.max_history = max_history
+        self.jobs_dir = jobs_dir
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training")
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._persisted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if jobs_dir:
+            os.makedirs(jobs_dir, exist_ok=True)
+
+    def submit(self, fn: Callable[[ProgressCallback], Any], **meta) -> str:
+        """Queue fn(progress) and return its job id"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'stage': None,
+            'progress': 0.0,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'error': None,
+            'result': None,
+            **meta
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._persist(job)
+            while len(self._jobs) > self.max_history:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest['status'] in ('queued', 'running'):
+                    break
+                del self._jobs[oldest_id]
+                self._forget(oldest_id)
+        self._executor.submit(self._run, job_id, fn)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        return self._read(job_id)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            # Progress ticks can be frequent; only every _PERSIST_INTERVAL of them reaches disk
+            if 'status' in fields or time.monotonic() - self._persisted.get(job_id, 0.0) >= _PERSIST_INTERVAL:
+                self._persist(job)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job: Dict) -> None:
+        if not self.jobs_dir:
+            return
+        path = self._path(job['job_id'])
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(job, f, default=str)
+            os.replace(tmp, path)
+            self._persisted[job['job_id']] = time.monotonic()
+        except OSError as e:
+            logger.warning("Could not persist status of job %s: %s", job['job_id'], e)
+
+    def _forget(self, job_id: str) -> None:
+        self._persisted.pop(job_id, None)
+        if self.jobs_dir:
+            try:
+                os.remove(self._path(job_id))
+            except OSError:
+                pass
+
+    def _read(self, job_id: str) -> Optional[Dict]:
+        """Status persisted by another process; job ids are uuid hex, anything else is unknown"""
+        if not self.jobs_dir or not all(c in '0123456789abcdef' for c in job_id) or len(job_id) != 32:
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self, job_id: str, fn: Callable[[ProgressCallback], Any]) -> None:
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+        logger.info("Training job %s started", job_id)
+        try:
+            result = fn(lambda stage, progress: self._update(job_id, stage=stage, progress=round(progress, 4)))
+            self._update(job_id, status='completed', stage='done', progress=1.0, result=result,
+                         finished_at=datetime.now().isoformat())
+            logger.info("Training job %s completed", job_id)
+            TRAINING_JOBS.inc(status='completed')
+        except Exception as e:
+            logger.exception("Training job %s failed: %s", job_id, e)
+            self._update(job_id, status='failed', error=str(e), finished_at=datetime.now().isoformat())
+            TRAINING_JOBS.inc(status='failed')
@@ -1,127 +1,238 @@
 # app/ml/predictor.py
-import pandas as pd
+# pandas, scikit-learn, LightGBM and joblib are imported where they are used, so the API
+# can start serving before they load (see settings.model_load)
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import lightgbm as lgb
-from typing import List, Dict, Tuple
-import joblib
+from typing import TYPE_CHECKING, List, Dict, Sequence, Tuple, Optional, Callable
+import logging
+import time
 from datetime import datetime
+from functools import partial, wraps
 import os
 from pathlib import Path
+from app.ml.features import TradeArrays, base_features, compute_quick_features
+from app.ml.registry import NATIVE_MODEL_SUFFIX, ModelBundle, ModelRegistry, model_filename, write_native
+from app.ml.cache import TTLCache, columns_fingerprint, trades_fingerprint
+from app.ml.history import HISTORY_FILENAME, TrainingHistory
+from app.ml import cascade, replay, traders, tuning
+from app.ml.shadow import SHADOW_LOG_FILENAME, ShadowEvaluator
+from app.ml.tuning import TUNING_LOG_FILENAME
+from app.ml.feature_store import (
+    STORE_DIRNAME, FeatureStore, StoredSamples, compute_labels, label_inputs, mint_fingerprints
+)
+from app.core.concurrency import FileLock, process_pool
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import Histogram
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__)
+
+PREDICTION_STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds", "Time spent in each stage of QuickTokenPredictor scoring", ["stage"]
+)
+_FEATURES_TIMER = PREDICTION_STAGE_SECONDS.labels(stage="features")
+_SCALER_TIMER = PREDICTION_STAGE_SECONDS.labels(stage="scaler")
+_MODEL_TIMER = PREDICTION_STAGE_SECONDS.labels(stage="model")
+_TOTAL_TIMER = PREDICTION_STAGE_SECONDS.labels(stage="total")
+PAYLOAD_TRADES = Histogram(
+    "prediction_payload_trades", "Trades per scored token",
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+).labels()
+# Probability above which a model prediction counts as promising
+PROMISING_THRESHOLD = 0.7
+TRAINING_SECONDS = Histogram(
+    "training_duration_seconds", "Wall time of QuickTokenPredictor.train",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+).labels()
+# Held for a whole training run (feature store, model files, history), by every worker process
+TRAINING_LOCK_FILENAME = "training.lock"
+
+
+def _one_training_at_a_time(method):
+    """Run a training method holding the model directory's training lock, so concurrent runs
+    in this or any other worker process wait for each other instead of interleaving writes"""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._training_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def extract_training_sample(item) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """Features, label inputs and labels for one mint; module-level so it can run in a worker process.
+    
+    Returns (mint, sample, error); sample is None when the mint yields no usable features.
+    """
+    mint, token, token_trades, success_mcap = item
+    try:
+        if len(token_trades) == 0:
+            return mint, None, None
+            
+        trades = TradeArrays.from_frame(token_trades)
+        features = compute_quick_features(trades, token)
+        if all(v == 0 for v in features.values()):
+            return mint, None, None
+        
+        # Extract performance metrics; labels are recomputed from these by the feature store
+        inputs = label_inputs(token_trades, token)
+        labels = compute_labels(inputs, success_mcap)
+        
+        return mint, {
+            'features': features,
+            'inputs': inputs,
+            'wallets': traders.mint_wallets(trades),
+            **{name: bool(value) for name, value in labels.items()},
+        }, None
+        
+    except Exception as e:
+        return mint, None, str(e)
+
 
 class QuickTokenPredictor:
-    def __init__(self, model_dir: str = "models"):
+    def __init__(self, model_dir: str = "models", lazy: bool = False):
+        """lazy defers reading the latest model until first use or warm_up()"""
         self.model_dir = model_dir
-        self.model = None
-        self.scaler = StandardScaler()
-        self.success_patterns = {}
-        self.feature_names = None
-        self.training_history = []
+        self.registry = ModelRegistry(model_dir, shared=settings.model_mmap)
+        self.history = TrainingHistory(os.path.join(model_dir, HISTORY_FILENAME))
+        self.tuning_log = TrainingHistory(os.path.join(model_dir, TUNING_LOG_FILENAME))
+        self.feature_store = FeatureStore(os.path.join(model_dir, STORE_DIRNAME))
+        self._training_lock = FileLock(os.path.join(model_dir, TRAINING_LOCK_FILENAME))
+        
+        # Repeat requests for the same mint and trade list skip extraction (and scoring)
+        self.feature_cache = TTLCache(settings.feature_cache_size, settings.feature_cache_ttl)
+        self.prediction_cache = TTLCache(settings.feature_cache_size, settings.feature_cache_ttl)
+        # Cheap first-minute check that turns away obvious non-candidates (None: score everything)
+        self.prefilter = cascade.Prefilter(
+            settings.prefilter_min_trades, settings.prefilter_min_buy_ratio, settings.prefilter_min_growth,
+            settings.prefilter_audit_rate
+        ) if settings.prefilter else None
+        # Candidate models scoring the served model's feature vectors off the request path
+        self.shadow = ShadowEvaluator(
+            partial(self._score, observe=False), os.path.join(model_dir, SHADOW_LOG_FILENAME),
+            settings.shadow_queue_size, PROMISING_THRESHOLD, int(settings.shadow_log_max_mb * 1024 * 1024)
+        )
         
         Path(model_dir).mkdir(parents=True, exist_ok=True)
-        self.load_latest()
+        if not lazy:
+            self.load_latest()
+    
+    # Read-only views of the served bundle; scoring code should snapshot self.registry.current instead
+    @property
+    def model(self):
+        bundle = self.registry.current
+        return bundle.model if bundle else None
+    
+    @property
+    def scaler(self):
+        bundle = self.registry.current
+        return bundle.scaler if bundle else None
+    
+    @property
+    def feature_names(self):
+        bundle = self.registry.current
+        return list(bundle.feature_names) if bundle and bundle.feature_names else None
+    
+    @property
+    def trader_index(self):
+        bundle = self.registry.current
+        return bundle.traders if bundle else None
+    
+    @property
+    def training_history(self) -> List[Dict]:
+        """Records of every training run, oldest first"""
+        if self.history.exists():
+            return self.history.records()
+        # Models saved before the history log carry their history inside the bundle
+        bundle = self.registry.current
+        return list(bundle.training_history) if bundle else []
+    
+    def load(self, path: str) -> bool:
+        bundle = self.registry.read(path)
+        self.registry.publish(bundle)
+        return True
     
     def load_latest(self) -> bool:
         try:
-            models = list(Path(self.model_dir).glob("quick_pattern_model_*.joblib"))
-            if not models:
-                print("No existing models found")
+            bundle, _ = self.registry.reload()
+            if bundle is None:
+                logger.info("No existing models found")
                 return False
-                
-            latest_model = max(models, key=os.path.getctime)
-            return self.load(str(latest_model))
+            return True
         except Exception as e:
-            print(f"Error loading latest model: {str(e)}")
+            logger.error("Error loading latest model: %s", e)
             return False
+    
+    def warm_up(self) -> Optional[ModelBundle]:
+        """Load the latest model and score one dummy request so the first real one pays no setup"""
+        bundle = self.registry.ensure_loaded()
+        token = {'mint': '', 'initialBuySol': 0.0, 'initialBuyPercent': 0.0, 'liquidity': 0.0, 'marketCap': 0.0}
+        self._predict_with(bundle, compute_quick_features(TradeArrays.from_records([]), token))
+        return bundle
+    
+    def set_shadow_models(self, versions: Sequence[str]) -> List[str]:
+        """Read versions from the model directory and make them the shadow candidates (empty: none).
+        
+        Candidates score the served model's feature dicts, so one that needs a feature the served
+        model doesn't produce (e.g. wallet features behind a model without a trader index) is refused.
+        """
+        available = set(self.registry.versions())
+        missing = [version for version in versions if version not in available]
+        if missing:
+            raise ValueError(f"Model version not found: {', '.join(missing)}")
+        bundles = [self.registry.read(self.registry.path_for(version)) for version in versions]
+        primary = self.registry.current
+        if primary is not None and primary.feature_names:
+            produced = set(primary.feature_names)
+            for bundle in bundles:
+                unknown = [name for name in bundle.feature_names or () if name not in produced]
+                if unknown:
+                    raise ValueError(
+                        f"Shadow model {bundle.version} needs features the served model "
+                        f"{primary.version} doesn't produce: {', '.join(unknown)}"
+                    )
+        self.shadow.set_models(bundles)
+        return self.shadow.versions
 
-    def extract_quick_features(self, trades_df: pd.DataFrame, token_data: dict) -> dict:
+    def extract_quick_features(self, trades_df: "pd.DataFrame", token_data: dict) -> dict:
         try:
-            features = {
-                'initial_buy_sol': float(token_data['initialBuySol']),
-                'initial_buy_percent': float(token_data['initialBuyPercent']),
-                'initial_liquidity': float(token_data['liquidity']),
-                
-                'trades_30s': 0, 'trades_1min': 0, 'trades_2min': 0, 'trades_5min': 0,
-                'buy_ratio_30s': 0, 'buy_ratio_1min': 0, 'buy_ratio_2min': 0, 'buy_ratio_5min': 0,
-                'mcap_growth_30s': 0, 'mcap_growth_1min': 0, 'mcap_growth_2min': 0, 'mcap_growth_5min': 0,
-                'unique_traders_30s': 0, 'unique_traders_1min': 0, 'unique_traders_2min': 0, 'unique_traders_5min': 0,
-                'buy_pressure_30s': 0, 'buy_pressure_1min': 0, 'buy_pressure_2min': 0, 'buy_pressure_5min': 0,
-                'holders_30s': 0, 'holders_1min': 0, 'holders_2min': 0, 'holders_5min': 0,
-                'holders_growth_30s': 0, 'holders_growth_1min': 0, 'holders_growth_2min': 0, 'holders_growth_5min': 0,
-            }
-            
-            if len(trades_df) == 0:
-                return features
-                
-            trades_df['timestamp'] = pd.to_numeric(trades_df['timestamp'])
-            trades_df = trades_df.sort_values('timestamp')
-            start_time = trades_df['timestamp'].min()
-            initial_holders = trades_df.iloc[0]['holdersCount']
-
-            # Calculate actual trade volumes
-            trades_df['trade_volume_sol'] = trades_df.apply(lambda row: 
-                abs(row['vSolInBondingCurve'] - trades_df[trades_df['timestamp'] < row['timestamp']]['vSolInBondingCurve'].iloc[-1] 
-                    if not trades_df[trades_df['timestamp'] < row['timestamp']].empty 
-                    else 0)
-                if row.name > 0 else row['vSolInBondingCurve'],
-                axis=1
-            )
-            
-            # Process time windows
-            for seconds, suffix in [(30, '30s'), (60, '1min'), (120, '2min'), (300, '5min')]:
-                window = trades_df[
-                    trades_df['timestamp'] <= start_time + (seconds * 1000)
-                ]
-                
-                if len(window) == 0:
-                    continue
-                    
-                features[f'trades_{suffix}'] = len(window)
-                features[f'unique_traders_{suffix}'] = window['traderPublicKey'].nunique()
-                
-                # Holder metrics
-                features[f'holders_{suffix}'] = window.iloc[-1]['holdersCount']
-                holders_growth = ((window.iloc[-1]['holdersCount'] - initial_holders) / initial_holders * 100) if initial_holders > 0 else 0
-                features[f'holders_growth_{suffix}'] = holders_growth
-                
-                # Calculate volume metrics using actual trade volumes
-                buys = window[window['txType'] == 'buy']
-                features[f'buy_ratio_{suffix}'] = len(buys) / len(window) if len(window) > 0 else 0
-                
-                buy_volume = buys['trade_volume_sol'].sum()
-                total_volume = window['trade_volume_sol'].sum()
-                features[f'buy_pressure_{suffix}'] = buy_volume / total_volume if total_volume > 0 else 0
-                
-                if len(window) > 1:
-                    start_mcap = window.iloc[0]['marketCapSol']
-                    end_mcap = window.iloc[-1]['marketCapSol']
-                    features[f'mcap_growth_{suffix}'] = ((end_mcap - start_mcap) / start_mcap * 100) if start_mcap > 0 else 0
-                    
-                print(f"\nWindow {suffix}:")
-                print(f"Trades in window: {len(window)}")
-                print(f"Volume in window: {total_volume:.4f} SOL")
-                print(f"Buy Volume: {buy_volume:.4f} SOL")
-                print(f"Current holders: {features[f'holders_{suffix}']}")
-                print(f"Holders growth: {features[f'holders_growth_{suffix}']}%")
-                print(f"Buy ratio: {features[f'buy_ratio_{suffix}']:.2f}")
-                print(f"Growth: {features[f'mcap_growth_{suffix}']:.2f}%")
-            
-            return features
+            return compute_quick_features(TradeArrays.from_frame(trades_df), token_data)
             
         except Exception as e:
-            print(f"Error extracting features: {str(e)}")
-            print(f"Trades DataFrame columns: {trades_df.columns.tolist()}")
+            logger.error("Error extracting features: %s (columns: %s)", e, trades_df.columns.tolist())
             raise
-            
-        except Exception as e:
-            print(f"Error extracting features: {str(e)}")
-            print(f"Trades DataFrame columns: {trades_df.columns.tolist()}")
-            raise
-    def train(self, trades_df: pd.DataFrame, tokens_df: pd.DataFrame, success_mcap: float = 400):
-        """Train model to detect quick success patterns while avoiding bad patterns"""
-        print("\nProcessing trading data...")
-        print(f"Initial trades shape: {trades_df.shape}")
-        print(f"Initial tokens shape: {tokens_df.shape}")
+    
+    @staticmethod
+    def _map_samples(samples, total: int, n_workers: int):
+        """Run extract_training_sample over every mint, fanning out to a process pool when it pays off"""
+        if n_workers <= 1 or total < n_workers * 4:
+            yield from map(extract_training_sample, samples)
+            return
+        
+        chunksize = max(1, total // (n_workers * 4))
+        with process_pool(n_workers) as executor:
+            yield from executor.map(extract_training_sample, samples, chunksize=chunksize)
+    
+    @_one_training_at_a_time
+    def train(self, trades_df: "pd.DataFrame", tokens_df: "pd.DataFrame", success_mcap: float = 400,
+              n_workers: Optional[int] = None, progress: Optional[Callable[[str, float], None]] = None,
+              incremental: bool = False):
+        """Train model to detect quick success patterns while avoiding bad patterns
+        
+        progress, if given, is called as progress(stage, fraction) while training runs.
+        
+        incremental reuses samples from the feature store for mints whose trades haven't
+        changed (only new or changed mints need posting) and, when the served model has the
+        same features, continues boosting it for settings.incremental_rounds instead of
+        training from scratch.
+        """
+        import pandas as pd
+        
+        report = progress or (lambda stage, fraction: None)
+        report('loading', 0.0)
+        started = time.perf_counter()
+        logger.info("Processing trading data: trades %s, tokens %s", trades_df.shape, tokens_df.shape)
         
         # Convert timestamps to ensure they're numeric
         trades_df['timestamp'] = pd.to_numeric(trades_df['timestamp'], errors='coerce')
@@ -130,196 +241,329 @@ class QuickTokenPredictor:
         trades_df = trades_df.sort_values('timestamp')
         
         # First, analyze data
-        print("\nData Analysis:")
-        print(f"Trades timestamp range: {trades_df['timestamp'].min()} to {trades_df['timestamp'].max()}")
-        print(f"Trades columns: {trades_df.columns.tolist()}")
-        print(f"Tokens columns: {tokens_df.columns.tolist()}")
+        logger.info("Trades timestamp range: %s to %s", trades_df['timestamp'].min(), trades_df['timestamp'].max())
+        logger.debug("Trades columns: %s", trades_df.columns.tolist())
+        logger.debug("Tokens columns: %s", tokens_df.columns.tolist())
         
         trade_mints = set(trades_df['mint'].unique())
         token_mints = set(tokens_df['mint'].unique())
         common_mints = trade_mints.intersection(token_mints)
         
-        print(f"\nMint Analysis:")
-        print(f"Unique mints in trades: {len(trade_mints)}")
-        print(f"Unique mints in tokens: {len(token_mints)}")
-        print(f"Matching mints: {len(common_mints)}")
+        logger.info("Mints: %d in trades, %d in tokens, %d matching",
+                    len(trade_mints), len(token_mints), len(common_mints))
         
         if len(common_mints) == 0:
-            print("\nSample mints from trades:", list(trade_mints)[:5])
-            print("Sample mints from tokens:", list(token_mints)[:5])
+            logger.warning("Sample mints from trades: %s; from tokens: %s",
+                           list(trade_mints)[:5], list(token_mints)[:5])
             raise ValueError("No matching mints found between trades and tokens")
         
-        features_list = []
-        labels = []
-        success_patterns = []
-        avoid_patterns = []
-        processed_tokens = 0
-        
-        rugpull_count = 0
-        holder_dump_count = 0
-        no_growth_count = 0
-        
-        print("\nProcessing tokens...")
-        for mint in common_mints:
-            try:
-                # Get token data
-                token = tokens_df[tokens_df['mint'] == mint].iloc[0]
-                token_trades = trades_df[trades_df['mint'] == mint]
-                
-                if len(token_trades) == 0:
-                    continue
-                    
-                # Extract features
-                features = self.extract_quick_features(token_trades, token)
-                
-                # Verify features
-                if not all(v == 0 for v in features.values()):
-                    # Extract performance metrics
-                    initial_mcap = token_trades.iloc[0]['marketCapSol']
-                    max_mcap = token_trades['marketCapSol'].max()
-                    final_mcap = token_trades.iloc[-1]['marketCapSol']
-                    max_growth = ((max_mcap - initial_mcap) / initial_mcap) * 100
-                    holders_peak = token_trades['holdersCount'].max()
-                    holders_final = token_trades.iloc[-1]['holdersCount']
-                    holder_retention = holders_final / holders_peak if holders_peak > 0 else 0
-                    drop_from_ath = ((max_mcap - final_mcap) / max_mcap) * 100
-
-                    # Define negative patterns
-                    is_rugpull = drop_from_ath >= 60  # Lost 60% from initial
-                    is_holder_dump = (holder_retention < 0.5)  # Lost 50% of peak holders
-                    is_no_growth = (max_growth < 30)  # Never grew significantly
-                    
-                    if is_rugpull:
-                        rugpull_count += 1
-                        avoid_patterns.append(('rugpull', features))
-                    if is_holder_dump:
-                        holder_dump_count += 1
-                        avoid_patterns.append(('holder_dump', features))
-                    if is_no_growth:
-                        no_growth_count += 1
-                        avoid_patterns.append(('no_growth', features))
-                    
-                    # Define success criteria
-                    is_success = (
-                        token['marketCap'] >= success_mcap and  # Reached target mcap
-                        not is_rugpull and                      # Didn't crash completely
-                        not is_holder_dump and                  # Retained holders
-                        max_growth >= 100                       # At least doubled
-                    )
-                    
-                    features_list.append(features)
-                    labels.append(is_success)
-                    processed_tokens += 1
-                    
-                    if is_success:
-                        success_patterns.append(features)
-                        
-                    if processed_tokens % 10 == 0:
-                        print(f"\nAnalyzed {processed_tokens} tokens")
-                        print(f"Success: {sum(labels)}, Failed: {len(labels) - sum(labels)}")
-                        print(f"Patterns to avoid found:")
-                        print(f"- Rugpulls: {rugpull_count}")
-                        print(f"- Holder dumps: {holder_dump_count}")
-                        print(f"- No growth: {no_growth_count}")
-                        
-            except Exception as e:
-                print(f"Error processing token {mint}:", str(e))
-                continue
-        
-        print(f"\nFeature Extraction Results:")
-        print(f"Total tokens processed: {processed_tokens}")
-        print(f"Features extracted: {len(features_list)}")
-        
-        if len(features_list) == 0:
+        # Partition once: first token row per mint, trades grouped by mint (kept in timestamp order)
+        tokens_by_mint = tokens_df.drop_duplicates('mint').set_index('mint')
+        fingerprints = mint_fingerprints(trades_df, tokens_by_mint, common_mints)
+        stored = self.feature_store.load() if incremental else StoredSamples.empty()
+        known = stored.fingerprint_index()
+        stale = sorted(mint for mint in common_mints if known.get(mint) != fingerprints[mint])
+        logger.info("Extracting %d of %d mints (%d reused from the feature store)",
+                    len(stale), len(common_mints), len(common_mints) - len(stale))
+        
+        mint_groups = trades_df[trades_df['mint'].isin(stale)].groupby('mint', sort=True, observed=True)
+        samples = (
+            (mint, tokens_by_mint.loc[mint].to_dict(), token_trades, success_mcap)
+            for mint, token_trades in mint_groups
+        )
+        
+        n_workers = n_workers or settings.train_workers
+        logger.info("Processing tokens with %d worker(s)", n_workers)
+        report_every = max(1, len(stale) // 100)
+        rows = []
+        for i, (mint, sample, error) in enumerate(self._map_samples(samples, len(stale), n_workers), 1):
+            if i % report_every == 0:
+                report('extracting', 0.8 * i / len(stale))
+            if error is not None:
+                logger.warning("Error processing token %s: %s", mint, error)
+            rows.append((mint, fingerprints[mint], sample))
+            
+            if i % 1000 == 0:
+                logger.info("Extracted %d of %d tokens", i, len(stale))
+        
+        stored = stored.merge(StoredSamples.from_samples(rows))
+        self.feature_store.save(stored)
+        
+        return self._fit(stored, success_mcap, incremental, report, started, {
+            'trades_count': len(trades_df),
+            'tokens_count': len(tokens_df),
+            'extracted_mints': len(stale),
+            'reused_mints': len(stored) - len(stale),
+        })
+    
+    @_one_training_at_a_time
+    def train_from_store(self, success_mcap: float = 400, incremental: bool = False,
+                         progress: Optional[Callable[[str, float], None]] = None):
+        """Fit a model on the feature store alone, e.g. to re-label with another success_mcap"""
+        report = progress or (lambda stage, fraction: None)
+        report('loading', 0.0)
+        started = time.perf_counter()
+        stored = self.feature_store.load()
+        if len(stored) == 0:
+            raise ValueError("Feature store is empty; run train() on trades first")
+        return self._fit(stored, success_mcap, incremental, report, started, {
+            'trades_count': 0,
+            'tokens_count': len(stored),
+            'extracted_mints': 0,
+            'reused_mints': len(stored),
+        })
+    
+    @_one_training_at_a_time
+    def tune(self, success_mcap: float = 400, n_trials: int = 20, n_splits: int = 5,
+             n_workers: Optional[int] = None, seed: int = 0,
+             progress: Optional[Callable[[str, float], None]] = None):
+        """Search LightGBM parameters with time-ordered cross-validation on the feature store,
+        then train and publish a model with the best candidate and its early-stopped round count.
+        
+        Every candidate's scores are appended to the tuning log next to the models.
+        """
+        report = progress or (lambda stage, fraction: None)
+        report('loading', 0.0)
+        started = time.perf_counter()
+        stored = self.feature_store.load()
+        if len(stored) == 0:
+            raise ValueError("Feature store is empty; run train() on trades first")
+        
+        n_workers = n_workers or settings.train_workers
+        results = tuning.search(
+            self.feature_store, success_mcap, n_trials=n_trials, n_splits=n_splits, n_workers=n_workers,
+            max_rounds=settings.tune_max_rounds, early_stopping=settings.tune_early_stopping, seed=seed,
+            progress=lambda fraction: report('tuning', 0.75 * fraction)
+        )
+        best = results[0]
+        self.tuning_log.append({
+            'timestamp': datetime.now().isoformat(),
+            'success_mcap': success_mcap,
+            'feature_set_version': self.feature_store.version,
+            'n_splits': n_splits,
+            'seed': seed,
+            'results': results,
+        })
+        
+        return self._fit(stored, success_mcap, False, report, started, {
+            'trades_count': 0,
+            'tokens_count': len(stored),
+            'extracted_mints': 0,
+            'reused_mints': len(stored),
+            'mode': 'tuned',
+            'tuning': {
+                'trials': len(results),
+                'cv_auc': best['auc'],
+                'cv_auc_std': best['auc_std'],
+                'default_cv_auc': next(result['auc'] for result in results if not result['params']),
+            },
+        }, params={**tuning.DEFAULT_PARAMS, **best['params']}, num_boost_round=best['best_iteration'])
+    
+    def _fit(self, stored: StoredSamples, success_mcap: float, incremental: bool, report, started: float,
+             record: Dict, params: Optional[Dict] = None, num_boost_round: int = tuning.DEFAULT_ROUNDS):
+        """Label stored samples, fit (or continue) the model, then save, publish and log it"""
+        import pandas as pd
+        import lightgbm as lgb
+        from sklearn.preprocessing import StandardScaler
+        
+        valid = np.asarray(stored.valid)
+        logger.info("Feature extraction: %d tokens processed, %d feature rows", len(stored), int(valid.sum()))
+        
+        if not valid.any():
             raise ValueError("No valid features extracted. Please check data structure and matching.")
         
-        X = pd.DataFrame(features_list)
-        y = np.array(labels)
-        
-        print("\nFeature Names:", X.columns.tolist())
-        print("Sample Features:")
-        print(X.iloc[0] if len(X) > 0 else "No features")
-        
-        success_count = sum(labels)
-        print(f"\nFinal Statistics:")
-        print(f"Total tokens with features: {len(labels)}")
-        print(f"Successful tokens: {success_count} ({(success_count/len(labels)*100):.2f}%)")
-        print(f"Failed tokens: {len(labels) - success_count} ({((len(labels) - success_count)/len(labels)*100):.2f}%)")
-        print("\nFailure Categories:")
-        print(f"- Rugpulls: {rugpull_count}")
-        print(f"- Holder dumps: {holder_dump_count}")
-        print(f"- No growth: {no_growth_count}")
-        
-        # Scale features
-        self.scaler = StandardScaler()
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Train model
-        train_data = lgb.Dataset(X_scaled, label=y)
-        
-        params = {
-            'objective': 'binary',
-            'metric': 'auc',
-            'learning_rate': 0.05,
-            'num_leaves': 31,
-            'feature_fraction': 0.8,
-            'bagging_fraction': 0.8,
-            'bagging_freq': 5,
-            'boost_from_average': True,
-            'verbosity': -1
-        }
+        all_labels = stored.labels(success_mcap)
+        labels = {name: column[valid] for name, column in all_labels.items()}
+        X = pd.DataFrame(np.asarray(stored.features)[valid], columns=stored.feature_names)
+        y = labels['is_success']
         
-        print("\nTraining model...")
-        self.model = lgb.train(params, train_data, num_boost_round=100)
+        # Wallet reputation from every other mint's outcome, never the row's own
+        trader_index, wallet_features = traders.training_features(stored, all_labels['is_success'])
+        for name in traders.WALLET_FEATURES:
+            X[name] = wallet_features[name][valid]
+        logger.info("Trader index: %d wallets", len(trader_index) if trader_index is not None else 0)
         
-        # Save feature names
-        self.feature_names = X.columns.tolist()
+        logger.debug("Feature names: %s", X.columns.tolist())
+        
+        success_count = int(y.sum())
+        rugpull_count = int(labels['is_rugpull'].sum())
+        holder_dump_count = int(labels['is_holder_dump'].sum())
+        no_growth_count = int(labels['is_no_growth'].sum())
+        logger.info("Tokens with features: %d, successful: %d (%.2f%%), rugpulls: %d, holder dumps: %d, no growth: %d",
+                    len(y), success_count, success_count / len(y) * 100,
+                    rugpull_count, holder_dump_count, no_growth_count)
+        
+        feature_names = X.columns.tolist()
+        base = self._warm_start_base(feature_names, success_mcap) if incremental else None
+        if params is None:
+            # Continued boosting keeps the parameters the served model was trained (or tuned) with
+            params = self._params_of(base.version) if base is not None else dict(tuning.DEFAULT_PARAMS)
+        report('fitting', 0.8)
+        if base is None:
+            # Scale features
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
+            scaler_mean, scaler_scale = None, None
+            
+            logger.info("Training model...")
+            model = lgb.train(params, lgb.Dataset(X_scaled, label=y), num_boost_round=num_boost_round)
+        else:
+            # Continued boosting only makes sense on the inputs the existing trees split on,
+            # so keep the served model's scaling rather than refitting it
+            scaler, scaler_mean, scaler_scale = base.scaler, base.scaler_mean, base.scaler_scale
+            X_scaled = (X.to_numpy(dtype=np.float64) - scaler_mean) / scaler_scale
+            
+            logger.info("Continuing model %s for %d rounds...", base.version, settings.incremental_rounds)
+            model = lgb.train(params, lgb.Dataset(X_scaled, label=y), num_boost_round=settings.incremental_rounds,
+                              init_model=self._booster_source(base))
         
         # Print feature importance
         importance = pd.DataFrame({
-            'feature': self.feature_names,
-            'importance': self.model.feature_importance()
+            'feature': feature_names,
+            'importance': model.feature_importance()
         }).sort_values('importance', ascending=False)
         
-        print("\nTop 10 Important Features:")
-        print(importance.head(10))
+        logger.info("Top 10 important features:\n%s", importance.head(10))
         
+        version = self.registry.new_version()
         training_record = {
+            'version': version,
             'timestamp': datetime.now().isoformat(),
-            'trades_count': len(trades_df),
-            'tokens_count': len(tokens_df),
             'success_count': success_count,
             'rugpull_count': rugpull_count,
             'holder_dump_count': holder_dump_count,
             'no_growth_count': no_growth_count,
-            'success_rate': (success_count/len(labels) * 100) if labels else 0,
+            'success_rate': success_count / len(y) * 100,
             'top_features': importance['feature'].tolist()[:5],
-            'success_patterns': len(success_patterns),
-            'avoid_patterns': len(avoid_patterns)
+            'success_patterns': success_count,
+            'avoid_patterns': rugpull_count + holder_dump_count + no_growth_count,
+            'success_mcap': success_mcap,
+            'feature_set_version': self.feature_store.version,
+            'mode': 'incremental' if incremental else 'full',
+            **record,
+            'warm_start_from': base.version if base is not None else None,
+            'num_trees': model.num_trees(),
+            'params': params,
+            'trader_index_wallets': len(trader_index) if trader_index is not None else 0
         }
         
-        self.training_history.append(training_record)
-        self.save()
-        
-        print("\nTraining History:")
-        print(f"Total training sessions: {len(self.training_history)}")
-        if self.training_history:
-            latest = self.training_history[-1]
-            print(f"Latest session stats:")
-            print(f"- Date: {latest['timestamp']}")
-            print(f"- Success rate: {latest['success_rate']:.2f}%")
-            print(f"- Rugpulls avoided: {latest['rugpull_count']}")
-            print(f"- Holder dumps avoided: {latest['holder_dump_count']}")
-            print(f"- No growth avoided: {latest['no_growth_count']}")
-            print(f"- Top features: {', '.join(latest['top_features'])}")
+        bundle = ModelBundle(
+            version=version,
+            model=model,
+            scaler=scaler,
+            feature_names=feature_names,
+            scaler_mean=scaler_mean,
+            scaler_scale=scaler_scale,
+            traders=trader_index
+        )
+        report('saving', 0.95)
+        bundle = bundle.replace(path=self.save(bundle=bundle))
+        
+        if not self.history.exists():
+            # Carry over history embedded in models saved before the log existed
+            self.history.extend(self.training_history)
+        self.history.append(training_record)
+        
+        # Swap only once the model is on disk, as a single immutable bundle
+        self.registry.publish(bundle)
+        TRAINING_SECONDS.observe(time.perf_counter() - started)
+        self.registry.prune(settings.model_keep, settings.model_max_age_days, protect=self.shadow.versions)
+        
+        logger.info("Training session %d complete: success rate %.2f%%, top features: %s",
+                    len(self.history.records()), training_record['success_rate'],
+                    ', '.join(training_record['top_features']))
         
         return self
     
-    def save(self, name: str = None):
-        """Save model and training state"""
+    def backtest(self, trades_df: "pd.DataFrame", tokens_df: "pd.DataFrame",
+                 thresholds: Sequence[float] = replay.DEFAULT_THRESHOLDS, success_mcap: float = 400,
+                 progress: Optional[Callable[[str, float], None]] = None) -> Dict:
+        """Replay recorded trades through the served model (see app.ml.replay).
+
+        The served trader index was fitted on stored outcomes, which include the replayed mints
+        whenever they were trained on, so the replay scores with an index rebuilt from the stored
+        mints launched before its first trade instead.
+        """
+        import pandas as pd
+        bundle = self.registry.current
+        if bundle is None:
+            raise ValueError("No model loaded to backtest")
+        index_mints = 0
+        if bundle.traders is not None:
+            mints = tokens_df['mint'].unique()
+            timestamps = pd.to_numeric(trades_df.loc[trades_df['mint'].isin(mints), 'timestamp'])
+            cutoff = float(timestamps.min()) if len(timestamps) else float('-inf')
+            index, index_mints = self._traders_before(cutoff, mints, success_mcap)
+            bundle = bundle.replace(traders=index)
+        result = replay.backtest(bundle, trades_df, tokens_df, thresholds, success_mcap, progress=progress)
+        result['trader_index_mints'] = index_mints
+        return result
+
+    def _traders_before(self, cutoff: float, exclude: Sequence[str],
+                        success_mcap: float) -> Tuple[Optional[traders.TraderIndex], int]:
+        """Trader index over the stored mints whose first trade precedes cutoff, and their count"""
+        stored = self.feature_store.load()
+        if len(stored) == 0:
+            return None, 0
+        earlier = (np.asarray(stored.fingerprints)[:, 1] < cutoff) & ~np.isin(stored.mints, exclude)
+        pairs = earlier[np.asarray(stored.wallet_rows)]
+        if not pairs.any():
+            return None, int(earlier.sum())
+        wins = stored.labels(success_mcap)['is_success']
+        index, _ = traders.fit(stored.wallet_rows[pairs], stored.wallet_hashes[pairs],
+                               stored.wallet_flags[pairs], wins, len(stored))
+        return index, int(earlier.sum())
+
+    def _record_of(self, version: str) -> Dict:
+        """Training history record of model version ({} for models older than the history log)"""
+        for record in reversed(self.history.records()):
+            if record.get('version') == version:
+                return record
+        return {}
+    
+    def _params_of(self, version: str) -> Dict:
+        """LightGBM parameters model version was trained with (the defaults for older models)"""
+        params = self._record_of(version).get('params')
+        return dict(params) if params else dict(tuning.DEFAULT_PARAMS)
+    
+    def _warm_start_base(self, feature_names: List[str], success_mcap: float) -> Optional[ModelBundle]:
+        """The served bundle if new rounds can be boosted onto it, else None (train from scratch)"""
+        base = self.registry.current
+        if base is None:
+            return None
+        if list(base.feature_names or ()) != list(feature_names):
+            logger.info("Feature set changed since model %s; training from scratch", base.version)
+            return None
+        # Trees fitted to one success definition would be boosted towards another; an unknown
+        # one (no history record) can't be shown to match
+        base_mcap = self._record_of(base.version).get('success_mcap')
+        if base_mcap is None or float(base_mcap) != float(success_mcap):
+            logger.info("Model %s was trained for success_mcap %s, not %s; training from scratch",
+                        base.version, base_mcap, success_mcap)
+            return None
+        num_trees = base.model.num_trees() if hasattr(base.model, 'num_trees') else base.model.meta['num_trees']
+        if num_trees + settings.incremental_rounds > settings.max_trees:
+            # Every warm start adds trees and inference cost; a full retrain resets the ensemble
+            logger.info("Model %s has %d trees (limit %d); training from scratch",
+                        base.version, num_trees, settings.max_trees)
+            return None
+        return base
+    
+    @staticmethod
+    def _booster_source(bundle: ModelBundle):
+        """init_model for lgb.train: the booster itself, or the native text model behind tree arrays"""
+        if hasattr(bundle.model, 'num_trees'):
+            return bundle.model
+        return str(Path(bundle.path).with_suffix(NATIVE_MODEL_SUFFIX))
+    
+    def save(self, name: str = None, bundle: Optional[ModelBundle] = None):
+        """Save model and training state (the served bundle unless one is given)"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = name or f"quick_pattern_model_{timestamp}.joblib"
+            bundle = bundle or self.registry.current
+            if bundle is None:
+                raise ValueError("No model to save")
+            timestamp = bundle.version
+            filename = name or model_filename(timestamp, settings.model_format)
             path = os.path.join(self.model_dir, filename)
             
             # Ensure the directory exists
@@ -329,123 +573,308 @@ class QuickTokenPredictor:
             abs_path = os.path.abspath(path)
             if not abs_path.startswith(os.path.abspath(self.model_dir)):
                 raise ValueError("Invalid save path")
-                
-            state = {
-                'model': self.model,
-                'scaler': self.scaler,
-                'success_patterns': self.success_patterns,
-                'feature_names': self.feature_names,
-                'training_history': self.training_history,
-                'timestamp': timestamp
-            }
             
-            # Save to a temporary file first
-            temp_path = path + '.tmp'
-            joblib.dump(state, temp_path)
-            
-            # If successful, rename to final path
-            os.replace(temp_path, path)
+            if settings.model_format == 'native':
+                write_native(bundle, path)
+            else:
+                import joblib
+                # Training history lives in the history log, not in every model file
+                state = {
+                    'model': bundle.model,
+                    'scaler': bundle.scaler,
+                    'feature_names': list(bundle.feature_names),
+                    'traders': bundle.traders,
+                    'timestamp': timestamp
+                }
+                
+                # Save to a temporary file first
+                temp_path = path + '.tmp'
+                joblib.dump(state, temp_path)
+                
+                # If successful, rename to final path
+                os.replace(temp_path, path)
             
-            print(f"\nModel saved to: {path}")
+            self.registry.register(timestamp, path)
+            logger.info("Model saved to: %s", path)
             return path
             
         except Exception as e:
-            print(f"Error saving model: {str(e)}")
-            print("Error type:", type(e))
-            print("Traceback:", traceback.format_exc())
+            logger.exception("Error saving model: %s", e)
             raise
-    def predict(self, trades: List[Dict], token_data: Dict) -> Tuple[bool, float, Dict]:
-        try:
-            # Debug: Check if model is loaded
-            if not self.model:
-                print("No model loaded, using temporary scoring logic")
-                # Temporary scoring logic until model is trained
-                trades_df = pd.DataFrame(trades)
-                features = self.extract_quick_features(trades_df, token_data)
-                
-                # Calculate a basic score based on early trading patterns
-                score = 0.0
-                num_trades = features['trades_1min']
-                buy_ratio = features['buy_ratio_1min']
-                growth = features['mcap_growth_1min']
-                
-                # Score based on number of trades in first minute
-                if num_trades >= 5:
-                    score += 0.3
-                elif num_trades >= 3:
-                    score += 0.2
-                    
-                # Score based on buy ratio
-                if buy_ratio >= 0.7:
-                    score += 0.3
-                elif buy_ratio >= 0.5:
-                    score += 0.2
-                    
-                # Score based on market cap growth
-                if growth >= 50:  # 50% growth
-                    score += 0.4
-                elif growth >= 20:
-                    score += 0.2
-                    
-                print(f"Scoring Details:")
-                print(f"- Trades (1min): {num_trades}")
-                print(f"- Buy Ratio (1min): {buy_ratio:.2f}")
-                print(f"- Growth (1min): {growth:.2f}%")
-                print(f"- Final Score: {score:.2f}")
-                
-                analysis = {
-                    'early_signs': {
-                        'num_trades': num_trades,
-                        'buy_ratio': buy_ratio,
-                        'growth_rate': growth
-                    },
-                    'feature_values': features
-                }
-                
-                return score >= 0.7, score, analysis
-                
-            # Normal model-based prediction
-            trades_df = pd.DataFrame(trades)
-            features = self.extract_quick_features(trades_df, token_data)
+    
+    def _heuristic_prediction(self, features: Dict) -> Tuple[bool, float, Dict]:
+        """Temporary scoring logic used until a model is trained"""
+        score = 0.0
+        num_trades = features['trades_1min']
+        buy_ratio = features['buy_ratio_1min']
+        growth = features['mcap_growth_1min']
+        
+        # Score based on number of trades in first minute
+        if num_trades >= 5:
+            score += 0.3
+        elif num_trades >= 3:
+            score += 0.2
             
-            # Debug: Print features
-            print("\nExtracted Features:")
-            for k, v in features.items():
-                print(f"{k}: {v}")
-                
-            X = pd.DataFrame([features])
+        # Score based on buy ratio
+        if buy_ratio >= 0.7:
+            score += 0.3
+        elif buy_ratio >= 0.5:
+            score += 0.2
             
-            if self.feature_names:
-                missing_features = set(self.feature_names) - set(X.columns)
-                for feature in missing_features:
-                    X[feature] = 0
-                X = X[self.feature_names]
+        # Score based on market cap growth
+        if growth >= 50:  # 50% growth
+            score += 0.4
+        elif growth >= 20:
+            score += 0.2
             
-            # Debug: Print scaled features
-            X_scaled = self.scaler.transform(X)
-            print("\nScaled Features shape:", X_scaled.shape)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Heuristic score %.2f: trades_1min=%s buy_ratio_1min=%.2f mcap_growth_1min=%.2f%%",
+                         score, num_trades, buy_ratio, growth)
+        
+        analysis = {
+            'early_signs': {
+                'num_trades': num_trades,
+                'buy_ratio': buy_ratio,
+                'growth_rate': growth
+            },
+            'feature_values': features
+        }
+        
+        return score >= 0.7, score, analysis
+    
+    def _model_prediction(self, features: Dict, probability: float) -> Tuple[bool, float, Dict]:
+        prediction = probability > PROMISING_THRESHOLD
+        analysis = {
+            'probability': probability,
+            'early_signs': {
+                'buy_pressure': features['buy_pressure_1min'],
+                'growth_rate': features['mcap_growth_1min'],
+                'trader_interest': features['unique_traders_1min']
+            },
+            'feature_values': features
+        }
+        return prediction, probability, analysis
+    
+    @staticmethod
+    def _feature_matrix(features_list: List[Dict], feature_names) -> "pd.DataFrame":
+        """One row per feature dict, columns aligned to the trained feature order"""
+        import pandas as pd
+        X = pd.DataFrame(features_list)
+        if feature_names:
+            X = X.reindex(columns=list(feature_names), fill_value=0)
+        return X
+    
+    def _score(self, bundle: ModelBundle, features_list: List[Dict], observe: bool = True) -> np.ndarray:
+        """Model probabilities for feature dicts, scaled and ordered as the bundle was trained.
+        
+        observe=False keeps the call out of the stage timers (shadow scoring).
+        """
+        started = time.perf_counter()
+        if not settings.fast_inference:
+            X = self._feature_matrix(features_list, bundle.feature_names)
+            if bundle.scaler is not None:
+                X_scaled = bundle.scaler.transform(X)
+            else:
+                X_scaled = (X.to_numpy(dtype=np.float64) - bundle.scaler_mean) / bundle.scaler_scale
+            scaled = time.perf_counter()
+            probabilities = bundle.model.predict(X_scaled)
+        else:
+            # NumPy path: fixed feature order, scaler folded into mean/scale arrays, direct booster call
+            names = bundle.feature_names or list(features_list[0])
+            X = np.array([[features.get(name, 0) for name in names] for features in features_list], dtype=np.float64)
+            X -= bundle.scaler_mean
+            X /= bundle.scaler_scale
+            scaled = time.perf_counter()
+            probabilities = bundle.model.predict(X, num_threads=1)
+        
+        if observe:
+            _SCALER_TIMER.observe(scaled - started)
+            _MODEL_TIMER.observe(time.perf_counter() - scaled)
+        return probabilities
+    
+    def features_for(self, trades: List[Dict], token_data: Dict, key: Optional[Tuple] = None) -> Dict:
+        """Quick features for a request, served from the feature cache when the trade list is unchanged"""
+        key = key or trades_fingerprint(trades, token_data)
+        return self._cached_features(key, token_data, lambda: TradeArrays.from_records(trades),
+                                     self.registry.current)
+    
+    def _cached_features(self, key: Tuple, token_data: Dict, build: Callable[[], TradeArrays],
+                         bundle: Optional[ModelBundle] = None) -> Dict:
+        """Quick features plus, when bundle has a trader index, its wallet features"""
+        index = bundle.traders if bundle is not None else None
+        # Wallet features belong to the index they were looked up in
+        if index is not None:
+            key = (key, bundle.version)
+        features = self.feature_cache.get(key)
+        if features is None:
+            started = time.perf_counter()
+            trades = build()
+            features = compute_quick_features(trades, token_data)
+            if index is not None:
+                features.update(index.features(traders.window_traders(trades)))
+            _FEATURES_TIMER.observe(time.perf_counter() - started)
+            self.feature_cache.put(key, features)
+        return features
+    
+    def predict(self, trades: List[Dict], token_data: Dict) -> Tuple[bool, float, Dict]:
+        return self.predict_prepared([self.prepare(trades, token_data)])[0]
+    
+    def predict_columns(self, columns: Dict[str, Sequence], token_data: Dict) -> Tuple[bool, float, Dict]:
+        """predict() for trades sent as columns (field -> one value per trade, see TRADE_COLUMNS).
+        
+        Shares the caches with predict(): the same trades in either layout are one entry.
+        """
+        return self.predict_prepared([self.prepare_columns(columns, token_data)])[0]
+    
+    @staticmethod
+    def prepare(trades: List[Dict], token_data: Dict) -> Tuple:
+        """(cache key, trade count, token_data, TradeArrays builder, stage-1 feature builder) for predict_prepared"""
+        return (trades_fingerprint(trades, token_data), len(trades), token_data,
+                partial(TradeArrays.from_records, trades), partial(cascade.stage_features_from_records, trades))
+    
+    @staticmethod
+    def prepare_columns(columns: Dict[str, Sequence], token_data: Dict) -> Tuple:
+        return (columns_fingerprint(columns, token_data), len(columns['timestamp']), token_data,
+                partial(TradeArrays.from_columns, columns), partial(cascade.stage_features_from_columns, columns))
+    
+    def predict_prepared(self, requests: List[Tuple]) -> List[Tuple[bool, float, Dict]]:
+        """Score prepared requests: cached predictions are reused, the rest share one model call.
+        
+        Latency is accounted per request: its own feature extraction plus an even share of the
+        batch-wide work (stage 1, the model call, bookkeeping), so a slow mint is named on its own.
+        """
+        if not requests:
+            return []
+        try:
+            started = time.perf_counter()
+            bundle = self.registry.current
+            version = bundle.version if bundle else None
+            results = [None] * len(requests)
+            costs = np.zeros(len(requests))
+            missing = []
+            for i, (key, n_trades, *_) in enumerate(requests):
+                PAYLOAD_TRADES.observe(n_trades)
+                results[i] = self.prediction_cache.get((key, version))
+                if results[i] is None:
+                    missing.append(i)
             
-            probability = float(self.model.predict(X_scaled)[0])
-            prediction = probability > 0.7
+            rejected = {}
+            if missing and self.prefilter:
+                stage_started = time.perf_counter()
+                rejected = self._prefilter(requests, missing, bundle)
+                costs[missing] += (time.perf_counter() - stage_started) / len(missing)
+            # Rejected requests only reach the full scorer when picked for an audit
+            scored = [i for i in missing if i not in rejected or self.prefilter.should_audit()]
+            if scored:
+                features_list = []
+                for i in scored:
+                    extract_started = time.perf_counter()
+                    key, _, token_data, build, _ = requests[i]
+                    features_list.append(self._cached_features(key, token_data, build, bundle))
+                    costs[i] += time.perf_counter() - extract_started
+                mints = [requests[i][2].get('mint') for i in scored]
+                score_started = time.perf_counter()
+                predictions = self._predict_many(bundle, features_list, mints)
+                costs[scored] += (time.perf_counter() - score_started) / len(scored)
+                for i, result in zip(scored, predictions):
+                    if i in rejected:
+                        self.prefilter.record_audit(result[0])
+                        continue
+                    results[i] = result
+                    self.prediction_cache.put((requests[i][0], version), result)
+            for i, result in rejected.items():
+                results[i] = result
+                self.prediction_cache.put((requests[i][0], version), result)
             
-            print(f"\nPrediction Results:")
-            print(f"Probability: {probability:.3f}")
-            print(f"Prediction: {prediction}")
+            # Whatever wasn't attributed above (cache lookups, bookkeeping) is shared evenly
+            costs += max(0.0, time.perf_counter() - started - costs.sum()) / len(requests)
+            for (_, n_trades, token_data, *_), elapsed in zip(requests, costs.tolist()):
+                _TOTAL_TIMER.observe(elapsed)
+                if elapsed * 1000 > settings.slow_prediction_ms:
+                    logger.warning("Slow prediction for %s: %.1f ms (%d trades, batch of %d)",
+                                   token_data.get('mint'), elapsed * 1000, n_trades, len(requests))
+            return results
             
-            analysis = {
-                'probability': probability,
-                'early_signs': {
-                    'buy_pressure': features['buy_pressure_1min'],
-                    'growth_rate': features['mcap_growth_1min'],
-                    'trader_interest': features['unique_traders_1min']
-                },
-                'feature_values': features
-            }
+        except Exception as e:
+            logger.error("Prediction error: %s (%d trades, token %s)", e, sum(request[1] for request in requests),
+                         self._describe(requests))
+            raise
+    
+    def _prefilter(self, requests: List[Tuple], indices: List[int],
+                   bundle: Optional[ModelBundle]) -> Dict[int, Tuple[bool, float, Dict]]:
+        """Stage-1 answers for the requests at indices that fail the prefilter, by index"""
+        features = np.array([requests[i][4]() for i in indices])
+        rejected = self.prefilter.reject(features)
+        return {i: self._rejection(bundle, requests[i][2], row)
+                for i, row, reject in zip(indices, features, rejected) if reject}
+    
+    def _rejection(self, bundle: Optional[ModelBundle], token_data: Dict, stage: np.ndarray) -> Tuple[bool, float, Dict]:
+        """Not-promising answer for a request stage 1 turned away, shaped like a fully scored one.
+        
+        feature_values has the full scorer's keys; window metrics stage 1 doesn't compute are 0.
+        analysis['stage'] is 'prefilter' so clients can tell the two apart.
+        """
+        features = base_features(token_data)
+        for name in (bundle.feature_names if bundle is not None else None) or ():
+            features.setdefault(name, 0)
+        features.update(zip(cascade.STAGE_FEATURES, (float(value) for value in stage)))
+        features['trades_1min'] = int(features['trades_1min'])
+        if bundle is None:
+            _, _, analysis = self._heuristic_prediction(features)
+        else:
+            _, _, analysis = self._model_prediction(features, 0.0)
+        return False, 0.0, {**analysis, 'stage': 'prefilter'}
+    
+    @staticmethod
+    def _describe(requests: List[Tuple]) -> str:
+        if len(requests) == 1:
+            return str(requests[0][2].get('mint'))
+        return f"batch of {len(requests)} ({', '.join(str(request[2].get('mint')) for request in requests[:3])}, ...)"
+    
+    def predict_features(self, features: Dict) -> Tuple[bool, float, Dict]:
+        """Score an already extracted feature dict"""
+        return self._predict_with(self.registry.current, features)
+    
+    def predict_features_batch(self, features_list: List[Dict]) -> List[Tuple[bool, float, Dict]]:
+        """Score already extracted feature dicts with one model call"""
+        return self.predict_features_with(self.registry.current, features_list)
+    
+    def predict_features_with(self, bundle: Optional[ModelBundle], features_list: List[Dict]) -> List[Tuple[bool, float, Dict]]:
+        """predict_features_batch with a bundle the caller already took (None: no model), e.g. the
+        one whose trader index produced the wallet features"""
+        if not features_list:
+            return []
+        return self._predict_many(bundle, features_list)
+    
+    def _predict_with(self, bundle: Optional[ModelBundle], features: Dict) -> Tuple[bool, float, Dict]:
+        if bundle is None:
+            logger.debug("No model loaded, using temporary scoring logic")
+            return self._heuristic_prediction(features)
             
-            return prediction, probability, analysis
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Extracted features: %s", features)
             
-        except Exception as e:
-            print(f"Prediction error: {str(e)}")
-            print(f"Trades data shape: {pd.DataFrame(trades).shape}")
-            print(f"Token data: {token_data}")
-            raise
\ No newline at end of file
+        probability = float(self._score(bundle, [features])[0])
+        prediction, probability, analysis = self._model_prediction(features, probability)
+        
+        logger.debug("Prediction: probability=%.3f promising=%s", probability, prediction)
+        
+        return prediction, probability, analysis
+    
+    def predict_batch(self, requests: List[Tuple[List[Dict], Dict]]) -> List[Tuple[bool, float, Dict]]:
+        """Score many (trades, token_data) pairs with a single scaler transform and model call"""
+        return self.predict_prepared([self.prepare(trades, token_data) for trades, token_data in requests])
+    
+    def _predict_many(self, bundle: Optional[ModelBundle], features_list: List[Dict],
+                      mints: Optional[Sequence[Optional[str]]] = None) -> List[Tuple[bool, float, Dict]]:
+        if bundle is None:
+            return [self._heuristic_prediction(features) for features in features_list]
+        
+        probabilities = self._score(bundle, features_list)
+        logger.debug("Batch scored: %d tokens", len(features_list))
+        self.shadow.submit(bundle.version, mints or [None] * len(features_list), features_list, probabilities)
+        
+        return [
+            self._model_prediction(features, float(probability))
+            for features, probability in zip(features_list, probabilities)
+        ]
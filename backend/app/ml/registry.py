@@ -0,0 +1,465 @@
+# app/ml/registry.py
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.core.concurrency import FileLock
+from app.core.log import get_logger
+from app.ml.trees import TreeEnsemble
+from app.ml.traders import TraderIndex
+
+logger = get_logger(__name__)
+
+MODEL_PREFIX = "quick_pattern_model_"
+# "native": LightGBM text model plus a JSON sidecar (scaler stats, feature order, history).
+# "joblib": the original pickled state dict, still readable for older versions.
+MODEL_SUFFIXES = {"native": ".json", "joblib": ".joblib"}
+NATIVE_MODEL_SUFFIX = ".txt"
+# Directory of memory-mappable tree arrays next to a native model (see app.ml.trees)
+TREES_SUFFIX = ".trees"
+# Directory of the wallet index a model's wallet features are looked up in (see app.ml.traders)
+TRADERS_SUFFIX = ".traders"
+# Index of the versions in model_dir, so finding the latest needs no directory scan, plus the
+# version pinned by a rollback (which every worker process serves instead of the latest)
+MANIFEST_FILENAME = "manifest.json"
+# Held while the manifest (or the model files it lists) is rewritten, by every worker process
+MANIFEST_LOCK_FILENAME = "manifest.lock"
+
+
+class ModelBundle:
+    """Immutable snapshot of everything needed to score: model, scaler, feature order and trader index.
+
+    Readers grab the registry's current bundle once per call, so a concurrent swap
+    can never mix the model of one version with the scaler of another.
+    """
+
+    __slots__ = ('version', 'model', 'scaler', 'feature_names', 'training_history', 'path', 'loaded_at',
+                 'scaler_mean', 'scaler_scale', 'traders')
+
+    def __init__(self, version: str, model, scaler, feature_names, training_history=(), path: Optional[str] = None,
+                 scaler_mean=None, scaler_scale=None, traders: Optional[TraderIndex] = None):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'model', model)
+        object.__setattr__(self, 'scaler', scaler)
+        object.__setattr__(self, 'feature_names', tuple(feature_names) if feature_names else None)
+        object.__setattr__(self, 'training_history', tuple(training_history))
+        object.__setattr__(self, 'path', path)
+        object.__setattr__(self, 'loaded_at', datetime.now().isoformat())
+        # None for models trained before wallet features existed
+        object.__setattr__(self, 'traders', traders)
+
+        # StandardScaler folded into plain arrays for the NumPy inference path; native
+        # bundles carry only these arrays and no scaler object
+        mean = scaler_mean if scaler_mean is not None else getattr(scaler, 'mean_', None)
+        scale = scaler_scale if scaler_scale is not None else getattr(scaler, 'scale_', None)
+        n_features = getattr(scaler, 'n_features_in_', len(feature_names or ()))
+        object.__setattr__(self, 'scaler_mean',
+                           np.asarray(mean, dtype=np.float64) if mean is not None else np.zeros(n_features))
+        object.__setattr__(self, 'scaler_scale',
+                           np.asarray(scale, dtype=np.float64) if scale is not None else np.ones(n_features))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelBundle is immutable")
+
+    def replace(self, **changes) -> "ModelBundle":
+        """Copy of this bundle with some fields changed"""
+        fields = {name: getattr(self, name) for name in
+                  ('version', 'model', 'scaler', 'feature_names', 'training_history', 'path',
+                   'scaler_mean', 'scaler_scale', 'traders')}
+        fields.update(changes)
+        return ModelBundle(**fields)
+
+    def info(self) -> dict:
+        return {
+            'version': self.version,
+            'path': self.path,
+            'loaded_at': self.loaded_at,
+            'n_features': len(self.feature_names) if self.feature_names else 0,
+            'trader_index_wallets': len(self.traders) if self.traders is not None else None,
+        }
+
+
+def model_filename(version: str, fmt: str = "native") -> str:
+    return f"{MODEL_PREFIX}{version}{MODEL_SUFFIXES[fmt]}"
+
+
+def version_from_path(path) -> str:
+    return Path(path).stem[len(MODEL_PREFIX):]
+
+
+def artifact_paths(path) -> List[Path]:
+    """Every file or directory belonging to the model version stored at path"""
+    path = Path(path)
+    if path.suffix == MODEL_SUFFIXES["joblib"]:
+        return [path]
+    return [path, path.with_suffix(NATIVE_MODEL_SUFFIX), path.with_suffix(TREES_SUFFIX), path.with_suffix(TRADERS_SUFFIX)]
+
+
+def _json_default(value):
+    # numpy scalars in training history records
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def write_native(bundle: ModelBundle, path: str) -> str:
+    """Write bundle as <path minus .json>.txt (LightGBM), .trees (shared arrays), .traders (wallet index,
+    if any) and the JSON sidecar at path.
+
+    The sidecar goes last, so a version only becomes visible once its model files are complete.
+    """
+    model_path = str(Path(path).with_suffix(NATIVE_MODEL_SUFFIX))
+    bundle.model.save_model(model_path + '.tmp')
+    os.replace(model_path + '.tmp', model_path)
+    with open(model_path) as f:
+        TreeEnsemble.from_model_string(f.read()).save(str(Path(path).with_suffix(TREES_SUFFIX)))
+    if bundle.traders is not None:
+        bundle.traders.save(str(Path(path).with_suffix(TRADERS_SUFFIX)))
+    
+    sidecar = {
+        'version': bundle.version,
+        'model_file': Path(model_path).name,
+        'feature_names': list(bundle.feature_names or ()),
+        'scaler_mean': bundle.scaler_mean.tolist(),
+        'scaler_scale': bundle.scaler_scale.tolist(),
+        'timestamp': bundle.version,
+    }
+    with open(path + '.tmp', 'w') as f:
+        json.dump(sidecar, f, default=_json_default)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def shared_trees(path: str) -> TreeEnsemble:
+    """Memory-mapped tree arrays for the native model at path, exported from its text model if missing"""
+    trees_path = str(Path(path).with_suffix(TREES_SUFFIX))
+    if not os.path.isdir(trees_path):
+        with open(Path(path).with_suffix(NATIVE_MODEL_SUFFIX)) as f:
+            TreeEnsemble.from_model_string(f.read()).save(trees_path)
+    return TreeEnsemble.load(trees_path, mmap=True)
+
+
+def read_native(path: str, shared: bool = False) -> ModelBundle:
+    with open(path) as f:
+        sidecar = json.load(f)
+    if shared:
+        model = shared_trees(path)
+    else:
+        import lightgbm as lgb
+        model = lgb.Booster(model_file=str(Path(path).parent / sidecar['model_file']))
+    # Always memory-mapped: a request only touches the few pages its wallets hash to
+    traders_path = Path(path).with_suffix(TRADERS_SUFFIX)
+    traders = TraderIndex.load(str(traders_path), mmap=True) if traders_path.is_dir() else None
+    return ModelBundle(
+        version=version_from_path(path),
+        model=model,
+        scaler=None,
+        feature_names=sidecar['feature_names'],
+        training_history=sidecar.get('training_history', ()),
+        path=str(path),
+        scaler_mean=sidecar['scaler_mean'],
+        scaler_scale=sidecar['scaler_scale'],
+        traders=traders
+    )
+
+
+def read_joblib(path: str) -> ModelBundle:
+    import joblib
+    state = joblib.load(path)
+    return ModelBundle(
+        version=version_from_path(path),
+        model=state['model'],
+        scaler=state['scaler'],
+        feature_names=state['feature_names'],
+        training_history=state.get('training_history', ()),
+        path=str(path),
+        traders=state.get('traders')
+    )
+
+
+class ModelRegistry:
+    """Versioned model files in model_dir plus the bundle currently being served.
+
+    Nothing is read from disk until the first access to current (or an explicit reload),
+    so constructing a registry is cheap and the first load can happen off the startup path.
+
+    With shared=True native versions are served from memory-mapped tree arrays, so any
+    number of worker processes score from one page-cache copy of the model.
+
+    A pin is kept in the manifest rather than in the process, so the watcher of every worker
+    sharing model_dir swaps to the pinned version; registering a newly trained version lifts it.
+    """
+
+    def __init__(self, model_dir: str, shared: bool = False):
+        self.model_dir = model_dir
+        self.shared = shared
+        self._current: Optional[ModelBundle] = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        # Parsed manifest, keyed by its (mtime, size) so unchanged files aren't re-read
+        self._manifest: Tuple[Optional[Tuple], Dict] = (None, {'versions': {}})
+        self._manifest_lock = FileLock(os.path.join(model_dir, MANIFEST_LOCK_FILENAME))
+
+    @property
+    def current(self) -> Optional[ModelBundle]:
+        if not self._initialized:
+            self.ensure_loaded()
+        return self._current
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the deferred initial load has happened"""
+        return self._initialized
+    
+    def peek(self) -> Optional[ModelBundle]:
+        """The served bundle, without triggering the deferred initial load"""
+        return self._current
+    
+    def ensure_loaded(self) -> Optional[ModelBundle]:
+        """Load the newest version on first use; concurrent callers wait for the same load"""
+        with self._init_lock:
+            if not self._initialized:
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error("Error loading latest model: %s", e)
+                self._initialized = True
+        return self._current
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.model_dir, MANIFEST_FILENAME)
+    
+    def _scan(self) -> Dict[str, Dict]:
+        """Manifest entries rebuilt from the model files themselves"""
+        entries = {}
+        # joblib first so a native file for the same version wins
+        for fmt in ("joblib", "native"):
+            for path in Path(self.model_dir).glob(f"{MODEL_PREFIX}*{MODEL_SUFFIXES[fmt]}"):
+                entries[version_from_path(path)] = {
+                    'file': path.name,
+                    'created_at': datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+                }
+        return entries
+    
+    def _write_manifest(self, entries: Dict[str, Dict], pinned: Optional[str]) -> Dict:
+        manifest = {'latest': max(entries) if entries else None, 'pinned': pinned,
+                    'versions': dict(sorted(entries.items()))}
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+        return manifest
+    
+    def _read_manifest(self) -> Dict:
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            self.rebuild_manifest()
+            return self._manifest[1]
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached_key, manifest = self._manifest
+        if key == cached_key:
+            return manifest
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if 'versions' not in manifest:
+                raise KeyError('versions')
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Unreadable model manifest (%s), rescanning %s", e, self.model_dir)
+            self.rebuild_manifest()
+            return self._manifest[1]
+        self._manifest = (key, manifest)
+        return manifest
+    
+    def _entries(self) -> Dict[str, Dict]:
+        return self._read_manifest()['versions']
+    
+    @property
+    def pinned(self) -> Optional[str]:
+        """Version served in place of the newest (set by load(version, pin=True)), if any"""
+        return self._read_manifest().get('pinned')
+    
+    def rebuild_manifest(self) -> Dict[str, Dict]:
+        """Re-index model_dir from its files, e.g. after copying models in by hand"""
+        with self._manifest_lock:
+            try:
+                with open(self.manifest_path) as f:
+                    pinned = json.load(f).get('pinned')
+            except (OSError, ValueError, AttributeError):
+                pinned = None
+            entries = self._scan()
+            manifest = {'versions': entries, 'pinned': pinned if pinned in entries else None}
+            if os.path.isdir(self.model_dir):
+                manifest = self._write_manifest(entries, manifest['pinned'])
+            self._manifest = (None, manifest)
+        return entries
+    
+    def register(self, version: str, path: str) -> None:
+        """Record a newly saved version in the manifest; it lifts any pin, so every worker serves it"""
+        with self._manifest_lock:
+            entries = dict(self._entries())
+            entries[version] = {'file': Path(path).name, 'created_at': datetime.now().isoformat()}
+            self._write_manifest(entries, None)
+    
+    def pin(self, version: Optional[str]) -> None:
+        """Make every worker serve version instead of the newest (None: back to the newest)"""
+        with self._manifest_lock:
+            entries = dict(self._entries())
+            if version is not None and version not in entries:
+                raise KeyError(f"Model version not found: {version}")
+            self._write_manifest(entries, version)
+
+    def versions(self) -> List[str]:
+        """Available versions, oldest first (versions are sortable timestamps)"""
+        return sorted(self._entries())
+
+    def new_version(self) -> str:
+        """Timestamp version for a freshly trained model, unique within model_dir"""
+        version = datetime.now().strftime("%Y%m%d_%H%M%S")
+        existing = set(self.versions())
+        candidate, n = version, 0
+        while candidate in existing:
+            n += 1
+            candidate = f"{version}_{n}"
+        return candidate
+
+    def path_for(self, version: str) -> str:
+        """File for version, preferring the native format when both exist"""
+        entry = self._entries().get(version)
+        if entry is not None:
+            return os.path.join(self.model_dir, entry['file'])
+        for fmt in MODEL_SUFFIXES:
+            path = os.path.join(self.model_dir, model_filename(version, fmt))
+            if os.path.exists(path):
+                return path
+        return os.path.join(self.model_dir, model_filename(version))
+
+    def read(self, path: str) -> ModelBundle:
+        if Path(path).suffix == MODEL_SUFFIXES["joblib"]:
+            if self.shared:
+                logger.info("%s is a joblib model; serving it from a private (not shared) copy", path)
+            return read_joblib(path)
+        return read_native(path, shared=self.shared)
+
+    def publish(self, bundle: ModelBundle) -> Optional[ModelBundle]:
+        """Atomically make bundle the served model; returns the previous one"""
+        with self._swap_lock:
+            previous, self._current = self._current, bundle
+            self._initialized = True
+        logger.info("Serving model version %s", bundle.version)
+        return previous
+
+    def load(self, version: str, pin: bool = False) -> ModelBundle:
+        """Serve version; pin=True also keeps every worker on it until unpinned or a new version is trained"""
+        bundle = self.read(self.path_for(version))
+        if pin:
+            self.pin(version)
+        self.publish(bundle)
+        return bundle
+
+    def target(self) -> Optional[str]:
+        """Version that should be served: the pinned one, else the newest on disk"""
+        manifest = self._read_manifest()
+        pinned = manifest.get('pinned')
+        if pinned in manifest['versions']:
+            return pinned
+        return max(manifest['versions']) if manifest['versions'] else None
+
+    def reload(self, unpin: bool = False) -> Tuple[Optional[ModelBundle], bool]:
+        """Swap in the version that should be served (see target()) if it differs from the served one"""
+        if unpin and self.pinned is not None:
+            self.pin(None)
+        target = self.target()
+        if target is None:
+            return self._current, False
+        if self._current is not None and self._current.version == target:
+            return self._current, False
+        return self.load(target), True
+
+    def prune(self, keep: int = 0, max_age_days: float = 0, protect: Sequence[str] = ()) -> List[str]:
+        """Delete versions beyond the newest keep and/or older than max_age_days (0 disables either).
+
+        The newest, the currently served and any protect versions are always kept. Returns the
+        removed versions.
+        """
+        if keep <= 0 and max_age_days <= 0:
+            return []
+        with self._manifest_lock:
+            entries = dict(self._entries())
+            newest_first = sorted(entries, reverse=True)
+            pinned = self._read_manifest().get('pinned')
+            protected = set(newest_first[:1]) | set(protect) | {pinned}
+            if self._current is not None:
+                protected.add(self._current.version)
+            cutoff = datetime.now() - timedelta(days=max_age_days)
+            
+            removed = []
+            for rank, version in enumerate(newest_first):
+                too_many = keep > 0 and rank >= keep
+                too_old = max_age_days > 0 and datetime.fromisoformat(entries[version]['created_at']) < cutoff
+                if version in protected or not (too_many or too_old):
+                    continue
+                for path in artifact_paths(os.path.join(self.model_dir, entries.pop(version)['file'])):
+                    if path.is_dir():
+                        shutil.rmtree(path, ignore_errors=True)
+                    elif path.exists():
+                        path.unlink()
+                removed.append(version)
+            
+            if removed:
+                self._write_manifest(entries, pinned)
+                logger.info("Removed %d old model version(s): %s", len(removed), ', '.join(removed))
+        return removed
+
+    def start_watching(self, interval: float) -> None:
+        """Poll model_dir every interval seconds and hot-swap new versions"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _sync_manifest(self) -> None:
+        """Re-index model_dir when its model files and the manifest disagree (models copied in by hand)"""
+        on_disk = {version_from_path(path) for suffix in MODEL_SUFFIXES.values()
+                   for path in Path(self.model_dir).glob(f"{MODEL_PREFIX}*{suffix}")}
+        if on_disk != set(self._entries()):
+            logger.info("Model files in %s changed outside the manifest, re-indexing", self.model_dir)
+            self.rebuild_manifest()
+
+    def _watch(self, interval: float) -> None:
+        failed = None
+        listing = None
+        while not self._stop_watching.wait(interval):
+            # Files copied or rsynced into model_dir never go through register(); the directory's
+            # mtime moves whenever an entry is added, removed or renamed, so only then rescan
+            try:
+                mtime = os.stat(self.model_dir).st_mtime_ns
+                if mtime != listing:
+                    self._sync_manifest()
+                    listing = os.stat(self.model_dir).st_mtime_ns
+            except OSError as e:
+                logger.warning("Model directory check failed: %s", e)
+                continue
+            target = self.target()
+            if target is None or (target, listing) == failed:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                # Don't retry a broken version every tick; wait for another target or for model_dir's listing to change
+                failed = (target, listing)
+                logger.error("Model reload of %s failed: %s", target, e)
@@ -0,0 +1,257 @@
+# app/ml/replay.py
+"""Vectorized historical replay: score every mint after every one of its recorded trades.
+
+A decision point follows each trade; its features are what compute_quick_features returns
+for the mint's trades up to and including that one (in timestamp order). Rather than
+re-extracting every prefix, which is quadratic per mint, all trades are sorted into one
+contiguous segment per mint, and every window metric is read off running sums at
+min(decision point, window cutoff); wallet features likewise come from running sums of
+each trader's index entry, counted at their first trade in the mint. Features are built and scored in row chunks, so
+memory stays at a few arrays per trade plus one chunk of features.
+"""
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+import numpy as np
+from app.ml.features import WINDOWS, base_features
+from app.ml.feature_store import compute_labels
+from app.ml.traders import contributions, features_from_sums, wallet_hashes
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from app.ml.registry import ModelBundle
+    from app.ml.traders import TraderIndex
+
+logger = get_logger(__name__)
+
+DEFAULT_THRESHOLDS = (0.3, 0.5, 0.7, 0.9)
+# Millisecond offsets since a mint's first trade must fit below the mint code in a sort key
+_OFFSET_BITS = 40
+_TOKEN_FEATURES = (('initial_buy_sol', 'initialBuySol'), ('initial_buy_percent', 'initialBuyPercent'),
+                   ('initial_liquidity', 'liquidity'))
+
+
+def _exclusive_cumsum(values: np.ndarray) -> np.ndarray:
+    """sums[i] is the total of values[:i]"""
+    sums = np.zeros(len(values) + 1)
+    np.cumsum(values, out=sums[1:])
+    return sums
+
+
+class DecisionPoints:
+    """Every (mint, trade) decision point of a trade history, sorted by mint then timestamp"""
+
+    def __init__(self, trades_df: "pd.DataFrame", tokens_df: "pd.DataFrame"):
+        import pandas as pd
+        # First token row per mint, as in training
+        tokens = tokens_df.drop_duplicates('mint').set_index('mint')
+        trades = trades_df[trades_df['mint'].isin(tokens.index)]
+
+        codes, mints = pd.factorize(trades['mint'].to_numpy())
+        timestamps = pd.to_numeric(trades['timestamp']).to_numpy().astype(np.int64)
+        order = np.lexsort((timestamps, codes))
+        self.mints = np.asarray(mints, dtype=object)
+        self.codes = codes[order]
+        timestamps = timestamps[order]
+        n = len(order)
+
+        # Codes are 0..len(mints)-1, so after sorting segment g holds mint g
+        self.starts = np.searchsorted(self.codes, np.arange(len(self.mints)), side='left')
+        self.ends = np.append(self.starts[1:], n)
+        self.row_start = self.starts[self.codes]
+        offsets = timestamps - timestamps[self.row_start]
+        if n and offsets.max() >= 1 << _OFFSET_BITS:
+            raise ValueError("Trade history spans too long a time for a single mint")
+        self._key = (self.codes.astype(np.int64) << _OFFSET_BITS) | offsets
+        self.seconds = offsets / 1000
+
+        self.market_cap = trades['marketCapSol'].to_numpy(dtype=np.float64)[order]
+        self.holders = trades['holdersCount'].to_numpy(dtype=np.float64)[order]
+        v_sol = trades['vSolInBondingCurve'].to_numpy(dtype=np.float64)[order]
+        is_buy = trades['txType'].to_numpy()[order] == 'buy'
+
+        # Volume against the mint's last strictly earlier trade; the first trade counts its whole balance
+        prev = np.searchsorted(self._key, self._key, side='left') - 1
+        volumes = np.where(prev >= self.row_start, np.abs(v_sol - v_sol[np.maximum(prev, 0)]), 0.0)
+        volumes[self.starts] = v_sol[self.starts]
+        self._buys = _exclusive_cumsum(is_buy)
+        self._volume = _exclusive_cumsum(volumes)
+        self._buy_volume = _exclusive_cumsum(np.where(is_buy, volumes, 0.0))
+        # A trader counts from their first trade in the mint
+        traders, self._wallets = pd.factorize(trades['traderPublicKey'].to_numpy()[order])
+        first_seen = ~pd.Series(self.codes.astype(np.int64) * (traders.max(initial=0) + 1) + traders).duplicated()
+        self._traders = traders
+        self._first_seen = first_seen.to_numpy()
+        self._unique = _exclusive_cumsum(self._first_seen)
+        self._wallet_sums = None
+
+        # Exclusive end row of each window, per mint
+        self._cutoffs = [
+            np.searchsorted(self._key, (np.arange(len(self.mints), dtype=np.int64) << _OFFSET_BITS) + seconds * 1000,
+                            side='right')
+            for seconds, _ in WINDOWS
+        ]
+        self.token_values = {
+            name: tokens[column].reindex(self.mints).to_numpy(dtype=np.float64) for name, column in _TOKEN_FEATURES
+        }
+        self.token_mcap = tokens['marketCap'].reindex(self.mints).to_numpy(dtype=np.float64)
+        self.feature_names = list(base_features({'initialBuySol': 0, 'initialBuyPercent': 0, 'liquidity': 0}))
+
+    def use_traders(self, index: "TraderIndex") -> None:
+        """Add the wallet features of index to features(), from running sums over first trades"""
+        terms = contributions(index.lookup(wallet_hashes(self._wallets))).astype(np.int64)[self._traders]
+        terms[~self._first_seen] = 0
+        self._wallet_sums = np.zeros((len(terms) + 1, terms.shape[1]), dtype=np.int64)
+        np.cumsum(terms, axis=0, out=self._wallet_sums[1:])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def features(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """Feature columns for decision points start..stop-1"""
+        rows = np.arange(start, stop)
+        codes = self.codes[rows]
+        first = self.row_start[rows]
+        start_mcap = self.market_cap[first]
+        initial_holders = self.holders[first]
+        columns = {name: values[codes] for name, values in self.token_values.items()}
+        for (_, suffix), cutoffs in zip(WINDOWS, self._cutoffs):
+            last = np.minimum(rows, cutoffs[codes] - 1)
+            count = last - first + 1
+            volume = self._volume[last + 1] - self._volume[first]
+            buy_volume = self._buy_volume[last + 1] - self._buy_volume[first]
+            holders = self.holders[last]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns[f'trades_{suffix}'] = count
+                columns[f'buy_ratio_{suffix}'] = (self._buys[last + 1] - self._buys[first]) / count
+                columns[f'mcap_growth_{suffix}'] = np.where(
+                    (count > 1) & (start_mcap > 0), (self.market_cap[last] - start_mcap) / start_mcap * 100, 0.0)
+                columns[f'unique_traders_{suffix}'] = self._unique[last + 1] - self._unique[first]
+                columns[f'buy_pressure_{suffix}'] = np.where(volume > 0, buy_volume / volume, 0.0)
+                columns[f'holders_{suffix}'] = holders
+                columns[f'holders_growth_{suffix}'] = np.where(
+                    initial_holders > 0, (holders - initial_holders) / initial_holders * 100, 0.0)
+        if self._wallet_sums is not None:
+            # last is the end of the widest window, which is the one wallets are taken from
+            sums = self._wallet_sums[last + 1] - self._wallet_sums[first]
+            columns.update(features_from_sums(self._unique[last + 1] - self._unique[first], sums))
+        return columns
+
+    def matrix(self, start: int, stop: int, feature_names: Sequence[str]) -> np.ndarray:
+        """features() as a float matrix in feature_names order; unknown names are zero"""
+        columns = self.features(start, stop)
+        X = np.zeros((stop - start, len(feature_names)))
+        for i, name in enumerate(feature_names):
+            if name in columns:
+                X[:, i] = columns[name]
+        return X
+
+    def label_inputs(self) -> Dict[str, np.ndarray]:
+        """Per-mint inputs of compute_labels, over each mint's whole recorded history"""
+        last = self.ends - 1
+        return {
+            'initial_mcap': self.market_cap[self.starts],
+            'max_mcap': np.maximum.reduceat(self.market_cap, self.starts),
+            'final_mcap': self.market_cap[last],
+            'holders_peak': np.maximum.reduceat(self.holders, self.starts),
+            'holders_final': self.holders[last],
+            'token_mcap': self.token_mcap,
+        }
+
+    def later_peak_mcap(self) -> np.ndarray:
+        """Highest market cap of the mint at or after each decision point"""
+        import pandas as pd
+        reversed_peak = pd.Series(self.market_cap[::-1]).groupby(self.codes[::-1]).cummax()
+        return reversed_peak.to_numpy()[::-1]
+
+
+def score(bundle: "ModelBundle", points: DecisionPoints, chunk_size: int = 50_000,
+          progress: Optional[Callable[[float], None]] = None) -> np.ndarray:
+    """Model probability at every decision point, scored chunk_size rows per model call"""
+    names = bundle.feature_names or points.feature_names
+    if bundle.traders is not None:
+        points.use_traders(bundle.traders)
+    scores = np.empty(len(points))
+    for start in range(0, len(points), chunk_size):
+        stop = min(start + chunk_size, len(points))
+        X = points.matrix(start, stop, names)
+        X -= bundle.scaler_mean
+        X /= bundle.scaler_scale
+        scores[start:stop] = bundle.model.predict(X)
+        if progress:
+            progress(stop / len(points))
+    return scores
+
+
+def evaluate(points: DecisionPoints, scores: np.ndarray, thresholds: Sequence[float],
+             success_mcap: float) -> Dict:
+    """Per-threshold precision/recall of flagging a mint at its first decision point scoring >= threshold.
+
+    hit_rate is the share of flagged mints whose market cap at least doubled after the flag.
+    """
+    labels = compute_labels(points.label_inputs(), success_mcap)['is_success']
+    positives = int(labels.sum())
+    n_mints = len(points.mints)
+    mint_auc = None
+    if 0 < positives < n_mints:
+        from sklearn.metrics import roc_auc_score
+        mint_auc = float(roc_auc_score(labels, np.maximum.reduceat(scores, points.starts)))
+
+    later_peak = points.later_peak_mcap()
+    rows = np.arange(len(points))
+    results = []
+    for threshold in thresholds:
+        first = np.minimum.reduceat(np.where(scores >= threshold, rows, len(points)), points.starts)
+        flagged = first < len(points)
+        flag_rows = first[flagged]
+        true_positives = int((flagged & labels).sum())
+        n_flagged = int(flagged.sum())
+        precision = true_positives / n_flagged if n_flagged else None
+        recall = true_positives / positives if positives else None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            doubled = later_peak[flag_rows] >= 2 * points.market_cap[flag_rows]
+        results.append({
+            'threshold': float(threshold),
+            'flagged': n_flagged,
+            'flag_rate': n_flagged / n_mints if n_mints else None,
+            'true_positives': true_positives,
+            'precision': precision,
+            'recall': recall,
+            'f1': 2 * precision * recall / (precision + recall) if precision and recall else 0.0,
+            'hit_rate': float(doubled.mean()) if n_flagged else None,
+            'median_seconds_to_flag': float(np.median(points.seconds[flag_rows])) if n_flagged else None,
+            'median_trades_to_flag': float(np.median(flag_rows - points.starts[flagged] + 1)) if n_flagged else None,
+        })
+    return {'mints': n_mints, 'positives': positives, 'mint_auc': mint_auc, 'thresholds': results}
+
+
+def backtest(bundle: "ModelBundle", trades_df: "pd.DataFrame", tokens_df: "pd.DataFrame",
+             thresholds: Sequence[float] = DEFAULT_THRESHOLDS, success_mcap: float = 400,
+             chunk_size: int = 50_000, progress: Optional[Callable[[str, float], None]] = None) -> Dict:
+    """Replay a trade history through bundle and report how its alerts would have performed"""
+    report = progress or (lambda stage, fraction: None)
+    started = time.perf_counter()
+    report('preparing', 0.0)
+    points = DecisionPoints(trades_df, tokens_df)
+    if len(points) == 0:
+        raise ValueError("No trades of the given tokens to replay")
+    prepared = time.perf_counter()
+
+    scores = score(bundle, points, chunk_size, progress=lambda fraction: report('scoring', 0.1 + 0.85 * fraction))
+    scored = time.perf_counter()
+    report('evaluating', 0.95)
+    result = evaluate(points, scores, sorted(thresholds), success_mcap)
+    elapsed = time.perf_counter() - started
+    logger.info("Backtest of model %s: %d decision points over %d mints in %.1fs (%.0f points/s)",
+                bundle.version, len(points), len(points.mints), elapsed, len(points) / elapsed)
+    return {
+        'model_version': bundle.version,
+        'success_mcap': success_mcap,
+        'decision_points': len(points),
+        **result,
+        'timings': {
+            'prepare_seconds': prepared - started,
+            'score_seconds': scored - prepared,
+            'total_seconds': elapsed,
+        },
+    }
@@ -0,0 +1,233 @@
+# app/ml/shadow.py
+"""Shadow evaluation: candidate models score the served model's traffic off the request path.
+
+After the primary model answers, its feature vectors and probabilities go onto a bounded
+queue (a non-blocking put; when the queue is full the batch is dropped and counted, so
+a slow shadow can never hold up a response). One background thread drains the queue,
+scores everything waiting with each candidate, appends one JSON line per request to the
+shadow log and keeps running agreement statistics per candidate. After picking up work it
+waits flush_interval for more, so candidates score (and the log is written) in batches of
+many requests rather than once per request.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from app.core.log import get_logger
+
+if TYPE_CHECKING:
+    from app.ml.registry import ModelBundle
+
+logger = get_logger(__name__)
+
+SHADOW_LOG_FILENAME = "shadow_log.jsonl"
+# Queued batches scored together by one pass of the shadow thread
+_MAX_DRAIN = 1024
+# Rows scored and logged between yields to the request threads
+_CHUNK = 64
+
+
+class ShadowStats:
+    """Running comparison of one candidate against the primary"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.scored = 0
+        self.failed = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.primary_sum = 0.0
+        self.shadow_sum = 0.0
+        self.primary_promising = 0
+        self.shadow_promising = 0
+        self.disagreements = 0
+        # Rows scored without some of the candidate's features (filled with 0), and which ones
+        self.rows_missing_features = 0
+        self.missing_features = set()
+
+    def update(self, primary: np.ndarray, shadow: np.ndarray) -> None:
+        diff = np.abs(shadow - primary)
+        primary_flags = primary > self.threshold
+        shadow_flags = shadow > self.threshold
+        self.scored += len(primary)
+        self.abs_diff_sum += float(diff.sum())
+        self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+        self.primary_sum += float(primary.sum())
+        self.shadow_sum += float(shadow.sum())
+        self.primary_promising += int(primary_flags.sum())
+        self.shadow_promising += int(shadow_flags.sum())
+        self.disagreements += int((primary_flags != shadow_flags).sum())
+
+    def to_dict(self) -> Dict:
+        n = self.scored
+        return {
+            'scored': n,
+            'failed_batches': self.failed,
+            'mean_abs_diff': self.abs_diff_sum / n if n else None,
+            'max_abs_diff': self.max_abs_diff if n else None,
+            'mean_primary': self.primary_sum / n if n else None,
+            'mean_shadow': self.shadow_sum / n if n else None,
+            'primary_promising': self.primary_promising,
+            'shadow_promising': self.shadow_promising,
+            'disagreements': self.disagreements,
+            'disagreement_rate': self.disagreements / n if n else None,
+            'rows_missing_features': self.rows_missing_features,
+            'missing_features': sorted(self.missing_features),
+        }
+
+
+class ShadowEvaluator:
+    """Candidate bundles scoring submitted feature vectors on a background thread.
+
+    score(bundle, features_list) -> probabilities is the primary's own scoring function,
+    so candidates see exactly the same inputs.
+    """
+
+    def __init__(self, score: Callable[["ModelBundle", List[Dict]], np.ndarray], log_path: str,
+                 max_queue: int = 1000, threshold: float = 0.7, max_log_bytes: int = 0,
+                 flush_interval: float = 0.1):
+        self.score = score
+        self.log_path = log_path
+        self.threshold = threshold
+        self.max_log_bytes = max_log_bytes
+        self.flush_interval = flush_interval
+        self._closing = threading.Event()
+        self._bundles: Dict[str, "ModelBundle"] = {}
+        self._stats: Dict[str, ShadowStats] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    @property
+    def versions(self) -> List[str]:
+        return list(self._bundles)
+
+    def set_models(self, bundles: Sequence["ModelBundle"]) -> None:
+        """Replace the candidates; statistics restart for every version that wasn't one already"""
+        with self._lock:
+            self._bundles = {bundle.version: bundle for bundle in bundles}
+            self._stats = {version: self._stats.get(version) or ShadowStats(self.threshold)
+                           for version in self._bundles}
+            if self._bundles and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                self._thread.start()
+        logger.info("Shadow models: %s", ', '.join(self._bundles) or 'none')
+
+    def submit(self, primary_version: str, mints: Sequence[Optional[str]], features_list: List[Dict],
+               probabilities: np.ndarray) -> None:
+        """Queue a scored batch for the candidates; never blocks"""
+        if not self._bundles:
+            return
+        try:
+            self._queue.put_nowait((time.time(), primary_version, mints, features_list, probabilities))
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(features_list)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                return
+            # Let more requests queue up; close() cuts the wait short
+            self._closing.wait(self.flush_interval)
+            while len(batch) < _MAX_DRAIN:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            try:
+                self._process([item for item in batch if item is not None])
+            except Exception as e:
+                logger.error("Shadow scoring failed: %s", e)
+            if stop:
+                return
+
+    def _process(self, batch: List) -> None:
+        rows = [(timestamp, primary_version, mint)
+                for timestamp, primary_version, mints, _, _ in batch for mint in mints]
+        features_list = [features for item in batch for features in item[3]]
+        if not features_list:
+            return
+        primary = np.concatenate([np.asarray(item[4], dtype=np.float64) for item in batch])
+        with self._lock:
+            bundles = dict(self._bundles)
+        lines = []
+        for start in range(0, len(features_list), _CHUNK):
+            end = start + _CHUNK
+            scores = {}
+            for version, bundle in bundles.items():
+                self._check_features(version, bundle, features_list[start:end])
+                try:
+                    scores[version] = np.asarray(self.score(bundle, features_list[start:end]), dtype=np.float64)
+                except Exception as e:
+                    logger.warning("Shadow model %s failed on %d rows: %s", version, len(features_list[start:end]), e)
+                    with self._lock:
+                        if version in self._stats:
+                            self._stats[version].failed += 1
+                    continue
+                with self._lock:
+                    if version in self._stats:
+                        self._stats[version].update(primary[start:end], scores[version])
+            for j, (timestamp, primary_version, mint) in enumerate(rows[start:end]):
+                lines.append(json.dumps({
+                    'timestamp': timestamp,
+                    'mint': mint,
+                    'primary_version': primary_version,
+                    'primary': float(primary[start + j]),
+                    'shadow': {version: float(values[j]) for version, values in scores.items()},
+                }))
+            # Hand the GIL back between chunks instead of holding it until the interpreter takes it
+            time.sleep(0)
+        self._write(lines)
+
+    def _check_features(self, version: str, bundle: "ModelBundle", features_list: List[Dict]) -> None:
+        """Count rows lacking features the candidate was trained on; their scores are unreliable"""
+        needed = set(bundle.feature_names or ())
+        incomplete = [features for features in features_list if not needed <= features.keys()]
+        if not incomplete:
+            return
+        with self._lock:
+            stats = self._stats.get(version)
+            if stats is None:
+                return
+            missing = needed - incomplete[0].keys()
+            if not missing <= stats.missing_features:
+                logger.warning("Shadow model %s is scoring without features the served model doesn't "
+                               "produce: %s", version, ', '.join(sorted(missing)))
+            stats.rows_missing_features += len(incomplete)
+            stats.missing_features |= missing
+
+    def _write(self, lines: List[str]) -> None:
+        if self.max_log_bytes and os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.max_log_bytes:
+            # Keep a single rotated file
+            os.replace(self.log_path, self.log_path + '.1')
+        with open(self.log_path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'models': {version: stats.to_dict() for version, stats in self._stats.items()},
+                'threshold': self.threshold,
+                'queued': self._queue.qsize(),
+                'dropped': self.dropped,
+                'log_path': self.log_path,
+            }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Score what is queued, then stop the thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._closing.set()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
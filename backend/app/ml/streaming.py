@@ -0,0 +1,189 @@
+# app/ml/streaming.py
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional
+from app.ml.features import WINDOWS, base_features
+
+if TYPE_CHECKING:
+    from app.ml.traders import TraderIndex
+
+
+class MintState:
+    """Rolling per-window aggregates for one mint, updated one trade at a time.
+
+    Trades are expected in (roughly) timestamp order. Windows are anchored at the
+    first trade seen; late arrivals are counted in the windows they fall into but
+    never re-anchor them.
+    """
+
+    def __init__(self, mint: str, token_data: Optional[Dict] = None):
+        self.mint = mint
+        self.token_data = token_data
+        self.start_time = None
+        self.initial_holders = 0
+        self.first_mcap = 0
+        self.closed = False
+
+        # Reference curve balances for per-trade volume deltas
+        self.last_ts = None
+        self.last_v_sol = 0.0
+        self.prev_v_sol = None
+
+        # Wallets seen within the last window; kept once closed for the wallet features
+        self.traders = set()
+        n = len(WINDOWS)
+        self.cutoffs = [0] * n
+        self.trades = [0] * n
+        self.buys = [0] * n
+        self.volume = [0.0] * n
+        self.buy_volume = [0.0] * n
+        self.unique_traders = [0] * n
+        self.last_mcap = [0] * n
+        self.last_holders = [0] * n
+        self.last_window_ts = [None] * n
+
+    def _trade_volume(self, ts, v_sol: float) -> float:
+        if self.last_ts is None:
+            volume = v_sol
+        elif ts > self.last_ts:
+            volume = abs(v_sol - self.last_v_sol)
+        else:
+            # Same timestamp (or late): compare against the last strictly earlier trade
+            volume = abs(v_sol - self.prev_v_sol) if self.prev_v_sol is not None else 0.0
+
+        if self.last_ts is None or ts > self.last_ts:
+            self.prev_v_sol = self.last_v_sol if self.last_ts is not None else None
+            self.last_ts = ts
+            self.last_v_sol = v_sol
+        elif ts == self.last_ts:
+            self.last_v_sol = v_sol
+        return volume
+
+    def update(self, trade: Dict) -> None:
+        """Fold one trade into the rolling aggregates in O(1)"""
+        ts = int(trade['timestamp'])
+        if self.start_time is None:
+            self.start_time = ts
+            self.initial_holders = trade['holdersCount']
+            self.first_mcap = trade['marketCapSol']
+            self.cutoffs = [ts + seconds * 1000 for seconds, _ in WINDOWS]
+
+        if self.closed:
+            return
+        if ts > self.cutoffs[-1]:
+            # Every window is complete
+            self.closed = True
+            return
+
+        volume = self._trade_volume(ts, float(trade['vSolInBondingCurve']))
+        is_buy = trade['txType'] == 'buy'
+        is_new_trader = trade['traderPublicKey'] not in self.traders
+        if is_new_trader:
+            self.traders.add(trade['traderPublicKey'])
+
+        for i, cutoff in enumerate(self.cutoffs):
+            if ts > cutoff:
+                continue
+            self.trades[i] += 1
+            self.volume[i] += volume
+            if is_buy:
+                self.buys[i] += 1
+                self.buy_volume[i] += volume
+            if is_new_trader:
+                self.unique_traders[i] += 1
+            if self.last_window_ts[i] is None or ts >= self.last_window_ts[i]:
+                self.last_window_ts[i] = ts
+                self.last_mcap[i] = trade['marketCapSol']
+                self.last_holders[i] = trade['holdersCount']
+
+    def features(self, traders: Optional["TraderIndex"] = None) -> Dict:
+        """Same feature dict as compute_quick_features for the trades seen so far.
+
+        With a trader index the wallet features of the window's traders are added too.
+        """
+        if self.token_data is None:
+            raise ValueError(f"No token data registered for mint {self.mint}")
+        features = base_features(self.token_data)
+
+        for i, (_, suffix) in enumerate(WINDOWS):
+            n = self.trades[i]
+            if n == 0:
+                continue
+            features[f'trades_{suffix}'] = n
+            features[f'unique_traders_{suffix}'] = self.unique_traders[i]
+
+            features[f'holders_{suffix}'] = self.last_holders[i]
+            features[f'holders_growth_{suffix}'] = (
+                float((self.last_holders[i] - self.initial_holders) / self.initial_holders * 100)
+                if self.initial_holders > 0 else 0.0
+            )
+
+            features[f'buy_ratio_{suffix}'] = self.buys[i] / n
+            features[f'buy_pressure_{suffix}'] = (
+                self.buy_volume[i] / self.volume[i] if self.volume[i] > 0 else 0
+            )
+
+            if n > 1:
+                features[f'mcap_growth_{suffix}'] = (
+                    float((self.last_mcap[i] - self.first_mcap) / self.first_mcap * 100)
+                    if self.first_mcap > 0 else 0
+                )
+
+        if traders is not None:
+            features.update(traders.features(list(self.traders)))
+        return features
+
+
+class StreamingFeatureState:
+    """Per-mint MintState registry for live trade feeds, bounded by least-recently-updated eviction"""
+
+    def __init__(self, max_mints: int = 10000):
+        self.max_mints = max_mints
+        self._states: "OrderedDict[str, MintState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _get_or_create(self, mint: str) -> MintState:
+        state = self._states.get(mint)
+        if state is None:
+            state = MintState(mint)
+            self._states[mint] = state
+            while len(self._states) > self.max_mints:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(mint)
+        return state
+
+    def register_token(self, token_data: Dict) -> MintState:
+        with self._lock:
+            state = self._get_or_create(token_data['mint'])
+            state.token_data = token_data
+            return state
+
+    def add_trade(self, trade: Dict) -> MintState:
+        with self._lock:
+            state = self._get_or_create(trade['mint'])
+            state.update(trade)
+            return state
+
+    def get(self, mint: str) -> Optional[MintState]:
+        with self._lock:
+            return self._states.get(mint)
+
+    def features(self, mint: str, traders: Optional["TraderIndex"] = None) -> Dict:
+        with self._lock:
+            state = self._states.get(mint)
+            if state is None:
+                raise KeyError(mint)
+            features = state.features()
+            wallets = list(state.traders) if traders is not None else None
+        # The index lookup runs outside the lock so trades keep flowing in meanwhile
+        if traders is not None:
+            features.update(traders.features(wallets))
+        return features
+
+    def drop(self, mint: str) -> None:
+        with self._lock:
+            self._states.pop(mint, None)
@@ -0,0 +1,254 @@
+# app/ml/traders.py
+"""Cross-mint wallet reputation: how the traders in a mint's early window did elsewhere.
+
+For every (mint, wallet) pair in the training data the feature store keeps the wallet's
+hashed address and a few flags (entered early, dumped). At fit time these are folded
+into per-wallet aggregates, stored as an open-addressing hash table of flat arrays next
+to the model and memory-mapped when loaded, so a request looks up its wallets with a
+few vectorized probes instead of touching any per-wallet Python objects.
+
+Wallet features are ratios of sums over the mint's window wallets, so the same code
+serves one request, every training row (bincount) and every replay prefix (cumsum).
+Training rows use leave-one-out aggregates: a mint's own outcome never feeds its features.
+"""
+import json
+import os
+import shutil
+import uuid
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+import numpy as np
+from app.ml.features import WINDOWS
+
+if TYPE_CHECKING:
+    from app.ml.features import TradeArrays
+    from app.ml.feature_store import StoredSamples
+
+# A wallet entered early if its first trade came within this many seconds of the mint's first trade
+EARLY_SECONDS = 60
+# ... and dumped if it sold within this many seconds of its first buy
+DUMP_SECONDS = 300
+# Early entries (and at least half of them winners) for a wallet to count as smart money
+SMART_MIN_EARLY = 3
+
+# Per (mint, wallet) flags kept in the feature store
+EARLY, DUMP = 1, 2
+# Per-wallet counts kept in the index, one column each
+AGGREGATES = ('mints', 'early_mints', 'early_wins', 'dumps')
+WALLET_FEATURES = ('wallet_known_ratio', 'wallet_early_win_rate', 'wallet_dump_rate', 'wallet_smart_count')
+
+_EMPTY = 0
+_MAX_LOAD = 0.5
+# Slots compared per lookup step after the home slot
+_PROBE_BLOCK = 8
+
+
+def wallet_hashes(wallets: Sequence[str]) -> np.ndarray:
+    """Stable 64-bit hashes of wallet addresses; 0 marks an empty slot, so it never occurs"""
+    import pandas as pd
+    hashes = pd.util.hash_array(np.asarray(wallets, dtype=object), categorize=False)
+    hashes[hashes == _EMPTY] = 1
+    return hashes
+
+
+def window_traders(trades: "TradeArrays") -> np.ndarray:
+    """Wallets whose first trade falls within the last feature window, in order of entry"""
+    if len(trades) == 0:
+        return trades.traders[:0]
+    n = np.searchsorted(trades.timestamps, trades.timestamps[0] + WINDOWS[-1][0] * 1000, side='right')
+    return trades.traders[:trades.trader_codes[:n].max() + 1]
+
+
+def mint_wallets(trades: "TradeArrays") -> Tuple[np.ndarray, np.ndarray]:
+    """(hashes, flags) of one mint's window wallets, flags judged on all of its trades"""
+    wallets = window_traders(trades)
+    n = len(wallets)
+    if n == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint8)
+    start = trades.timestamps[0]
+    in_window = trades.trader_codes < n
+    codes = trades.trader_codes[in_window]
+    timestamps = trades.timestamps[in_window].astype(np.float64)
+    is_buy = trades.is_buy[in_window]
+
+    entered = np.full(n, np.inf)
+    np.minimum.at(entered, codes, timestamps)
+    first_buy = np.full(n, np.inf)
+    np.minimum.at(first_buy, codes[is_buy], timestamps[is_buy])
+    since_buy = timestamps - first_buy[codes]
+    dumped = np.zeros(n, dtype=bool)
+    dumped[codes[~is_buy & (since_buy >= 0) & (since_buy <= DUMP_SECONDS * 1000)]] = True
+
+    flags = np.where(entered - start <= EARLY_SECONDS * 1000, EARLY, 0) | np.where(dumped, DUMP, 0)
+    return wallet_hashes(wallets), flags.astype(np.uint8)
+
+
+def contributions(aggregates: np.ndarray) -> np.ndarray:
+    """Per-wallet terms summed into the wallet features: known, mints, early, wins, dumps, smart"""
+    aggregates = np.asarray(aggregates, dtype=np.float64)
+    terms = np.empty((len(aggregates), 6))
+    terms[:, 0] = aggregates[:, 0] > 0
+    terms[:, 1:5] = aggregates
+    early, wins = aggregates[:, 1], aggregates[:, 2]
+    terms[:, 5] = (early >= SMART_MIN_EARLY) & (2 * wins >= early)
+    return terms
+
+
+def features_from_sums(n_wallets, sums: np.ndarray) -> Dict[str, np.ndarray]:
+    """WALLET_FEATURES from wallet counts and summed contributions (the last axis of sums)"""
+    n_wallets = np.asarray(n_wallets, dtype=np.float64)
+    known, mints, early, wins, dumps, smart = np.moveaxis(np.asarray(sums, dtype=np.float64), -1, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'wallet_known_ratio': np.where(n_wallets > 0, known / n_wallets, 0.0),
+            'wallet_early_win_rate': np.where(early > 0, wins / early, 0.0),
+            'wallet_dump_rate': np.where(mints > 0, dumps / mints, 0.0),
+            'wallet_smart_count': smart,
+        }
+
+
+class TraderIndex:
+    """Wallet hash -> AGGREGATES counts, as a linear-probing hash table over flat arrays"""
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, meta: Dict):
+        self.keys = keys
+        self.values = values
+        self.meta = meta
+        self._mask = np.uint64(len(keys) - 1)
+
+    def __len__(self):
+        return self.meta['wallets']
+
+    @classmethod
+    def build(cls, hashes: np.ndarray, aggregates: np.ndarray) -> "TraderIndex":
+        """Index of distinct wallet hashes and their AGGREGATES rows"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        capacity = 16
+        while capacity * _MAX_LOAD < len(hashes):
+            capacity *= 2
+        keys = np.zeros(capacity, dtype=np.uint64)
+        values = np.zeros((capacity, len(AGGREGATES)), dtype=np.uint32)
+        home = (hashes & np.uint64(capacity - 1)).astype(np.int64)
+
+        # Insert everything at once, one probe step per round: of the wallets aiming at the
+        # same free slot the first takes it, the others (and those that hit a taken slot) move on
+        pending = np.arange(len(hashes))
+        probe = 0
+        max_probe = 0
+        while len(pending):
+            slots = (home[pending] + probe) & (capacity - 1)
+            free = keys[slots] == _EMPTY
+            taken, first = np.unique(slots[free], return_index=True)
+            winners = pending[free][first]
+            keys[taken] = hashes[winners]
+            values[taken] = np.minimum(aggregates[winners], np.iinfo(np.uint32).max)
+            if len(winners):
+                max_probe = probe
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[np.flatnonzero(free)[first]] = True
+            pending = pending[~placed]
+            probe += 1
+        return cls(keys, values, {'wallets': len(hashes), 'capacity': capacity, 'max_probe': max_probe,
+                                  'aggregates': list(AGGREGATES)})
+
+    def lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """AGGREGATES rows for hashes; zeros for wallets the index has never seen"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = np.zeros((len(hashes), len(AGGREGATES)), dtype=np.uint32)
+        pending = np.arange(len(hashes))
+        starts = (hashes & self._mask).astype(np.int64)
+        mask = int(self._mask)
+        # Most wallets sit in (or are missing from) their home slot; the rest scan a block at a time
+        offset, width = 0, 1
+        while len(pending) and offset <= self.meta['max_probe']:
+            slots = (starts[:, None] + np.arange(offset, offset + width)) & mask
+            keys = self.keys[slots]
+            hit = keys == hashes[pending, None]
+            rows, cols = np.nonzero(hit)
+            found[pending[rows]] = self.values[slots[rows, cols]]
+            # An empty slot ends the probe sequence: the wallet isn't there
+            more = ~hit.any(axis=1) & (keys != _EMPTY).all(axis=1)
+            pending, starts = pending[more], starts[more]
+            offset, width = offset + width, _PROBE_BLOCK
+        return found
+
+    def features(self, wallets: Sequence[str]) -> Dict[str, float]:
+        """WALLET_FEATURES for one mint's window wallets"""
+        sums = contributions(self.lookup(wallet_hashes(wallets))).sum(axis=0)
+        return {name: float(value) for name, value in features_from_sums(len(wallets), sums).items()}
+
+    def save(self, path: str) -> str:
+        """Write keys, values and meta as a directory of .npy files, swapped into place atomically"""
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, 'keys.npy'), self.keys)
+        np.save(os.path.join(tmp, 'values.npy'), self.values)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        return path
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TraderIndex":
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(path, 'keys.npy'), mmap_mode=mode),
+                   np.load(os.path.join(path, 'values.npy'), mmap_mode=mode), meta)
+
+
+def fit(rows: np.ndarray, hashes: np.ndarray, flags: np.ndarray, wins: np.ndarray,
+        n_rows: int) -> Tuple[TraderIndex, Dict[str, np.ndarray]]:
+    """Index over (row, wallet hash, flags) pairs, plus leave-one-out WALLET_FEATURES per row.
+
+    wins[row] is whether the mint of that row was a success; rows without pairs get zeros.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    flags = np.asarray(flags)
+    early = (flags & EARLY) > 0
+    own = np.column_stack([
+        np.ones(len(rows)), early, early & np.asarray(wins, dtype=bool)[rows], (flags & DUMP) > 0,
+    ]).astype(np.int64)
+    keys, inverse = np.unique(np.asarray(hashes, dtype=np.uint64), return_inverse=True)
+    totals = np.column_stack([
+        np.bincount(inverse, weights=own[:, j], minlength=len(keys)) for j in range(len(AGGREGATES))
+    ]).astype(np.int64)
+    index = TraderIndex.build(keys, totals)
+
+    terms = contributions(totals[inverse] - own)
+    sums = np.column_stack([np.bincount(rows, weights=terms[:, j], minlength=n_rows) for j in range(terms.shape[1])])
+    return index, features_from_sums(np.bincount(rows, minlength=n_rows), sums)
+
+
+def holdout_features(rows: np.ndarray, hashes: np.ndarray, flags: np.ndarray, wins: np.ndarray, n_rows: int,
+                     train_rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """WALLET_FEATURES per row from an index fitted on the pairs of train_rows only.
+
+    Train rows get fit()'s leave-one-out features; every other row is looked up in that index
+    the way a request would be, so no outcome outside train_rows feeds any row's features.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    in_train = np.zeros(n_rows, dtype=bool)
+    in_train[train_rows] = True
+    fitted = in_train[rows]
+    if not fitted.any():
+        return {name: np.zeros(n_rows) for name in WALLET_FEATURES}
+    index, train_features = fit(rows[fitted], hashes[fitted], np.asarray(flags)[fitted], wins, n_rows)
+
+    other = rows[~fitted]
+    terms = contributions(index.lookup(hashes[~fitted]))
+    sums = np.column_stack([np.bincount(other, weights=terms[:, j], minlength=n_rows) for j in range(terms.shape[1])])
+    held_out = features_from_sums(np.bincount(other, minlength=n_rows), sums)
+    return {name: np.where(in_train, train_features[name], held_out[name]) for name in WALLET_FEATURES}
+
+
+def training_features(stored: "StoredSamples", wins: np.ndarray) -> Tuple[Optional[TraderIndex], Dict[str, np.ndarray]]:
+    """fit() over the wallet columns of StoredSamples; no index when they hold no wallets"""
+    if len(stored.wallet_rows) == 0:
+        return None, {name: np.zeros(len(stored)) for name in WALLET_FEATURES}
+    return fit(stored.wallet_rows, stored.wallet_hashes, stored.wallet_flags, wins, len(stored))
@@ -0,0 +1,188 @@
+# app/ml/trees.py
+"""LightGBM tree ensembles as flat NumPy arrays, scored without LightGBM.
+
+The arrays are written once per model version as .npy files and opened with
+mmap_mode='r', so every uvicorn worker maps the same page-cache copy of the
+weights instead of holding its own booster in private memory.
+"""
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List
+import numpy as np
+
+ARRAYS = ('feature', 'threshold', 'children', 'default_left', 'missing_type', 'value', 'roots')
+
+# Bits of LightGBM's per-node decision_type
+_CATEGORICAL_MASK = 1
+_DEFAULT_LEFT_MASK = 2
+# Missing value handling, (decision_type >> 2) & 3
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_ZERO_THRESHOLD = 1e-35
+
+
+def _parse_blocks(model_str: str) -> List[Dict[str, str]]:
+    """Split a LightGBM text model into key=value blocks (header, then one per tree)"""
+    blocks, block = [], {}
+    for line in model_str.splitlines():
+        if line.startswith('end of trees'):
+            break
+        if line.startswith('Tree='):
+            blocks.append(block)
+            block = {}
+        key, sep, value = line.partition('=')
+        if sep:
+            block[key] = value
+    blocks.append(block)
+    return blocks
+
+
+def _values(block: Dict[str, str], key: str, dtype) -> np.ndarray:
+    text = block.get(key, '')
+    return np.array(text.split(), dtype=dtype) if text else np.empty(0, dtype=dtype)
+
+
+class TreeEnsemble:
+    """Binary (or plain regression) GBDT over numerical splits.
+
+    Splits and leaves of all trees share one set of node arrays. A leaf is a node whose
+    children are itself, so every row can take max_depth steps without tracking which
+    paths have already finished; its output is in value.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.meta = meta
+        # Plain ndarray views: indexing a np.memmap goes through Python-level __getitem__
+        self.arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        for name in ARRAYS:
+            setattr(self, name, self.arrays[name])
+        self.max_depth = meta['max_depth']
+        self.num_features = meta['num_features']
+        # Without Zero/NaN missing handling a split is just value <= threshold
+        self.plain_splits = not self.missing_type.any()
+
+    @classmethod
+    def from_model_string(cls, model_str: str) -> "TreeEnsemble":
+        header, *trees = _parse_blocks(model_str)
+        objective = header.get('objective', '').split()
+        if header.get('num_class', '1') != '1' or not objective or objective[0] not in ('binary', 'regression'):
+            raise ValueError(f"Unsupported LightGBM objective for tree export: {header.get('objective')}")
+        sigmoid = 1.0
+        for option in objective[1:]:
+            if option.startswith('sigmoid:'):
+                sigmoid = float(option.split(':', 1)[1])
+
+        columns = {name: [] for name in ARRAYS}
+        offset = max_depth = 0
+        for tree in trees:
+            if tree.get('num_cat', '0') != '0' or tree.get('is_linear', '0') != '0':
+                raise ValueError("Categorical and linear trees are not supported by the tree export")
+            leaf_value = _values(tree, 'leaf_value', np.float64)
+            left = _values(tree, 'left_child', np.int32)
+            right = _values(tree, 'right_child', np.int32)
+            decision = _values(tree, 'decision_type', np.int32)
+            max_depth = max(max_depth, _depth(left, right))
+            n_splits, n_leaves = len(left), len(leaf_value)
+            leaves = np.arange(n_leaves, dtype=np.int32) + offset + n_splits
+
+            # Splits first, then leaves; LightGBM marks leaf children as ~leaf_index. Children
+            # are interleaved (right, left) so a step is one gather at 2 * node + go_left.
+            left = np.concatenate([np.where(left >= 0, left + offset, ~left + offset + n_splits), leaves])
+            right = np.concatenate([np.where(right >= 0, right + offset, ~right + offset + n_splits), leaves])
+            columns['children'].append(np.stack([right, left], axis=1).ravel())
+            columns['feature'] += [_values(tree, 'split_feature', np.int32), np.zeros(n_leaves, np.int32)]
+            columns['threshold'] += [_values(tree, 'threshold', np.float64), np.zeros(n_leaves)]
+            columns['default_left'] += [(decision & _DEFAULT_LEFT_MASK) != 0, np.zeros(n_leaves, bool)]
+            columns['missing_type'] += [((decision >> 2) & 3).astype(np.int8), np.zeros(n_leaves, np.int8)]
+            columns['value'] += [np.zeros(n_splits), leaf_value]
+            columns['roots'].append(np.array([offset], dtype=np.int32))
+            offset += n_splits + n_leaves
+
+        arrays = {name: np.concatenate(parts).astype(parts[0].dtype, copy=False) if parts else np.empty(0)
+                  for name, parts in columns.items()}
+        meta = {
+            'objective': objective[0],
+            'sigmoid': sigmoid,
+            'max_depth': max_depth,
+            'num_trees': len(trees),
+            'num_features': int(header.get('max_feature_idx', -1)) + 1,
+        }
+        return cls(arrays, meta)
+
+    def save(self, path: str) -> str:
+        """Write the arrays as a directory of .npy files, swapped into place atomically"""
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), self.arrays[name])
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another worker exported the same version first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        return path
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TreeEnsemble":
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def raw_score(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        plain = self.plain_splits
+        if plain and np.isnan(X).any():
+            # Missing type None compares NaN as 0
+            X, plain = np.nan_to_num(X, nan=0.0, posinf=np.inf, neginf=-np.inf), True
+        rows = np.arange(len(X))[:, None] * X.shape[1]
+        flat = X.ravel()
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+
+        # One level of every tree per step; rows sitting on a leaf stay there, so once
+        # a step moves nothing every path has finished
+        for _ in range(self.max_depth):
+            value = flat[rows + self.feature[node]]
+            if plain:
+                go_left = value <= self.threshold[node]
+            else:
+                go_left = self._decide(node, value)
+            moved = self.children[2 * node + go_left]
+            if np.array_equal(moved, node):
+                break
+            node = moved
+
+        return self.value[node].sum(axis=1)
+
+    def _decide(self, node: np.ndarray, value: np.ndarray) -> np.ndarray:
+        """LightGBM's NumericalDecision, including Zero/NaN missing value routing"""
+        missing = self.missing_type[node]
+        is_nan = np.isnan(value)
+        value = np.where(is_nan & (missing != MISSING_NAN), 0.0, value)
+        use_default = ((missing == MISSING_ZERO) & (np.abs(value) <= _ZERO_THRESHOLD)) | (
+            (missing == MISSING_NAN) & is_nan)
+        return np.where(use_default, self.default_left[node], value <= self.threshold[node])
+
+    def predict(self, X: np.ndarray, **kwargs) -> np.ndarray:
+        """Booster.predict equivalent; extra LightGBM arguments (num_threads, ...) are ignored"""
+        raw = self.raw_score(X)
+        if self.meta['objective'] == 'binary':
+            return 1.0 / (1.0 + np.exp(-self.meta['sigmoid'] * raw))
+        return raw
+
+
+def _depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Number of splits on the longest root-to-leaf path"""
+    if len(left) == 0:
+        return 0
+    depth, level = 0, [0]
+    while level:
+        depth += 1
+        level = [child for node in level for child in (left[node], right[node]) if child >= 0]
+    return depth
@@ -23,6 +23,10 @@ class TokenData(BaseModel):
 class Analysis(BaseModel):
     early_signs: Dict[str, Union[float, int]]
     feature_values: Dict[str, float]
+    # "full" when the model (or heuristic) scored the request, "prefilter" when the stage-1
+    # cascade answered; feature_values then only has the first-minute trade count, buy ratio
+    # and market cap growth filled in, the other window metrics are 0
+    stage: str = "full"
 
 class PredictionResponse(BaseModel):
     isPromising: bool
@@ -30,4 +34,22 @@ class PredictionResponse(BaseModel):
     analysis: Analysis
 class PredictionRequest(BaseModel):
     trades: List[Trade]
-    token: TokenData
\ No newline at end of file
+    token: TokenData
+
+class BatchPredictionResult(PredictionResponse):
+    mint: str
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionResult]
+
+class TrainingIngestRequest(BaseModel):
+    trades_path: str
+    tokens_path: str
+    success_mcap: float = 400
+    incremental: bool = False
+
+class BacktestRequest(BaseModel):
+    trades_path: str
+    tokens_path: str
+    success_mcap: float = 400
+    thresholds: List[float] = [0.3, 0.5, 0.7, 0.9]
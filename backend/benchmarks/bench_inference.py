@@ -0,0 +1,45 @@
+# benchmarks/bench_inference.py
+"""Single-row scoring latency: DataFrame + StandardScaler path vs the NumPy fast path.
+
+    python -m benchmarks.bench_inference --iterations 2000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.log import setup_logging
+from app.ml.features import TradeArrays, compute_quick_features
+from app.ml.predictor import QuickTokenPredictor
+from benchmarks.synthetic import generate_dataset, generate_trades, generate_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_logging("WARNING")
+    predictor = QuickTokenPredictor(model_dir=tempfile.mkdtemp())
+    predictor.train(*generate_dataset(200, 60), n_workers=1)
+
+    features = [
+        compute_quick_features(TradeArrays.from_records(generate_trades(50, seed=i)), generate_token(seed=i))
+        for i in range(100)
+    ]
+
+    for label, fast in [("pandas", False), ("numpy", True)]:
+        settings.fast_inference = fast
+        timings = []
+        for i in range(args.iterations):
+            start = time.perf_counter()
+            predictor.predict_features(features[i % len(features)])
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        print(f"{label:>8}: p50 {np.percentile(timings, 50):.3f} ms  p99 {np.percentile(timings, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
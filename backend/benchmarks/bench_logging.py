@@ -0,0 +1,62 @@
+# benchmarks/bench_logging.py
+"""Prediction latency with hot-path debug logging on, off, and sampled.
+
+    python -m benchmarks.bench_logging --trades 1000 --iterations 200
+"""
+import os
+
+# Every iteration repeats the same payload; without this it would be a cache hit after the first
+os.environ.setdefault("FEATURE_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+
+import argparse
+import io
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.log import setup_logging
+from app.ml.predictor import QuickTokenPredictor
+from benchmarks.synthetic import generate_dataset, generate_trades, generate_token
+
+
+def time_predictions(predictor, trades, token, iterations: int) -> np.ndarray:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        predictor.predict(trades, token)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trades", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_logging("WARNING")
+    predictor = QuickTokenPredictor(model_dir=tempfile.mkdtemp())
+    predictor.train(*generate_dataset(200, 60), n_workers=1)
+
+    trades = generate_trades(args.trades)
+    token = generate_token()
+    handler = logging.getLogger("app").handlers[0]
+
+    for label, level, sample_rate in [
+        ("debug", "DEBUG", 1.0),
+        ("debug, 1% sampled", "DEBUG", 0.01),
+        ("info (production)", "INFO", 1.0),
+    ]:
+        setup_logging(level, sample_rate=sample_rate)
+        # Format into memory so terminal speed doesn't skew the numbers
+        handler.setStream(io.StringIO())
+        timings = time_predictions(predictor, trades, token, args.iterations)
+        print(f"{label:>20}: p50 {np.percentile(timings, 50):.3f} ms  "
+              f"p99 {np.percentile(timings, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# benchmarks/run.py
+"""Throughput benchmarks for feature extraction, inference, the /api/predict endpoints, training and replay.
+
+    python -m benchmarks.run                              # quick profile, writes benchmarks/results/<timestamp>.json
+    python -m benchmarks.run --profile full               # 10 / 1k / 100k trades per mint, 100 to 100k mints
+    python -m benchmarks.run --only predict,endpoint
+    python -m benchmarks.run --compare old.json new.json  # per-benchmark p50 ratio
+"""
+import os
+
+# Benchmarks measure cold work: no caches, no model watcher, no hot-path logging
+os.environ.setdefault("FEATURE_CACHE_SIZE", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.ml.predictor import QuickTokenPredictor
+from benchmarks.synthetic import generate_dataset, generate_token, generate_trades
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+PROFILES = {
+    "quick": {"trades_per_mint": [10, 1000], "train_mints": [100, 1000], "batch_mints": [100]},
+    "full": {"trades_per_mint": [10, 1000, 100_000], "train_mints": [100, 10_000, 100_000],
+             "batch_mints": [100, 10_000]},
+}
+
+
+def measure(fn: Callable[[], object], min_iterations: int = 5, min_seconds: float = 1.0,
+            max_iterations: int = 10_000) -> Dict:
+    """Call fn until both minimums are met; returns latency stats in milliseconds"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and (
+        len(timings) < min_iterations or time.perf_counter() - started < min_seconds
+    ):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    ms = np.array(timings) * 1000
+    return {
+        "iterations": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "min_ms": float(ms.min()),
+        "max_ms": float(ms.max()),
+    }
+
+
+def result(name: str, params: Dict, stats: Dict, items: int = 1) -> Dict:
+    stats["items_per_s"] = items / (stats["mean_ms"] / 1000) if stats["mean_ms"] else 0.0
+    print(f"{name:<22} {json.dumps(params):<40} p50 {stats['p50_ms']:10.3f} ms  "
+          f"p99 {stats['p99_ms']:10.3f} ms  {stats['items_per_s']:12.1f} items/s")
+    return {"name": name, "params": params, **stats}
+
+
+def trained_predictor(model_dir: str) -> QuickTokenPredictor:
+    predictor = QuickTokenPredictor(model_dir=model_dir)
+    predictor.train(*generate_dataset(500, 60), n_workers=1)
+    return predictor
+
+
+def bench_features(predictor, profile) -> List[Dict]:
+    results = []
+    token = generate_token()
+    for n in profile["trades_per_mint"]:
+        trades = generate_trades(n)
+        trades_df = pd.DataFrame(trades)
+        stats = measure(lambda: predictor.extract_quick_features(trades_df, token))
+        results.append(result("extract_quick_features", {"trades": n}, stats))
+        stats = measure(lambda: predictor.features_for(trades, token))
+        results.append(result("features_from_records", {"trades": n}, stats))
+    return results
+
+
+def bench_predict(predictor, profile) -> List[Dict]:
+    results = []
+    token = generate_token()
+    for n in profile["trades_per_mint"]:
+        trades = generate_trades(n)
+        stats = measure(lambda: predictor.predict(trades, token))
+        results.append(result("predict", {"trades": n}, stats))
+    for n_mints in profile["batch_mints"]:
+        requests = [(generate_trades(100, mint=f"M{i}", seed=i), generate_token(f"M{i}", seed=i))
+                    for i in range(n_mints)]
+        stats = measure(lambda: predictor.predict_batch(requests), min_iterations=3)
+        results.append(result("predict_batch", {"mints": n_mints, "trades": 100}, stats, items=n_mints))
+    return results
+
+
+def bench_endpoint(predictor, profile) -> List[Dict]:
+    from fastapi.testclient import TestClient
+    from app.api.endpoints import predict as predict_endpoint
+    from app.main import app
+
+    # Serve the benchmark model from the app's own predictor
+    predict_endpoint.predictor.registry.publish(predictor.registry.current)
+    results = []
+    token = generate_token()
+    with TestClient(app) as client:
+        for n in profile["trades_per_mint"]:
+            trades = generate_trades(n)
+            body = {"trades": trades, "token": token}
+            stats = measure(lambda: client.post("/api/predict", json=body).raise_for_status())
+            results.append(result("endpoint_predict", {"trades": n}, stats))
+
+            columnar = json.dumps({"trades": {field: [t[field] for t in trades] for field in trades[0]},
+                                   "token": token})
+            stats = measure(lambda: client.post("/api/predict/columnar", content=columnar,
+                                                headers={"content-type": "application/json"}).raise_for_status())
+            results.append(result("endpoint_columnar", {"trades": n}, stats))
+    return results
+
+
+def bench_train(predictor, profile) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        trainer = QuickTokenPredictor(model_dir=model_dir)
+        for n_mints in profile["train_mints"]:
+            trades_df, tokens_df = generate_dataset(n_mints, 10)
+            stats = measure(lambda: trainer.train(trades_df.copy(), tokens_df), min_iterations=1,
+                            min_seconds=0)
+            results.append(result("train", {"mints": n_mints, "trades_per_mint": 10}, stats, items=n_mints))
+    return results
+
+
+def bench_replay(predictor, profile) -> List[Dict]:
+    from app.ml.replay import backtest
+
+    results = []
+    for n_mints in profile["train_mints"]:
+        trades_df, tokens_df = generate_dataset(n_mints, 100)
+        stats = measure(lambda: backtest(predictor.registry.current, trades_df, tokens_df), min_iterations=1,
+                        min_seconds=0)
+        results.append(result("replay", {"mints": n_mints, "trades_per_mint": 100}, stats, items=len(trades_df)))
+    return results
+
+
+def bench_cascade(predictor, profile) -> List[Dict]:
+    from app.ml.cascade import Prefilter
+    from app.core.config import settings
+
+    # Four in five mints are slow starters (a trade every two minutes or so), below the trade floor
+    results = []
+    for n in profile["trades_per_mint"]:
+        requests = []
+        for i in range(100):
+            trades = generate_trades(n, mint=f"M{i}", seed=i)
+            if i % 5:
+                start = trades[0]["timestamp"]
+                trades = [{**t, "timestamp": start + (t["timestamp"] - start) * 300} for t in trades]
+            requests.append((trades, generate_token(f"M{i}", seed=i)))
+        saved = predictor.prefilter
+        for enabled in (False, True):
+            predictor.prefilter = Prefilter(settings.prefilter_min_trades, settings.prefilter_min_buy_ratio,
+                                            settings.prefilter_min_growth, audit_rate=0.0) if enabled else None
+            stats = measure(lambda: predictor.predict_batch(requests), min_iterations=3)
+            results.append(result("cascade", {"prefilter": enabled, "mints": 100, "trades": n}, stats, items=100))
+        predictor.prefilter = saved
+    return results
+
+
+BENCHMARKS = {
+    "features": bench_features,
+    "predict": bench_predict,
+    "endpoint": bench_endpoint,
+    "train": bench_train,
+    "replay": bench_replay,
+    "cascade": bench_cascade,
+}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    import lightgbm
+    import sklearn
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "lightgbm": lightgbm.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    old = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in json.load(open(old_path))["results"]}
+    new = json.load(open(new_path))["results"]
+    for r in new:
+        key = (r["name"], json.dumps(r["params"], sort_keys=True))
+        if key not in old:
+            continue
+        ratio = r["p50_ms"] / old[key]["p50_ms"] if old[key]["p50_ms"] else float("nan")
+        print(f"{r['name']:<22} {key[1]:<40} p50 {old[key]['p50_ms']:10.3f} -> {r['p50_ms']:10.3f} ms  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    profile = PROFILES[args.profile]
+    results = []
+    with tempfile.TemporaryDirectory() as model_dir:
+        predictor = trained_predictor(model_dir)
+        for name in selected:
+            results.extend(BENCHMARKS[name](predictor, profile))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"environment": environment(), "profile": args.profile,
+                                  "results": results}, indent=2))
+    print(f"\nSaved {len(results)} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
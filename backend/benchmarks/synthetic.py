@@ -0,0 +1,89 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+START_TS = 1_700_000_000_000
+
+
+def generate_trades(n_trades: int, mint: str = "BENCHMINT", seed: int = 0) -> List[Dict]:
+    """Pump-style trade stream: bursty buys early, noisier two-way flow afterwards"""
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(400, n_trades).astype(np.int64)
+    timestamps = START_TS + np.cumsum(gaps)
+    buy_prob = np.where(np.arange(n_trades) < n_trades // 4, 0.8, 0.5)
+    is_buy = rng.random(n_trades) < buy_prob
+    sizes = rng.exponential(0.5, n_trades)
+    v_sol = np.maximum(1.0, 30.0 + np.cumsum(np.where(is_buy, sizes, -sizes)))
+    holders = np.maximum(1, 1 + np.cumsum(np.where(is_buy, 1, -1) * (rng.random(n_trades) < 0.5)))
+    traders = rng.integers(0, max(3, n_trades // 3), n_trades)
+
+    return [
+        {
+            "mint": mint,
+            "traderPublicKey": f"W{traders[i]}",
+            "txType": "buy" if is_buy[i] else "sell",
+            "tokenAmount": float(sizes[i] * 1e6),
+            "vSolInBondingCurve": float(v_sol[i]),
+            "vTokensInBondingCurve": float(1e9 / v_sol[i]),
+            "timestamp": int(timestamps[i]),
+            "marketCapSol": float(v_sol[i] * 1.1),
+            "holdersCount": int(holders[i]),
+        }
+        for i in range(n_trades)
+    ]
+
+
+def generate_token(mint: str = "BENCHMINT", seed: int = 0) -> Dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "mint": mint,
+        "initialBuySol": float(rng.random() * 3),
+        "initialBuyPercent": float(rng.random() * 10),
+        "liquidity": 30.0,
+        "marketCap": float(rng.choice([30.0, 500.0])),
+    }
+
+
+def generate_dataset(n_mints: int, trades_per_mint: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Training frames (trades_df, tokens_df) for n_mints synthetic launches, built column-wise"""
+    rng = np.random.default_rng(seed)
+    n = n_mints * trades_per_mint
+    mint_ids = np.repeat(np.arange(n_mints), trades_per_mint)
+    position = np.tile(np.arange(trades_per_mint), n_mints)
+    # Each mint launches at its own time; about a fifth of them pump (buy-heavy throughout)
+    pumps = rng.random(n_mints) < 0.2
+    launch = START_TS + np.sort(rng.integers(0, 86_400_000, n_mints))
+
+    buy_prob = np.where(pumps[mint_ids], 0.85, np.where(position < trades_per_mint // 4, 0.7, 0.45))
+    is_buy = rng.random(n) < buy_prob
+    sizes = rng.exponential(np.where(pumps[mint_ids], 1.5, 0.5))
+    flow = np.where(is_buy, sizes, -sizes).reshape(n_mints, trades_per_mint)
+    v_sol = np.maximum(1.0, 30.0 + np.cumsum(flow, axis=1)).ravel()
+    holder_steps = (np.where(is_buy, 1, -1) * (rng.random(n) < 0.5)).reshape(n_mints, trades_per_mint)
+    holders = np.maximum(1, 1 + np.cumsum(holder_steps, axis=1)).ravel()
+    gaps = rng.exponential(400, n).astype(np.int64).reshape(n_mints, trades_per_mint)
+    timestamps = (launch[:, None] + np.cumsum(gaps, axis=1)).ravel()
+    traders = rng.integers(0, max(3, n // 3), n)
+
+    mints = np.array([f"MINT{i}" for i in range(n_mints)], dtype=object)
+    trades_df = pd.DataFrame({
+        "mint": mints[mint_ids],
+        "traderPublicKey": pd.Series(traders).map("W{}".format).to_numpy(),
+        "txType": np.where(is_buy, "buy", "sell"),
+        "tokenAmount": sizes * 1e6,
+        "vSolInBondingCurve": v_sol,
+        "vTokensInBondingCurve": 1e9 / v_sol,
+        "timestamp": timestamps,
+        "marketCapSol": v_sol * 1.1,
+        "holdersCount": holders,
+    })
+    final_mcap = trades_df["marketCapSol"].to_numpy().reshape(n_mints, trades_per_mint)[:, -1]
+    tokens_df = pd.DataFrame({
+        "mint": mints,
+        "initialBuySol": rng.random(n_mints) * 3,
+        "initialBuyPercent": rng.random(n_mints) * 10,
+        "liquidity": 30.0,
+        "marketCap": np.where(pumps, final_mcap * 15, final_mcap),
+    })
+    return trades_df, tokens_df
@@ -0,0 +1,89 @@
+# tests/test_batching.py
+"""MicroBatcher: one process() call per batch, shared results for identical keys, isolated failures"""
+import asyncio
+import threading
+import pytest
+from app.core.batching import MicroBatcher
+
+
+class Recorder:
+    """process() that records every batch it is given and fails on items equal to 'bad'"""
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            self.batches.append(list(items))
+        if 'bad' in items:
+            raise ValueError("bad item")
+        return [f"scored {item}" for item in items]
+
+
+def test_identical_in_flight_requests_share_one_computation():
+    process = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(process, window=0.01, max_size=64)
+        return await asyncio.gather(
+            batcher.submit('a', 'a'), batcher.submit('a', 'a'), batcher.submit('b', 'b'), batcher.submit('a', 'a'))
+
+    assert asyncio.run(main()) == ['scored a', 'scored a', 'scored b', 'scored a']
+    assert process.batches == [['a', 'b']]
+
+
+def test_finished_key_is_scored_again():
+    process = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(process, window=0, max_size=64)
+        first = await batcher.submit('a', 'a')
+        second = await batcher.submit('a', 'a')
+        return first, second
+
+    assert asyncio.run(main()) == ('scored a', 'scored a')
+    assert process.batches == [['a'], ['a']]
+
+
+def test_full_batch_is_scored_without_waiting_for_the_window():
+    process = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(process, window=60, max_size=2)
+        return await asyncio.wait_for(asyncio.gather(batcher.submit(1, 'x'), batcher.submit(2, 'y')), 5)
+
+    assert asyncio.run(main()) == ['scored x', 'scored y']
+
+
+def test_failing_item_does_not_fail_its_neighbours():
+    process = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(process, window=0.01, max_size=64)
+        return await asyncio.gather(
+            batcher.submit('a', 'a'), batcher.submit('bad', 'bad'), batcher.submit('c', 'c'),
+            batcher.submit('bad', 'bad'), return_exceptions=True)
+
+    a, bad, c, bad_again = asyncio.run(main())
+    assert (a, c) == ('scored a', 'scored c')
+    assert isinstance(bad, ValueError) and bad_again is bad
+    # The whole batch once, then each request on its own
+    assert process.batches[0] == ['a', 'bad', 'c']
+    assert sorted(process.batches[1:]) == [['a'], ['bad'], ['c']]
+
+
+def test_cancelled_caller_keeps_shared_result():
+    process = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(process, window=0.01, max_size=64)
+        first = asyncio.ensure_future(batcher.submit('a', 'a'))
+        second = asyncio.ensure_future(batcher.submit('a', 'a'))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'scored a'
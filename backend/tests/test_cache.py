@@ -0,0 +1,81 @@
+# tests/test_cache.py
+"""TTLCache expiry and LRU eviction, and the request fingerprints used as its keys"""
+import numpy as np
+import pytest
+from app.ml import cache
+from app.ml.cache import TTLCache, columns_fingerprint, trades_fingerprint
+from benchmarks.synthetic import generate_token, generate_trades
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable stand-in for time.monotonic"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    entries = TTLCache(10, ttl=30)
+    entries.put('a', 1)
+    clock[0] += 30
+    assert entries.get('a') == 1
+    clock[0] += 0.001
+    assert entries.get('a') is None
+    assert len(entries) == 0
+    assert entries.stats()['expirations'] == 1 and entries.stats()['misses'] == 1
+
+
+def test_put_restarts_ttl(clock):
+    entries = TTLCache(10, ttl=30)
+    entries.put('a', 1)
+    clock[0] += 20
+    entries.put('a', 2)
+    clock[0] += 20
+    assert entries.get('a') == 2
+
+
+def test_least_recently_used_is_evicted_at_capacity(clock):
+    entries = TTLCache(3, ttl=30)
+    for key in 'abc':
+        entries.put(key, key)
+    assert entries.get('a') == 'a'  # b is now the least recently used
+    entries.put('d', 'd')
+    assert entries.get('b') is None
+    assert [entries.get(key) for key in 'acd'] == ['a', 'c', 'd']
+    assert len(entries) == 3 and entries.stats()['evictions'] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    entries = TTLCache(0, ttl=30)
+    entries.put('a', 1)
+    assert entries.get('a') is None and len(entries) == 0
+
+
+def test_fingerprint_changes_with_the_last_trade():
+    token = generate_token()
+    trades = generate_trades(50)
+    key = trades_fingerprint(trades, token)
+    assert trades_fingerprint([dict(trade) for trade in trades], dict(token)) == key
+
+    moved = trades[:-1] + [{**trades[-1], 'timestamp': trades[-1]['timestamp'] + 1}]
+    assert trades_fingerprint(moved, token) != key
+    assert trades_fingerprint(trades[:-1], token) != key
+    assert trades_fingerprint(trades, {**token, 'liquidity': token['liquidity'] + 1}) != key
+
+    entries = TTLCache(10, ttl=30)
+    entries.put(key, 'features')
+    assert entries.get(trades_fingerprint(moved, token)) is None
+    assert entries.get(trades_fingerprint(trades, token)) == 'features'
+
+
+def test_columns_fingerprint_equals_trades_fingerprint():
+    token = generate_token()
+    trades = generate_trades(50)
+    columns = {name: [trade[name] for trade in trades] for name in trades[0]}
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    key = trades_fingerprint(trades, token)
+    assert columns_fingerprint(columns, token) == key
+    assert columns_fingerprint(arrays, token) == key
+    assert hash(columns_fingerprint(arrays, token)) == hash(key)
+    assert columns_fingerprint({'timestamp': []}, token) == trades_fingerprint([], token)
@@ -0,0 +1,103 @@
+# tests/test_feature_store.py
+"""StoredSamples merging and FeatureStore persistence per feature set version"""
+import numpy as np
+import pandas as pd
+from app.ml.feature_store import FINGERPRINT_FIELDS, LABEL_INPUTS, FeatureStore, StoredSamples
+from app.ml.features import FEATURE_SET_VERSION
+from app.ml.predictor import QuickTokenPredictor
+from benchmarks.synthetic import generate_dataset
+
+NAMES = ['f0', 'f1']
+
+
+def sample(value: float, n_wallets: int):
+    return {
+        'features': {name: value + i for i, name in enumerate(NAMES)},
+        'inputs': {name: value for name in LABEL_INPUTS},
+        'wallets': (np.arange(n_wallets, dtype=np.uint64) + int(value) * 100, np.full(n_wallets, int(value) % 8)),
+    }
+
+
+def fingerprint(value: float):
+    return (value,) * len(FINGERPRINT_FIELDS)
+
+
+def samples(rows):
+    """StoredSamples from (mint, value, wallets) rows; wallets=None marks a mint without features"""
+    return StoredSamples.from_samples([
+        (mint, fingerprint(value), sample(value, wallets) if wallets is not None else None)
+        for mint, value, wallets in rows
+    ])
+
+
+def wallets_by_mint(stored: StoredSamples):
+    return {mint: sorted(stored.wallet_hashes[stored.wallet_rows == row].tolist())
+            for row, mint in enumerate(stored.mints.tolist())}
+
+
+def test_merge_replaces_a_mint_with_a_newer_fingerprint():
+    stored = samples([('A', 1, 2), ('B', 2, 3), ('C', 3, 1)])
+    merged = stored.merge(samples([('B', 5, 1), ('D', 4, 2)]))
+
+    assert merged.mints.tolist() == ['A', 'B', 'C', 'D']
+    index = merged.fingerprint_index()
+    assert index['B'] == fingerprint(5)
+    assert index['A'] == fingerprint(1) and index['C'] == fingerprint(3)
+    np.testing.assert_array_equal(merged.features[1], [5, 6])
+    np.testing.assert_array_equal(merged.inputs[1], np.full(len(LABEL_INPUTS), 5.0))
+    assert wallets_by_mint(merged) == {'A': [100, 101], 'B': [500], 'C': [300], 'D': [400, 401]}
+    assert np.all(np.diff(merged.wallet_rows) >= 0)
+
+    # Merging the same row again changes nothing
+    again = merged.merge(samples([('B', 5, 1)]))
+    assert again.fingerprint_index() == index
+    assert wallets_by_mint(again) == wallets_by_mint(merged)
+
+
+def test_merge_can_invalidate_a_mint():
+    merged = samples([('A', 1, 2), ('B', 2, 3)]).merge(samples([('A', 7, None)]))
+    assert merged.valid.tolist() == [False, True]
+    assert wallets_by_mint(merged) == {'A': [], 'B': [200, 201, 202]}
+
+    # Stored rows without features take the columns of the newer ones
+    merged = samples([('A', 1, None)]).merge(samples([('B', 2, 1)]))
+    assert merged.feature_names == NAMES
+    np.testing.assert_array_equal(merged.features, [[0, 0], [2, 3]])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    assert store.count() == 0 and len(store.load()) == 0
+    stored = samples([('A', 1, 2), ('B', 2, None)])
+    store.save(stored)
+
+    loaded = store.load()
+    assert store.count() == 2
+    assert loaded.feature_names == NAMES
+    assert loaded.fingerprint_index() == stored.fingerprint_index()
+    np.testing.assert_array_equal(loaded.features, stored.features)
+    assert wallets_by_mint(loaded) == wallets_by_mint(stored)
+
+
+def test_new_feature_set_version_does_not_read_the_old_store(tmp_path):
+    FeatureStore(str(tmp_path), version=FEATURE_SET_VERSION).save(samples([('A', 1, 2)]))
+    bumped = FeatureStore(str(tmp_path), version=FEATURE_SET_VERSION + 1)
+    assert not bumped.exists()
+    assert bumped.count() == 0 and len(bumped.load()) == 0
+    assert len(FeatureStore(str(tmp_path)).load()) == 1
+
+
+def test_incremental_training_re_extracts_only_changed_mints(tmp_path):
+    trades_df, tokens_df = generate_dataset(30, 20, seed=4)
+    predictor = QuickTokenPredictor(str(tmp_path))
+    predictor.train(trades_df.copy(), tokens_df, n_workers=1, incremental=True)
+    before = predictor.feature_store.load().fingerprint_index()
+
+    # One more trade for MINT3
+    extra = trades_df[trades_df['mint'] == 'MINT3'].tail(1).assign(timestamp=lambda df: df['timestamp'] + 1000)
+    predictor.train(pd.concat([trades_df, extra], ignore_index=True), tokens_df, n_workers=1, incremental=True)
+    assert predictor.history.last()['extracted_mints'] == 1
+    after = predictor.feature_store.load().fingerprint_index()
+    assert after['MINT3'] != before['MINT3']
+    assert {mint: fp for mint, fp in after.items() if mint != 'MINT3'} == \
+           {mint: fp for mint, fp in before.items() if mint != 'MINT3'}
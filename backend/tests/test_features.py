@@ -0,0 +1,136 @@
+# tests/test_features.py
+"""compute_quick_features against the original row-wise (DataFrame.apply) extraction"""
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml.features import TradeArrays, compute_quick_features
+from benchmarks.synthetic import generate_token, generate_trades
+
+
+def reference_features(trades_df: pd.DataFrame, token_data: dict) -> dict:
+    """QuickTokenPredictor.extract_quick_features as it was before vectorization, minus the prints"""
+    features = {
+        'initial_buy_sol': float(token_data['initialBuySol']),
+        'initial_buy_percent': float(token_data['initialBuyPercent']),
+        'initial_liquidity': float(token_data['liquidity']),
+
+        'trades_30s': 0, 'trades_1min': 0, 'trades_2min': 0, 'trades_5min': 0,
+        'buy_ratio_30s': 0, 'buy_ratio_1min': 0, 'buy_ratio_2min': 0, 'buy_ratio_5min': 0,
+        'mcap_growth_30s': 0, 'mcap_growth_1min': 0, 'mcap_growth_2min': 0, 'mcap_growth_5min': 0,
+        'unique_traders_30s': 0, 'unique_traders_1min': 0, 'unique_traders_2min': 0, 'unique_traders_5min': 0,
+        'buy_pressure_30s': 0, 'buy_pressure_1min': 0, 'buy_pressure_2min': 0, 'buy_pressure_5min': 0,
+        'holders_30s': 0, 'holders_1min': 0, 'holders_2min': 0, 'holders_5min': 0,
+        'holders_growth_30s': 0, 'holders_growth_1min': 0, 'holders_growth_2min': 0, 'holders_growth_5min': 0,
+    }
+
+    if len(trades_df) == 0:
+        return features
+
+    trades_df = trades_df.copy()
+    trades_df['timestamp'] = pd.to_numeric(trades_df['timestamp'])
+    trades_df = trades_df.sort_values('timestamp')
+    start_time = trades_df['timestamp'].min()
+    initial_holders = trades_df.iloc[0]['holdersCount']
+
+    trades_df['trade_volume_sol'] = trades_df.apply(lambda row:
+        abs(row['vSolInBondingCurve'] - trades_df[trades_df['timestamp'] < row['timestamp']]['vSolInBondingCurve'].iloc[-1]
+            if not trades_df[trades_df['timestamp'] < row['timestamp']].empty
+            else 0)
+        if row.name > 0 else row['vSolInBondingCurve'],
+        axis=1
+    )
+
+    for seconds, suffix in [(30, '30s'), (60, '1min'), (120, '2min'), (300, '5min')]:
+        window = trades_df[
+            trades_df['timestamp'] <= start_time + (seconds * 1000)
+        ]
+
+        if len(window) == 0:
+            continue
+
+        features[f'trades_{suffix}'] = len(window)
+        features[f'unique_traders_{suffix}'] = window['traderPublicKey'].nunique()
+
+        features[f'holders_{suffix}'] = window.iloc[-1]['holdersCount']
+        holders_growth = ((window.iloc[-1]['holdersCount'] - initial_holders) / initial_holders * 100) if initial_holders > 0 else 0
+        features[f'holders_growth_{suffix}'] = holders_growth
+
+        buys = window[window['txType'] == 'buy']
+        features[f'buy_ratio_{suffix}'] = len(buys) / len(window) if len(window) > 0 else 0
+
+        buy_volume = buys['trade_volume_sol'].sum()
+        total_volume = window['trade_volume_sol'].sum()
+        features[f'buy_pressure_{suffix}'] = buy_volume / total_volume if total_volume > 0 else 0
+
+        if len(window) > 1:
+            start_mcap = window.iloc[0]['marketCapSol']
+            end_mcap = window.iloc[-1]['marketCapSol']
+            features[f'mcap_growth_{suffix}'] = ((end_mcap - start_mcap) / start_mcap * 100) if start_mcap > 0 else 0
+
+    return features
+
+
+def assert_same(actual: dict, expected: dict):
+    assert list(actual) == list(expected)
+    for name, value in expected.items():
+        assert math.isclose(actual[name], value, rel_tol=1e-9, abs_tol=1e-12), (name, actual[name], value)
+
+
+def make_trades(n: int, seed: int, ties: bool = False, shuffle: bool = False):
+    trades = generate_trades(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    if ties:
+        # Several trades per second-bucket, so many share a timestamp
+        start = trades[0]['timestamp']
+        trades = [{**t, 'timestamp': start + (t['timestamp'] - start) // 1000 * 1000} for t in trades]
+    if shuffle:
+        trades = [trades[i] for i in rng.permutation(n)]
+    return trades
+
+
+CASES = [(n, seed, ties, shuffle)
+         for n in (1, 2, 7, 60, 400)
+         for seed in range(2)
+         for ties in (False, True)
+         for shuffle in (False, True)]
+
+
+@pytest.mark.parametrize("n, seed, ties, shuffle", CASES)
+def test_frame_matches_reference(n, seed, ties, shuffle):
+    trades = make_trades(n, seed, ties, shuffle)
+    token = generate_token(seed=seed)
+    frame = pd.DataFrame(trades)
+    assert_same(compute_quick_features(TradeArrays.from_frame(frame), token), reference_features(frame, token))
+
+
+@pytest.mark.parametrize("n, seed, ties, shuffle", CASES)
+def test_records_and_columns_match_reference(n, seed, ties, shuffle):
+    trades = make_trades(n, seed, ties, shuffle)
+    token = generate_token(seed=seed)
+    expected = reference_features(pd.DataFrame(trades), token)
+    assert_same(compute_quick_features(TradeArrays.from_records(trades), token), expected)
+    columns = {name: [t[name] for t in trades] for name in trades[0]}
+    assert_same(compute_quick_features(TradeArrays.from_columns(columns), token), expected)
+
+
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_non_range_index(seed, ties):
+    """Slices of a larger frame (as in training) and shuffled labels keep their index labels"""
+    token = generate_token(seed=seed)
+    frame = pd.DataFrame(make_trades(5, seed + 100) + make_trades(80, seed, ties))
+    sliced = frame.iloc[5:]
+    assert_same(compute_quick_features(TradeArrays.from_frame(sliced), token), reference_features(sliced, token))
+
+    shuffled = frame.sample(frac=1, random_state=seed)
+    assert_same(compute_quick_features(TradeArrays.from_frame(shuffled), token), reference_features(shuffled, token))
+
+
+def test_empty():
+    token = generate_token()
+    columns = {name: [] for name in ('timestamp', 'traderPublicKey', 'txType', 'vSolInBondingCurve',
+                                     'marketCapSol', 'holdersCount')}
+    expected = reference_features(pd.DataFrame(columns), token)
+    assert_same(compute_quick_features(TradeArrays.from_records([]), token), expected)
+    assert_same(compute_quick_features(TradeArrays.from_columns(columns), token), expected)
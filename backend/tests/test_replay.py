@@ -0,0 +1,74 @@
+# tests/test_replay.py
+"""DecisionPoints features against compute_quick_features on every trade prefix"""
+import numpy as np
+import pandas as pd
+import pytest
+from app.ml import traders
+from app.ml.features import TradeArrays, compute_quick_features
+from app.ml.replay import DecisionPoints
+from benchmarks.synthetic import generate_dataset, generate_token
+from tests.test_features import assert_same, make_trades
+
+# (trades, seed); 1000 trades span past the 5-minute window
+MINTS = [(1, 0), (7, 1), (60, 2), (1000, 3)]
+
+
+def history(ties: bool):
+    """One trade frame over several mints, rows interleaved, plus their token rows"""
+    trades, tokens = [], []
+    for i, (n, seed) in enumerate(MINTS):
+        mint = f"MINT{i}"
+        trades += [{**trade, 'mint': mint} for trade in make_trades(n, seed, ties)]
+        tokens.append(generate_token(mint, seed))
+    frame = pd.DataFrame(trades).sample(frac=1, random_state=0)
+    return frame, pd.DataFrame(tokens)
+
+
+def prefixes(trades_df: pd.DataFrame, mint: str):
+    """The mint's trades in replay order (timestamp, then original order) and their running prefixes"""
+    ordered = trades_df[trades_df['mint'] == mint].sort_values('timestamp', kind='stable')
+    records = ordered.to_dict('records')
+    return [records[:k + 1] for k in range(len(records))]
+
+
+def row(columns: dict, i: int) -> dict:
+    return {name: values[i].item() for name, values in columns.items()}
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_prefix_features_match_compute_quick_features(ties):
+    trades_df, tokens_df = history(ties)
+    points = DecisionPoints(trades_df, tokens_df)
+    assert len(points) == len(trades_df)
+    tokens = tokens_df.set_index('mint')
+    for code, mint in enumerate(points.mints):
+        columns = points.features(points.starts[code], points.ends[code])
+        token = tokens.loc[mint].to_dict()
+        for k, prefix in enumerate(prefixes(trades_df, mint)):
+            expected = compute_quick_features(TradeArrays.from_records(prefix), token)
+            actual = row(columns, k)
+            assert_same({name: actual[name] for name in expected}, expected)
+
+
+def test_wallet_features_match_index_lookup():
+    train_trades, _ = generate_dataset(40, 30, seed=5)
+    stored_rows, hashes, flags = [], [], []
+    for row_index, (_, mint_trades) in enumerate(train_trades.groupby('mint', sort=True)):
+        mint_hashes, mint_flags = traders.mint_wallets(TradeArrays.from_frame(mint_trades))
+        stored_rows += [row_index] * len(mint_hashes)
+        hashes.append(mint_hashes)
+        flags.append(mint_flags)
+    wins = np.arange(40) % 3 == 0
+    index, _ = traders.fit(np.array(stored_rows), np.concatenate(hashes), np.concatenate(flags), wins, 40)
+
+    trades_df, tokens_df = history(ties=False)
+    points = DecisionPoints(trades_df, tokens_df)
+    points.use_traders(index)
+    # The replayed wallets overlap the indexed ones, so lookups aren't all misses
+    assert points.features(0, len(points))['wallet_known_ratio'].max() > 0
+    for code, mint in enumerate(points.mints):
+        columns = points.features(points.starts[code], points.ends[code])
+        for k, prefix in enumerate(prefixes(trades_df, mint)):
+            expected = index.features(traders.window_traders(TradeArrays.from_records(prefix)))
+            actual = row(columns, k)
+            assert_same({name: actual[name] for name in expected}, expected)
@@ -0,0 +1,58 @@
+# tests/test_streaming.py
+"""MintState's rolling aggregates against the original extraction over the same trades"""
+import pandas as pd
+import pytest
+from app.ml.features import WINDOWS
+from app.ml.streaming import MintState, StreamingFeatureState
+from benchmarks.synthetic import generate_token, generate_trades
+from tests.test_features import CASES, assert_same, make_trades, reference_features
+
+
+def streamed(trades, token) -> MintState:
+    state = MintState(token['mint'], token)
+    for trade in trades:
+        state.update(trade)
+    return state
+
+
+@pytest.mark.parametrize("n, seed, ties, shuffle", CASES)
+def test_matches_reference(n, seed, ties, shuffle):
+    # A feed delivers trades in timestamp order; the reference reads the same sequence
+    trades = sorted(make_trades(n, seed, ties, shuffle), key=lambda t: t['timestamp'])
+    token = generate_token(seed=seed)
+    assert_same(streamed(trades, token).features(), reference_features(pd.DataFrame(trades), token))
+
+
+def test_window_closes_at_five_minutes():
+    token = generate_token()
+    trades = generate_trades(20)
+    start = trades[0]['timestamp']
+    cutoff = start + WINDOWS[-1][0] * 1000
+    # One trade exactly on the cutoff (still inside), then later trades that must not count
+    trades += [{**trades[-1], 'timestamp': cutoff, 'traderPublicKey': 'LAST', 'holdersCount': 99}]
+    late = [{**trades[-1], 'timestamp': cutoff + 1 + i, 'traderPublicKey': f'LATE{i}', 'txType': 'sell'}
+            for i in range(5)]
+
+    state = streamed(trades, token)
+    assert not state.closed
+    inside = state.features()
+    assert inside['trades_5min'] == 21 and inside['holders_5min'] == 99
+    assert_same(inside, reference_features(pd.DataFrame(trades), token))
+
+    for trade in late:
+        state.update(trade)
+    assert state.closed
+    assert_same(state.features(), inside)
+    assert 'LAST' in state.traders and not any(f'LATE{i}' in state.traders for i in range(5))
+
+
+def test_state_features_match_mint_state():
+    token = generate_token(seed=1)
+    trades = make_trades(60, 1, ties=True)
+    registry = StreamingFeatureState()
+    registry.register_token(token)
+    for trade in trades:
+        registry.add_trade(trade)
+    assert_same(registry.features(token['mint']), streamed(trades, token).features())
+    with pytest.raises(KeyError):
+        registry.features('UNKNOWN')
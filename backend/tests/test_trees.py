@@ -0,0 +1,73 @@
+# tests/test_trees.py
+"""TreeEnsemble scores against the LightGBM boosters they were exported from"""
+import numpy as np
+import pytest
+lgb = pytest.importorskip("lightgbm")
+from app.ml.trees import MISSING_NAN, MISSING_NONE, MISSING_ZERO, TreeEnsemble
+
+
+def dataset(seed: int, n: int = 2000, n_features: int = 6):
+    """Features with NaNs and exact zeros that carry signal, so missing routing matters"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    X[rng.random((n, n_features)) < 0.15] = np.nan
+    X[rng.random((n, n_features)) < 0.15] = 0.0
+    signal = np.nan_to_num(X[:, 0], nan=2.0) + np.where(X[:, 1] == 0, -1.5, np.nan_to_num(X[:, 1]))
+    y = (signal + rng.normal(scale=0.5, size=n) > 0).astype(float)
+    return X, y
+
+
+def train(X, y, objective: str = "binary", **params):
+    return lgb.train({"objective": objective, "num_leaves": 15, "min_data_in_leaf": 5, "verbose": -1,
+                      "seed": 0, **params}, lgb.Dataset(X, label=y), num_boost_round=30)
+
+
+def rows_to_score(X: np.ndarray, seed: int) -> np.ndarray:
+    """The training rows plus rows of only NaNs, only zeros and values beyond every threshold"""
+    n_features = X.shape[1]
+    return np.vstack([X, np.full((1, n_features), np.nan), np.zeros((1, n_features)),
+                      np.full((1, n_features), 1e6), np.full((1, n_features), -1e6),
+                      np.random.default_rng(seed).normal(size=(50, n_features))])
+
+
+@pytest.mark.parametrize("params, missing_type", [
+    ({}, MISSING_NAN),
+    ({"zero_as_missing": True}, MISSING_ZERO),
+    ({"use_missing": False}, MISSING_NONE),
+])
+@pytest.mark.parametrize("seed", range(2))
+def test_matches_booster(seed, params, missing_type):
+    X, y = dataset(seed)
+    booster = train(X, y, **params)
+    trees = TreeEnsemble.from_model_string(booster.model_to_string())
+    assert trees.meta['num_trees'] == booster.num_trees()
+    assert missing_type in set(trees.missing_type.tolist())
+
+    rows = rows_to_score(X, seed)
+    np.testing.assert_allclose(trees.raw_score(rows), booster.predict(rows, raw_score=True), rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(trees.predict(rows), booster.predict(rows), rtol=1e-9, atol=1e-12)
+
+
+def test_default_direction_both_ways():
+    """NaN goes left at some splits and right at others; both must match the booster"""
+    X, y = dataset(3)
+    booster = train(X, y)
+    trees = TreeEnsemble.from_model_string(booster.model_to_string())
+    nan_splits = trees.missing_type == MISSING_NAN
+    assert trees.default_left[nan_splits].any() and not trees.default_left[nan_splits].all()
+
+    rows = rows_to_score(X, 3)
+    rows[::3, :] = np.nan
+    np.testing.assert_allclose(trees.raw_score(rows), booster.predict(rows, raw_score=True), rtol=1e-9, atol=1e-12)
+
+
+def test_regression_and_saved_arrays(tmp_path):
+    X, y = dataset(4)
+    booster = train(X, y + np.nan_to_num(X[:, 2]), objective="regression")
+    trees = TreeEnsemble.from_model_string(booster.model_to_string())
+    loaded = TreeEnsemble.load(trees.save(str(tmp_path / "model.trees")))
+
+    rows = rows_to_score(X, 4)
+    expected = booster.predict(rows)
+    np.testing.assert_allclose(trees.predict(rows), expected, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(loaded.predict(rows), expected, rtol=1e-9, atol=1e-12)
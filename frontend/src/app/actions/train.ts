@@ -28,7 +28,8 @@ export async function trainModel(trades: TradeEvent[], tokens: TokenData[]) {
       throw new Error(data.detail || "Training failed");
     }
 
-    return { success: true, data };
+    // 202 Accepted: training runs as a background job, see getTrainingStatus
+    return { success: true, data: data as { status: string; job_id: string } };
   } catch (error) {
     console.error("Training error:", error);
     return {
@@ -37,3 +38,40 @@ export async function trainModel(trades: TradeEvent[], tokens: TokenData[]) {
     };
   }
 }
+
+export interface TrainingJob {
+  job_id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  stage: string | null;
+  progress: number;
+  error: string | null;
+  result: {
+    version: string;
+    success_rate: number;
+    success_count: number;
+    num_trees: number;
+  } | null;
+}
+
+export async function getTrainingStatus(jobId: string) {
+  try {
+    const response = await fetch(
+      `${ML_SERVICE_URL}/train/${encodeURIComponent(jobId)}`,
+      { cache: "no-store" }
+    );
+    const data = await response.json();
+
+    if (!response.ok) {
+      throw new Error(data.detail || "Could not read training status");
+    }
+
+    return { success: true, job: data as TrainingJob };
+  } catch (error) {
+    console.error("Training status error:", error);
+    return {
+      success: false,
+      error:
+        error instanceof Error ? error.message : "Could not read training status",
+    };
+  }
+}
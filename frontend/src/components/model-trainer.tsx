@@ -9,7 +9,7 @@ import { Progress } from "@/components/ui/progress";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 import { Upload, AlertCircle, CheckCircle2 } from "lucide-react";
 import Papa from "papaparse";
-import { trainModel } from "@/app/actions/train";
+import { getTrainingStatus, trainModel } from "@/app/actions/train";
 import { TokenData, TradeEvent } from "@/components/token-scanner/types";
 
 // Helper function to track holder counts
@@ -79,6 +79,11 @@ const formatTokenData = (token: any): TokenData => ({
   liquidity: Number(token.liquidity || 0),
 });
 
+const POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms: number) =>
+  new Promise((resolve) => setTimeout(resolve, ms));
+
 export function ModelTrainer() {
   const [tradesFile, setTradesFile] = useState<File | null>(null);
   const [tokensFile, setTokensFile] = useState<File | null>(null);
@@ -122,6 +127,7 @@ export function ModelTrainer() {
     }
 
     setStatus("processing");
+    setMessage("");
     setProgress(10);
 
     try {
@@ -149,17 +155,41 @@ export function ModelTrainer() {
       setDataStats(stats);
       setProgress(70);
 
-      // Train model
+      // Start training; the server answers right away with a job to poll
       const result = await trainModel(processedTrades, tokens);
 
-      if (!result.success) {
+      if (!result.success || !result.data) {
         throw new Error(result.error);
       }
+      setMessage("Training started");
+
+      const jobId = result.data.job_id;
+      for (;;) {
+        await sleep(POLL_INTERVAL_MS);
+        const poll = await getTrainingStatus(jobId);
+        if (!poll.success || !poll.job) {
+          throw new Error(poll.error);
+        }
+        const job = poll.job;
+        if (job.status === "failed") {
+          throw new Error(job.error || "Training failed");
+        }
+        if (job.status === "completed") {
+          const version = job.result ? ` (model ${job.result.version})` : "";
+          setMessage(
+            `Model trained successfully with ${processedTrades.length} trades and ${tokens.length} tokens${version}!`
+          );
+          break;
+        }
+        setMessage(
+          job.status === "queued"
+            ? "Training queued"
+            : `Training: ${job.stage ?? "running"}`
+        );
+        setProgress(70 + Math.round(job.progress * 29));
+      }
 
       setStatus("success");
-      setMessage(
-        `Model trained successfully with ${processedTrades.length} trades and ${tokens.length} tokens!`
-      );
       setProgress(100);
     } catch (error) {
       console.error("Training failed:", error);
@@ -233,7 +263,7 @@ export function ModelTrainer() {
             <div className="space-y-2">
               <Progress value={progress} className="w-full" />
               <p className="text-sm text-center text-muted-foreground">
-                Processing files and training model...
+                {message || "Processing files and training model..."}
               </p>
             </div>
           )}